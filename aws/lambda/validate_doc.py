@@ -1,15 +1,18 @@
 from __future__ import annotations
 
-import io
 import json
 import logging
 import os
 import re
-from typing import Dict, List, Tuple
+import tempfile
+from typing import IO, Dict, Iterable, List, Tuple
 from urllib.parse import unquote_plus
 
 import boto3
 import pdfplumber
+from pdfminer.pdfpage import PDFPage
+from pdfminer.pdftypes import resolve1
+from pdfplumber.page import Page
 
 from doc_checker import service
 from doc_checker.config import get_settings
@@ -24,6 +27,11 @@ textract = boto3.client("textract", region_name=settings.region_name)
 
 _ENABLE_TEXTRACT = os.getenv("DOC_CHECKER_ENABLE_TEXTRACT", "false").lower() in {"true", "1", "yes"}
 
+# Uploads are streamed to a spool file instead of read into memory; small
+# ones stay in memory, larger ones go to /tmp.
+_SPOOL_CHUNK_BYTES = 1024 * 1024
+_SPOOL_MEMORY_BYTES = 8 * 1024 * 1024
+
 
 def handler(event, _context):
     objects = _extract_object_events(event)
@@ -123,29 +131,35 @@ def _process_object(bucket: str, key: str) -> None:
     if is_pdf and size_bytes > max_bytes:
         messages.append("Content checks skipped because the file exceeds the size limit")
     elif is_pdf:
-        obj = s3.get_object(Bucket=bucket, Key=key)
-        data = obj["Body"].read()
+        required_sections = requirement.get("required_sections", [])
+        missing_sections: List[str] = []
+        pages_read = 0
         try:
-            with pdfplumber.open(io.BytesIO(data)) as pdf:
-                page_count = len(pdf.pages)
-                for page in pdf.pages:
-                    extracted_text += (page.extract_text() or "") + "\n"
+            with _spool_object(bucket, key) as spool, pdfplumber.open(spool) as pdf:
+                page_count = _pdf_page_count(pdf)
+                if page_count > max_pages:
+                    status = "invalid"
+                    messages.append(f"PDF has {page_count} pages; limit is {max_pages}")
+                    messages.append("Content checks skipped because the PDF exceeds the page limit")
+                else:
+                    extracted_text, missing_sections, pages_read = _scan_pdf_text(
+                        pdf, required_sections, want_text=_ENABLE_TEXTRACT
+                    )
         except Exception as exc:  # pylint: disable=broad-except
             status = "error"
             messages.append(f"Failed to read PDF: {exc}")
             extracted_text = ""
+            missing_sections = list(required_sections)
+        within_page_limit = page_count is None or page_count <= max_pages
+        if not within_page_limit:
+            missing_sections = []
+        logger.info("Read %d of %s pages of s3://%s/%s", pages_read, page_count, bucket, key)
 
-        if page_count is not None and page_count > max_pages:
-            status = "invalid"
-            messages.append(f"PDF has {page_count} pages; limit is {max_pages}")
-
-        extracted_normalised = extracted_text.lower()
-        missing_sections = [section for section in requirement.get("required_sections", []) if section.lower() not in extracted_normalised]
         if missing_sections:
             status = "invalid"
             messages.append(f"Missing sections: {', '.join(missing_sections)}")
 
-        if not extracted_text.strip() and _ENABLE_TEXTRACT:
+        if within_page_limit and not extracted_text.strip() and _ENABLE_TEXTRACT:
             textract_text = _run_textract(bucket, key)
             if not textract_text.strip():
                 status = "invalid"
@@ -171,6 +185,75 @@ def _process_object(bucket: str, key: str) -> None:
     _recalculate_overall(submission_id)
 
 
+def _spool_object(bucket: str, key: str) -> IO[bytes]:
+    """Stream an S3 object into a seekable temp file in 1 MB chunks."""
+    body = s3.get_object(Bucket=bucket, Key=key)["Body"]
+    spool = tempfile.SpooledTemporaryFile(max_size=_SPOOL_MEMORY_BYTES)
+    try:
+        for chunk in body.iter_chunks(chunk_size=_SPOOL_CHUNK_BYTES):
+            spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    finally:
+        body.close()
+    spool.seek(0)
+    return spool
+
+
+def _pdf_page_count(pdf) -> int:
+    """Page count from the catalog's page tree (``/Root /Pages /Count``).
+
+    Only the trailer, xref and catalog are parsed, so an oversized PDF is
+    rejected before any page is loaded. Falls back to walking the page tree
+    when ``/Count`` is missing or malformed.
+    """
+    pages = resolve1(pdf.doc.catalog.get("Pages"))
+    count = resolve1(pages.get("Count")) if isinstance(pages, dict) else None
+    if isinstance(count, int) and count >= 0:
+        return count
+    return sum(1 for _ in PDFPage.create_pages(pdf.doc))
+
+
+def _iter_pages(pdf) -> Iterable[Page]:
+    """pdfplumber pages built one at a time, unlike ``pdf.pages`` which loads them all."""
+    doctop = 0
+    for number, page_obj in enumerate(PDFPage.create_pages(pdf.doc), start=1):
+        page = Page(pdf, page_obj, page_number=number, initial_doctop=doctop)
+        doctop += page.height
+        yield page
+
+
+def _scan_pdf_text(pdf, sections: List[str], want_text: bool = False) -> Tuple[str, List[str], int]:
+    """Extract text page by page until every required section has been seen.
+
+    ``want_text`` keeps reading until some page has text (so the Textract
+    fallback can tell a scanned PDF apart). A section split across a page
+    break still matches, as it did when all pages were joined. Returns the
+    text read, the sections never found and the number of pages read.
+    """
+    pending: Dict[str, str] = {section: section.lower() for section in sections}
+    overlap = max((len(lowered) for lowered in pending.values()), default=0)
+    texts: List[str] = []
+    tail = ""
+    pages_read = 0
+    for page in _iter_pages(pdf):
+        if not pending and not want_text:
+            break
+        text = page.extract_text() or ""
+        page.close()
+        pages_read += 1
+        texts.append(text)
+        if text.strip():
+            want_text = False
+        window = tail + text.lower() + "\n"
+        for section, lowered in list(pending.items()):
+            if lowered in window:
+                del pending[section]
+        tail = window[-overlap:] if overlap else ""
+    return "\n".join(texts), list(pending), pages_read
+
+
 def _recalculate_overall(submission_id: str) -> None:
     try:
         record = service.get_submission(submission_id)
@@ -1,26 +1,87 @@
 """Insert grants data into PostgreSQL."""
 from __future__ import annotations
 
+import io
 import json
+import os
 import re
 from collections import defaultdict
-from datetime import datetime, timezone
-from typing import Any, Dict, Iterable, List
+from itertools import chain
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List
 
-from notifications.gmail_notifier import send_grant_notification
-from grants.sql_utils import db_connection, get_subscribers_for_fields
+from grants.data.outbox import enqueue_notifications
+from grants.env import int_env
+from grants.sql_utils import db_connection, get_subscribers_for_fields, refresh_field_catalog
+from notifications.digest import collect_payloads, render_digests
+from notifications.gmail_notifier import send_grant_notifications
+from grants_data.dates import record_date
 
 from logs.status_logger import logger
 
-_DATE_FORMATS = [
-    "%Y-%m-%d",
-    "%m/%d/%Y",
-    "%Y-%m-%dT%H:%M:%S",
-    "%Y-%m-%dT%H:%M:%SZ",
-]
-
 _SPLIT_PATTERN = re.compile(r"[;,/]+")
 
+_GRANT_COLUMNS = (
+    "opp_id",
+    "title",
+    "stage",
+    "opportunity_status",
+    "opportunity_category",
+    "funding_categories",
+    "post_date",
+    "close_date",
+    "archive_date",
+    "description",
+    "field_keys",
+)
+
+_UPSERT_ASSIGNMENTS = ",\n        ".join(
+    f"{column} = EXCLUDED.{column}" for column in _GRANT_COLUMNS if column != "opp_id"
+)
+
+_ROW_UPSERT_SQL = f"""
+    INSERT INTO grants ({", ".join(_GRANT_COLUMNS)})
+    VALUES ({",".join(["%s"] * len(_GRANT_COLUMNS))})
+    ON CONFLICT (opp_id) DO UPDATE SET
+        {_UPSERT_ASSIGNMENTS}
+    RETURNING (xmax = 0) AS is_new;
+"""
+
+# Staging mirrors the grants columns plus ``seq`` so duplicate opp_ids within
+# one load resolve to the last record, matching the row-by-row behaviour.
+_STAGING_DDL = """
+    CREATE TEMP TABLE IF NOT EXISTS grants_staging (
+        seq BIGINT NOT NULL,
+        opp_id TEXT NOT NULL,
+        title TEXT,
+        stage TEXT,
+        opportunity_status TEXT,
+        opportunity_category TEXT,
+        funding_categories TEXT,
+        post_date TIMESTAMP,
+        close_date TIMESTAMP,
+        archive_date TIMESTAMP,
+        description TEXT,
+        field_keys TEXT[]
+    ) ON COMMIT DROP;
+"""
+
+_STAGING_COPY_SQL = f"COPY grants_staging (seq, {', '.join(_GRANT_COLUMNS)}) FROM STDIN"
+
+_STAGING_MERGE_SQL = f"""
+    INSERT INTO grants ({", ".join(_GRANT_COLUMNS)})
+    SELECT DISTINCT ON (opp_id) {", ".join(_GRANT_COLUMNS)}
+    FROM grants_staging
+    ORDER BY opp_id, seq DESC
+    ON CONFLICT (opp_id) DO UPDATE SET
+        {_UPSERT_ASSIGNMENTS}
+    RETURNING opp_id, (xmax = 0) AS is_new;
+"""
+
+_DEFAULT_BATCH_SIZE = 5000
+
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
 
 
 def derive_stage(title: str, description: str) -> str:
@@ -32,20 +93,11 @@ def derive_stage(title: str, description: str) -> str:
 
 
 
-def _parse_timestamp(value: Any) -> datetime | None:
-    if value in (None, ""):
-        return None
-    text = str(value)
-    for fmt in _DATE_FORMATS:
-        try:
-            parsed = datetime.strptime(text, fmt)
-            if parsed.tzinfo is not None:
-                return parsed.astimezone(timezone.utc).replace(tzinfo=None)
-            return parsed
-        except ValueError:
-            continue
-    logger("warning", f"Unable to parse timestamp '{text}'")
-    return None
+def _parse_timestamp(record: Dict[str, Any], field: str) -> datetime | None:
+    parsed = record_date(record, field)
+    if parsed is None and record.get(field) not in (None, ""):
+        logger("warning", f"Unable to parse timestamp '{record.get(field)}'")
+    return parsed
 
 
 
@@ -86,98 +138,23 @@ def _extract_fields(opportunity_category: Any, funding_categories: str | None) -
 
 
 
-def _format_date(value: datetime | None) -> str:
-    if not value:
-        return "N/A"
-    return value.strftime("%b %d, %Y")
-
+def _notify_subscribers(
+    field_grants: Dict[str, List[Dict[str, Any]]],
+    field_labels: Dict[str, str],
+    profile_grants: Dict[str, List[tuple[Dict[str, Any], List[str]]]] | None = None,
+) -> None:
+    """Email each subscriber the new grants matching their fields or keyword profile.
 
-
-def _notify_subscribers(field_grants: Dict[str, List[Dict[str, Any]]], field_labels: Dict[str, str]) -> None:
-    subscribers_map = get_subscribers_for_fields(field_grants.keys())
-    if not any(subscribers_map.values()):
+    Only used when the notification outbox table is missing; normally the
+    loader queues alerts and ``grants.data.outbox`` sends them.
+    """
+    subscribers_map = get_subscribers_for_fields(field_grants.keys()) if field_grants else {}
+    payloads = collect_payloads(field_grants, field_labels, subscribers_map, profile_grants)
+    if not payloads:
         return
-
-    email_payload: Dict[str, Dict[str, Any]] = {}
-    for field_key, grants in field_grants.items():
-        subscribers = subscribers_map.get(field_key)
-        if not subscribers:
-            continue
-        label = field_labels.get(field_key, field_key.title())
-        for email in subscribers:
-            payload = email_payload.setdefault(email, {"fields": set(), "grants": {}})
-            payload["fields"].add(label)
-            grant_map = payload["grants"]
-            for grant in grants:
-                entry = grant_map.setdefault(
-                    grant["opp_id"],
-                    {
-                        "opp_id": grant["opp_id"],
-                        "title": grant["title"],
-                        "stage": grant.get("stage"),
-                        "close_date": grant.get("close_date"),
-                        "post_date": grant.get("post_date"),
-                        "url": grant.get("url"),
-                        "agency": grant.get("agency"),
-                        "matched_fields": set(),
-                    },
-                )
-                entry["matched_fields"].add(label)
-
-    if not email_payload:
-        return
-
-    sent = 0
-    for email, data in email_payload.items():
-        fields_sorted = sorted(data["fields"])
-        subject_focus = ", ".join(fields_sorted[:2])
-        if len(fields_sorted) > 2:
-            subject_focus += " + more"
-        subject = f"GrantWatch: new grants in {subject_focus or 'your fields'}"
-
-        grants = list(data["grants"].values())
-        grants.sort(key=lambda item: (item["close_date"] is None, item["close_date"] or item["post_date"] or datetime.max))
-
-        lines = [
-            "Hi there,",
-            "",
-            f"You asked to hear about new grants in: {', '.join(fields_sorted)}.",
-            "",
-            "Here are the latest opportunities:",
-            "",
-        ]
-
-        for grant in grants:
-            lines.append(f"- {grant['title']} (ID: {grant['opp_id']})")
-            meta_parts: List[str] = []
-            if grant.get("close_date"):
-                meta_parts.append(f"Due {_format_date(grant['close_date'])}")
-            if grant.get("post_date"):
-                meta_parts.append(f"Posted {_format_date(grant['post_date'])}")
-            if grant.get("stage"):
-                meta_parts.append(f"Stage: {grant['stage'].title()}")
-            if grant.get("matched_fields"):
-                meta_parts.append(f"Matches: {', '.join(sorted(grant['matched_fields']))}")
-            if meta_parts:
-                lines.append(f"  {' | '.join(meta_parts)}")
-            if grant.get("agency"):
-                lines.append(f"  Agency: {grant['agency']}")
-            if grant.get("url"):
-                lines.append(f"  {grant['url']}")
-            lines.append("")
-
-        lines.extend(
-            [
-                "--",
-                "Update your subscription preferences any time from the GrantWatch dashboard.",
-            ]
-        )
-
-        body = "\n".join(lines).strip()
-        if send_grant_notification(subject, body, [email]):
-            sent += 1
-
-    logger("info", f"Dispatched subscriber updates to {sent} recipients")
+    messages = render_digests(payloads)
+    sent = sum(send_grant_notifications(messages))
+    logger("info", f"Dispatched subscriber updates to {sent} of {len(messages)} recipients")
 
 
 
@@ -196,86 +173,215 @@ def _legacy_to_record(grant: Dict[str, Any]) -> Dict[str, Any]:
 
 
 
-def load_grants_from_records(records: Iterable[Dict[str, Any]]) -> int:
-    inserted = 0
-    field_grants: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
-    field_labels: Dict[str, str] = {}
+def _batch_size() -> int:
+    return int_env("GRANTS_DB_BATCH_SIZE", _DEFAULT_BATCH_SIZE, minimum=1)
+
+
+
+def _iter_batches(records: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    batch: List[Dict[str, Any]] = []
+    for grant in records:
+        row = _prepare_grant(grant)
+        if row is None:
+            continue
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+
+def _bulk_load_enabled() -> bool:
+    mode = (os.getenv("GRANTS_DB_LOAD_MODE") or "bulk").strip().lower()
+    if mode not in {"bulk", "row"}:
+        logger("warning", f"Unknown GRANTS_DB_LOAD_MODE '{mode}'; defaulting to 'bulk'")
+        return True
+    return mode == "bulk"
 
-    with db_connection() as conn, conn.cursor() as cur:
-        for grant in records:
-            record = _legacy_to_record(grant)
-            opp_id = record.get("OPPORTUNITY_NUMBER")
-            if not opp_id:
-                logger("warning", "Skipping grant without OPPORTUNITY_NUMBER")
-                continue
-
-            title = record.get("OPPORTUNITY_TITLE", "")
-            description = record.get("SUMMARY") or record.get("FUNDING_DESCRIPTION", "")
-            stage = derive_stage(str(title), str(description))
-            status = record.get("OPPORTUNITY_STATUS", "Posted")
-            post_date = _parse_timestamp(record.get("POSTED_DATE"))
-            close_date = _parse_timestamp(record.get("CLOSE_DATE"))
-            archive_date = _parse_timestamp(record.get("ARCHIVE_DATE"))
-            opportunity_category = record.get("OPPORTUNITY_CATEGORY")
-            funding_categories = _serialise_categories(record.get("FUNDING_CATEGORIES"))
-
-            cur.execute(
-                """
-                INSERT INTO grants (opp_id, title, stage, opportunity_status,
-                                    opportunity_category, funding_categories,
-                                    post_date, close_date, archive_date, description)
-                VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
-                ON CONFLICT (opp_id) DO UPDATE SET
-                    title = EXCLUDED.title,
-                    stage = EXCLUDED.stage,
-                    opportunity_status = EXCLUDED.opportunity_status,
-                    opportunity_category = EXCLUDED.opportunity_category,
-                    funding_categories = EXCLUDED.funding_categories,
-                    post_date = EXCLUDED.post_date,
-                    close_date = EXCLUDED.close_date,
-                    archive_date = EXCLUDED.archive_date,
-                    description = EXCLUDED.description
-                RETURNING (xmax = 0) AS is_new;
-                """,
-                (
-                    opp_id,
-                    title,
-                    stage,
-                    status,
-                    opportunity_category,
-                    funding_categories,
-                    post_date,
-                    close_date,
-                    archive_date,
-                    description,
-                ),
-            )
-            row = cur.fetchone()
-            is_new = bool(row and row[0])
-            if is_new:
-                inserted += 1
-                for key, label in _extract_fields(opportunity_category, funding_categories):
-                    field_labels.setdefault(key, label)
-                    field_grants[key].append(
-                        {
-                            "opp_id": opp_id,
-                            "title": title,
-                            "stage": stage,
-                            "close_date": close_date,
-                            "post_date": post_date,
-                            "agency": record.get("AGENCY"),
-                            "url": record.get("OPPORTUNITY_URL"),
-                        }
-                    )
-
-    if field_grants:
-        _notify_subscribers(field_grants, field_labels)
 
+
+def _copy_value(value: Any) -> str:
+    """Render one value in COPY text format (``\\N`` is NULL)."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    if isinstance(value, list):
+        value = _array_literal(value)
+    return str(value).translate(_COPY_ESCAPES)
+
+
+
+def _array_literal(values: List[str]) -> str:
+    """Postgres ``text[]`` input syntax with every element quoted."""
+    quoted = (
+        '"' + str(value).replace("\\", "\\\\").replace('"', '\\"') + '"' for value in values
+    )
+    return "{" + ",".join(quoted) + "}"
+
+
+
+def _prepare_grant(grant: Dict[str, Any]) -> Dict[str, Any] | None:
+    record = _legacy_to_record(grant)
+    opp_id = record.get("OPPORTUNITY_NUMBER")
+    if not opp_id:
+        logger("warning", "Skipping grant without OPPORTUNITY_NUMBER")
+        return None
+
+    title = record.get("OPPORTUNITY_TITLE", "")
+    description = record.get("SUMMARY") or record.get("FUNDING_DESCRIPTION", "")
+    opportunity_category = record.get("OPPORTUNITY_CATEGORY")
+    funding_categories = _serialise_categories(record.get("FUNDING_CATEGORIES"))
+    return {
+        "opp_id": opp_id,
+        "title": title,
+        "stage": derive_stage(str(title), str(description)),
+        "opportunity_status": record.get("OPPORTUNITY_STATUS", "Posted"),
+        "opportunity_category": opportunity_category,
+        "funding_categories": funding_categories,
+        "post_date": _parse_timestamp(record, "POSTED_DATE"),
+        "close_date": _parse_timestamp(record, "CLOSE_DATE"),
+        "archive_date": _parse_timestamp(record, "ARCHIVE_DATE"),
+        "description": description,
+        "field_keys": [key for key, _label in _extract_fields(opportunity_category, funding_categories)],
+        "agency": record.get("AGENCY"),
+        "url": record.get("OPPORTUNITY_URL"),
+        "matched_profiles": record.get("MATCHED_PROFILES") or {},
+    }
+
+
+
+def _upsert_rows(cur, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """One INSERT ... ON CONFLICT round trip per row; returns the new rows."""
+    new_rows: List[Dict[str, Any]] = []
+    for row in rows:
+        cur.execute(_ROW_UPSERT_SQL, tuple(row[column] for column in _GRANT_COLUMNS))
+        result = cur.fetchone()
+        if result and result[0]:
+            new_rows.append(row)
+    return new_rows
+
+
+
+def _bulk_upsert(cur, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """COPY rows into a temp staging table and merge them in one statement.
+
+    Cost scales with bytes streamed rather than round trips; ``xmax = 0`` on
+    the merge's RETURNING still tells inserted rows apart from updates.
+    """
+    buffer = io.StringIO()
+    for seq, row in enumerate(rows):
+        values = [str(seq)] + [_copy_value(row[column]) for column in _GRANT_COLUMNS]
+        buffer.write("\t".join(values))
+        buffer.write("\n")
+    buffer.seek(0)
+
+    cur.execute(_STAGING_DDL)
+    cur.execute("TRUNCATE grants_staging;")
+    cur.copy_expert(_STAGING_COPY_SQL, buffer)
+    cur.execute(_STAGING_MERGE_SQL)
+    new_ids = {opp_id for opp_id, is_new in cur.fetchall() if is_new}
+
+    # Keep the last record per opp_id, i.e. the one the merge wrote.
+    latest: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        if row["opp_id"] in new_ids:
+            latest[row["opp_id"]] = row
+    return list(latest.values())
+
+
+
+def load_grants_from_records(
+    records: Iterable[Dict[str, Any]],
+    bulk: bool | None = None,
+    profile_records: Iterable[Dict[str, Any]] = (),
+) -> int:
+    """Upsert grant records and queue subscriber alerts for newly inserted ones.
+
+    ``bulk`` (default from ``GRANTS_DB_LOAD_MODE``, ``bulk`` unless set to
+    ``row``) streams every record through ``COPY`` into a staging table and
+    merges once instead of issuing one upsert per record. ``records`` is
+    consumed in batches of ``GRANTS_DB_BATCH_SIZE`` inside one transaction,
+    so generators are never materialised in full. The subscription field
+    catalog is refreshed and the alerts are written to ``notification_outbox``
+    in that same transaction; nothing is emailed here (see
+    ``grants.data.outbox``).
+
+    ``profile_records`` are grants kept only because a subscriber keyword
+    profile matched (``PROFILE_ONLY``). They are never written to ``grants``;
+    only the matching subscribers' alerts are queued, and the outbox's
+    ``(email, opp_id)`` key stops later runs from queueing them again.
+    """
+    if bulk is None:
+        bulk = _bulk_load_enabled()
+
+    new_rows: List[Dict[str, Any]] = []
+    profile_rows = [row for row in map(_prepare_grant, profile_records) if row is not None]
+
+    batches = _iter_batches(records, _batch_size())
+    first_batch = next(batches, None)
+    if first_batch is None and not profile_rows:
+        logger("info", "Inserted 0 grants into the database")
+        return 0
+
+    payloads: Dict[str, Dict[str, Any]] = {}
+    with db_connection() as conn, conn.cursor() as cur:
+        if first_batch is not None:
+            for batch in chain([first_batch], batches):
+                new_rows.extend(_bulk_upsert(cur, batch) if bulk else _upsert_rows(cur, batch))
+            if not refresh_field_catalog(cur):
+                logger("warning", "grant_field_catalog missing; run ensure_schema() to create it")
+
+        field_grants, field_labels, profile_grants = _group_new_rows(new_rows)
+        for email, matches in _group_new_rows(profile_rows)[2].items():
+            profile_grants[email].extend(matches)
+        if field_grants or profile_grants:
+            subscribers_map = get_subscribers_for_fields(field_grants.keys(), cur=cur) if field_grants else {}
+            payloads = collect_payloads(field_grants, field_labels, subscribers_map, profile_grants)
+        queued = enqueue_notifications(cur, payloads) if payloads else 0
+
+    if queued is None:
+        logger("warning", "notification_outbox missing; emailing subscribers inline (run ensure_schema())")
+        _notify_subscribers(field_grants, field_labels, profile_grants)
+    elif queued:
+        logger("info", f"Queued {queued} subscriber alerts in notification_outbox")
+
+    inserted = len(new_rows)
     logger("info", f"Inserted {inserted} grants into the database")
     return inserted
 
 
 
+def _group_new_rows(new_rows: List[Dict[str, Any]]) -> tuple[
+    Dict[str, List[Dict[str, Any]]],
+    Dict[str, str],
+    Dict[str, List[tuple[Dict[str, Any], List[str]]]],
+]:
+    """Index new grants by subscription field and by matched keyword profile."""
+    field_grants: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    field_labels: Dict[str, str] = {}
+    profile_grants: Dict[str, List[tuple[Dict[str, Any], List[str]]]] = defaultdict(list)
+    for row in new_rows:
+        grant = {
+            "opp_id": row["opp_id"],
+            "title": row["title"],
+            "stage": row["stage"],
+            "close_date": row["close_date"],
+            "post_date": row["post_date"],
+            "agency": row["agency"],
+            "url": row["url"],
+        }
+        for key, label in _extract_fields(row["opportunity_category"], row["funding_categories"]):
+            field_labels.setdefault(key, label)
+            field_grants[key].append(grant)
+        for email, keywords in row["matched_profiles"].items():
+            profile_grants[email].append((grant, keywords))
+    return field_grants, field_labels, profile_grants
+
+
+
 def load_grants_from_json(path: str) -> int:
     with open(path, "r", encoding="utf-8") as fp:
         data = json.load(fp)
@@ -0,0 +1,218 @@
+"""Durable queue for subscriber alerts.
+
+The loader writes one ``notification_outbox`` row per (email, opp_id) in the
+same transaction as the grant upsert, so an alert exists exactly when its
+grant was committed. :func:`dispatch_outbox` drains the table afterwards:
+
+- claims due rows a whole subscriber at a time, taking a per-subscriber
+  advisory lock with ``pg_try_advisory_xact_lock`` so concurrent dispatchers
+  skip each other's subscribers and never pick up the same alert;
+- sends one digest per subscriber through the ``NOTIFY_TRANSPORT``
+  transport, whose worker pool bounds concurrency;
+- marks delivered rows ``sent`` and reschedules failures with exponential
+  backoff until ``NOTIFY_OUTBOX_MAX_ATTEMPTS``, after which they stay
+  ``failed`` for inspection.
+
+The unique (email, opp_id) index makes enqueueing idempotent across reruns.
+A claimed row whose dispatcher died is reclaimed once its
+``NOTIFY_OUTBOX_LEASE_SECONDS`` lease expires.
+
+    python -m grants.data.outbox
+"""
+from __future__ import annotations
+
+import argparse
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from psycopg2.extras import execute_values
+
+from grants.sql_utils import db_connection
+from grants.env import int_env
+from notifications.digest import DigestRenderer, Payloads
+from notifications.transport import Transport, get_transport
+from logs.status_logger import logger
+
+_GRANT_KEYS = ("title", "stage", "close_date", "post_date", "url", "agency")
+_DATE_KEYS = ("close_date", "post_date")
+
+_OUTBOX_EXISTS_SQL = "SELECT to_regclass('notification_outbox') IS NOT NULL;"
+
+_ENQUEUE_SQL = """
+    INSERT INTO notification_outbox (email, opp_id, matched_fields, grant_data)
+    VALUES %s
+    ON CONFLICT (email, opp_id) DO NOTHING
+    RETURNING id;
+"""
+
+# Postgres rejects FOR UPDATE with DISTINCT, so subscribers are picked with a
+# transaction-scoped advisory lock per email instead: concurrent dispatchers
+# skip each other's subscribers without waiting, and no row of a subscriber
+# that was not picked is locked. All due rows of the picked subscribers are
+# then claimed, so one subscriber's alerts always leave in a single digest.
+# A subscriber another dispatcher claimed and committed in the meantime
+# simply matches no due rows.
+_CLAIM_SQL = """
+    WITH candidates AS (
+        SELECT DISTINCT email
+        FROM notification_outbox
+        WHERE (status = 'pending' AND next_attempt_at <= NOW())
+           OR (status = 'sending' AND claimed_at < NOW() - %(lease)s * INTERVAL '1 second')
+        ORDER BY email
+    ),
+    picked AS (
+        SELECT email
+        FROM candidates
+        WHERE pg_try_advisory_xact_lock(%(lock_space)s, hashtext(email))
+        LIMIT %(limit)s
+    )
+    UPDATE notification_outbox AS o
+    SET status = 'sending', claimed_at = NOW(), attempts = o.attempts + 1
+    FROM picked
+    WHERE o.email = picked.email
+      AND ((o.status = 'pending' AND o.next_attempt_at <= NOW())
+           OR (o.status = 'sending' AND o.claimed_at < NOW() - %(lease)s * INTERVAL '1 second'))
+    RETURNING o.id, o.email, o.opp_id, o.matched_fields, o.grant_data;
+"""
+
+# First key of the per-subscriber advisory locks taken by _CLAIM_SQL.
+_CLAIM_LOCK_SPACE = 0x6F757462  # "outb"
+
+_MARK_SENT_SQL = """
+    UPDATE notification_outbox
+    SET status = 'sent', sent_at = NOW(), claimed_at = NULL, last_error = NULL
+    WHERE id = ANY(%s);
+"""
+
+_MARK_FAILED_SQL = """
+    UPDATE notification_outbox
+    SET status = CASE WHEN attempts >= %s THEN 'failed' ELSE 'pending' END,
+        next_attempt_at = NOW() + LEAST(%s * POWER(2, attempts - 1), %s) * INTERVAL '1 second',
+        claimed_at = NULL,
+        last_error = %s
+    WHERE id = ANY(%s);
+"""
+
+# Longest delay before a failed alert is retried by a later dispatch.
+_RESCHEDULE_MAX_SECONDS = 6 * 3600
+
+
+def outbox_available(cur) -> bool:
+    cur.execute(_OUTBOX_EXISTS_SQL)
+    row = cur.fetchone()
+    return bool(row and row[0])
+
+
+def _grant_json(entry: Mapping[str, Any]) -> str:
+    data = {}
+    for key in _GRANT_KEYS:
+        value = entry.get(key)
+        data[key] = value.isoformat() if isinstance(value, datetime) else value
+    return json.dumps(data)
+
+
+def enqueue_notifications(cur, payloads: Payloads) -> Optional[int]:
+    """Queue one row per (email, grant) in ``payloads`` inside the caller's transaction.
+
+    Returns the number of new rows (pairs already queued are skipped), or
+    None when the outbox table does not exist yet.
+    """
+    if not outbox_available(cur):
+        return None
+    values = [
+        (email, opp_id, sorted(entry["matched_fields"]), _grant_json(entry))
+        for email, payload in payloads.items()
+        for opp_id, entry in payload["grants"].items()
+    ]
+    if not values:
+        return 0
+    rows = execute_values(cur, _ENQUEUE_SQL, values, template="(%s, %s, %s, %s::jsonb)", page_size=1000, fetch=True)
+    return len(rows)
+
+
+def _payloads_from_rows(rows: Sequence[Tuple[Any, ...]]) -> Tuple[Payloads, Dict[str, List[int]]]:
+    payloads: Payloads = {}
+    ids: Dict[str, List[int]] = {}
+    for row_id, email, opp_id, matched_fields, grant_data in rows:
+        if isinstance(grant_data, str):
+            grant_data = json.loads(grant_data)
+        entry = {"opp_id": opp_id, "matched_fields": set(matched_fields or ())}
+        for key in _GRANT_KEYS:
+            value = grant_data.get(key)
+            if key in _DATE_KEYS and value:
+                value = datetime.fromisoformat(value)
+            entry[key] = value
+        payload = payloads.setdefault(email, {"fields": set(), "grants": {}})
+        payload["fields"].update(entry["matched_fields"])
+        payload["grants"][opp_id] = entry
+        ids.setdefault(email, []).append(row_id)
+    return payloads, ids
+
+
+def dispatch_outbox(transport: Optional[Transport] = None, batch_size: Optional[int] = None) -> int:
+    """Send every due alert and return the number of digests delivered.
+
+    Safe to run from several processes at once; each claims different
+    subscribers.
+    """
+    transport = transport or get_transport()
+    if not transport.ready:
+        logger("warning", f"{transport.name} transport is not configured; leaving notification outbox untouched")
+        return 0
+
+    batch = batch_size or int_env("NOTIFY_OUTBOX_BATCH", 200, minimum=1)
+    lease = int_env("NOTIFY_OUTBOX_LEASE_SECONDS", 900, minimum=1)
+    max_attempts = int_env("NOTIFY_OUTBOX_MAX_ATTEMPTS", 8, minimum=1)
+    backoff = int_env("NOTIFY_OUTBOX_BACKOFF_SECONDS", 60, minimum=1)
+
+    renderer = DigestRenderer.from_env()
+    delivered = failed = 0
+    try:
+        while True:
+            with db_connection() as conn, conn.cursor() as cur:
+                if not outbox_available(cur):
+                    logger("warning", "notification_outbox missing; run ensure_schema() to create it")
+                    return delivered
+                cur.execute(_CLAIM_SQL, {"lease": lease, "lock_space": _CLAIM_LOCK_SPACE, "limit": batch})
+                rows = cur.fetchall()
+            if not rows:
+                break
+
+            payloads, ids = _payloads_from_rows(rows)
+            results = transport.send_many(renderer.render_all(payloads))
+            sent_ids: List[int] = []
+            failed_ids: List[int] = []
+            for email, ok in zip(payloads, results):
+                (sent_ids if ok else failed_ids).extend(ids[email])
+                delivered += ok
+                failed += not ok
+
+            with db_connection() as conn, conn.cursor() as cur:
+                if sent_ids:
+                    cur.execute(_MARK_SENT_SQL, (sent_ids,))
+                if failed_ids:
+                    cur.execute(
+                        _MARK_FAILED_SQL,
+                        (max_attempts, backoff, _RESCHEDULE_MAX_SECONDS, "send failed", failed_ids),
+                    )
+
+            if len(payloads) < batch:
+                break
+    finally:
+        transport.close()
+
+    if delivered or failed:
+        logger("info", f"Notification outbox: delivered {delivered} digests, {failed} rescheduled or failed")
+    return delivered
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Send queued subscriber alerts.")
+    parser.add_argument("--batch", type=int, default=None, help="subscribers claimed per round trip")
+    args = parser.parse_args()
+    print(f"Delivered {dispatch_outbox(batch_size=args.batch)} digests")
+
+
+if __name__ == "__main__":
+    main()
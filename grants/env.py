@@ -0,0 +1,26 @@
+"""Typed readers for environment settings shared across the packages."""
+from __future__ import annotations
+
+import os
+from typing import Optional
+
+from logs.status_logger import logger
+
+
+def int_env(name: str, default: int, minimum: Optional[int] = None) -> int:
+    """Integer value of ``name``; ``default`` when unset, blank or not a number.
+
+    With ``minimum``, smaller values are raised to it. Values that are not
+    numbers are logged as a warning.
+    """
+    raw = os.getenv(name)
+    value = default
+    if raw is not None and raw.strip():
+        try:
+            value = int(raw.strip())
+        except ValueError:
+            logger("warning", f"Invalid {name} '{raw.strip()}'; using {default}")
+            value = default
+    if minimum is not None:
+        value = max(minimum, value)
+    return value
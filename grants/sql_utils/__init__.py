@@ -4,8 +4,11 @@ from pathlib import Path
 from typing import Any, Dict, Iterable, List, Tuple, Optional
 
 import psycopg2
+from psycopg2 import errors
 from psycopg2.extras import RealDictCursor
 
+from .pool import close_pool, get_pool, pool_enabled
+
 _SCHEMA_PATH = Path(__file__).resolve().parent / "schema.sql"
 
 
@@ -71,17 +74,35 @@ def get_connection():
 
 @contextmanager
 def db_connection():
-    """Connection that commits/rolls back like ``with conn`` but also closes.
-
-    psycopg2's ``with conn`` only ends the transaction; without an explicit
-    close every serverless request leaks a TLS connection to the database.
+    """Connection that commits/rolls back like ``with conn`` and is then released.
+
+    Connections come from the process-wide pool in ``pool.py`` so repeated
+    calls skip the TLS handshake; ``POSTGRES_POOL_ENABLED=false`` opens and
+    closes a dedicated connection per call instead. psycopg2's ``with conn``
+    only ends the transaction, so the connection is always returned (or
+    closed) explicitly; connections that failed at the driver level are
+    discarded rather than pooled.
     """
-    conn = get_connection()
+    if not pool_enabled():
+        conn = get_connection()
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+        return
+
+    pool = get_pool(get_connection)
+    conn = pool.getconn()
+    broken = False
     try:
         with conn:
             yield conn
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        broken = True
+        raise
     finally:
-        conn.close()
+        pool.putconn(conn, close=broken)
 
 
 
@@ -97,65 +118,184 @@ def _normalise(value: str) -> str:
 
 
 
-def available_subscription_fields(limit: int = 200) -> List[Tuple[str, str]]:
-    query = """
-        WITH funding AS (
-            SELECT TRIM(value) AS label
-            FROM (
-                SELECT unnest(string_to_array(funding_categories, ';')) AS value
-                FROM grants
-                WHERE funding_categories IS NOT NULL
-            ) expanded
-            WHERE TRIM(value) <> ''
-        ),
-        categories AS (
-            SELECT TRIM(opportunity_category) AS label
+# Full-table scan; only used when the grant_field_catalog view is missing.
+# Splits like grants.field_keys so every listed key can be filtered on.
+_FALLBACK_FIELDS_CTE = """
+    WITH funding AS (
+        SELECT TRIM(value) AS label
+        FROM (
+            SELECT unnest(regexp_split_to_array(funding_categories, '[;,/]+')) AS value
             FROM grants
-            WHERE opportunity_category IS NOT NULL
-        ),
-        merged AS (
-            SELECT label FROM funding
-            UNION ALL
-            SELECT label FROM categories
-        ),
-        prepared AS (
-            SELECT LOWER(label) AS field_key, label
-            FROM merged
-            WHERE label <> ''
-        )
-        SELECT field_key, MIN(label) AS display_label
-        FROM prepared
-        GROUP BY field_key
-        ORDER BY display_label
-        LIMIT %s;
-    """
+            WHERE funding_categories IS NOT NULL
+        ) expanded
+        WHERE TRIM(value) <> ''
+    ),
+    categories AS (
+        SELECT TRIM(opportunity_category) AS label
+        FROM grants
+        WHERE opportunity_category IS NOT NULL
+    ),
+    merged AS (
+        SELECT label FROM funding
+        UNION ALL
+        SELECT label FROM categories
+    ),
+    prepared AS (
+        SELECT LOWER(label) AS field_key, label
+        FROM merged
+        WHERE label <> ''
+    )
+"""
+
+_SUBSCRIPTION_FIELDS_SQL = _FALLBACK_FIELDS_CTE + """
+    SELECT field_key, MIN(label) AS display_label
+    FROM prepared
+    GROUP BY field_key
+    ORDER BY display_label
+    LIMIT %s;
+"""
+
+# Same answer as _SUBSCRIPTION_FIELDS_SQL for one key, so fields listed
+# without the catalog are also accepted when subscribing.
+_SUBSCRIPTION_FIELD_LABEL_SQL = _FALLBACK_FIELDS_CTE + """
+    SELECT MIN(label) AS display_label
+    FROM prepared
+    WHERE field_key = %s
+    GROUP BY field_key;
+"""
+
+_FIELD_CATALOG_SQL = """
+    SELECT field_key, display_label
+    FROM grant_field_catalog
+    ORDER BY display_label
+    LIMIT %s;
+"""
+
+_FIELD_LABEL_SQL = "SELECT display_label FROM grant_field_catalog WHERE field_key = %s;"
+
+_FIELD_CATALOG_EXISTS_SQL = "SELECT to_regclass('grant_field_catalog') IS NOT NULL;"
+
+_REFRESH_FIELD_CATALOG_SQL = "REFRESH MATERIALIZED VIEW CONCURRENTLY grant_field_catalog;"
+
+_ADD_SUBSCRIPTION_SQL = """
+    INSERT INTO grant_subscriptions (email, field)
+    VALUES (%s, %s)
+    ON CONFLICT (email, field)
+    DO UPDATE SET created_at = NOW();
+"""
+
+
 
+def available_subscription_fields(limit: int = 200) -> List[Tuple[str, str]]:
     with db_connection() as conn, conn.cursor() as cur:
-        cur.execute(query, (limit,))
+        try:
+            cur.execute(_FIELD_CATALOG_SQL, (limit,))
+        except errors.UndefinedTable:
+            # Schema predates the catalog view (ensure_schema not run yet).
+            conn.rollback()
+            cur.execute(_SUBSCRIPTION_FIELDS_SQL, (limit,))
         return [(row[0], row[1]) for row in cur.fetchall()]
 
 
 
-def add_subscription(email: str, field: str) -> bool:
+def subscription_field_label(field: str) -> Optional[str]:
+    """Display label for ``field`` via the catalog's primary-key index, or None."""
+    key = _normalise(field)
+    if not key:
+        return None
+    with db_connection() as conn, conn.cursor() as cur:
+        try:
+            cur.execute(_FIELD_LABEL_SQL, (key,))
+        except errors.UndefinedTable:
+            conn.rollback()
+            cur.execute(_SUBSCRIPTION_FIELD_LABEL_SQL, (key,))
+        row = cur.fetchone()
+    return row[0] if row else None
+
+
+
+def refresh_field_catalog(cur) -> bool:
+    """Rebuild ``grant_field_catalog`` inside the caller's transaction.
+
+    Readers keep seeing the previous catalog until the transaction commits.
+    Returns False when the view does not exist yet.
+    """
+    cur.execute(_FIELD_CATALOG_EXISTS_SQL)
+    row = cur.fetchone()
+    if not row or not row[0]:
+        return False
+    cur.execute(_REFRESH_FIELD_CATALOG_SQL)
+    return True
+
+
+
+def _subscription_params(email: str, field: str) -> Tuple[str, str]:
     email_clean = _normalise(email)
     field_clean = _normalise(field)
     if not email_clean or '@' not in email_clean or not field_clean:
         raise ValueError("email and field are required")
+    return email_clean, field_clean
+
 
-    query = """
-        INSERT INTO grant_subscriptions (email, field)
-        VALUES (%s, %s)
-        ON CONFLICT (email, field)
-        DO UPDATE SET created_at = NOW();
-    """
 
+def add_subscription(email: str, field: str) -> bool:
+    params = _subscription_params(email, field)
     with db_connection() as conn, conn.cursor() as cur:
-        cur.execute(query, (email_clean, field_clean))
+        cur.execute(_ADD_SUBSCRIPTION_SQL, params)
         return cur.rowcount > 0
 
 
 
-def get_subscribers_for_fields(fields: Iterable[str]) -> Dict[str, List[str]]:
+_MAX_PROFILE_KEYWORDS = 50
+
+_SET_KEYWORD_PROFILE_SQL = """
+    INSERT INTO grant_keyword_profiles (email, keywords, threshold)
+    VALUES (%s, %s, %s)
+    ON CONFLICT (email)
+    DO UPDATE SET keywords = EXCLUDED.keywords,
+                  threshold = EXCLUDED.threshold,
+                  updated_at = NOW();
+"""
+
+_KEYWORD_PROFILES_SQL = "SELECT email, keywords, threshold FROM grant_keyword_profiles;"
+
+
+
+def _keyword_profile_params(email: str, keywords: Iterable[str], threshold: int) -> Tuple[str, List[str], int]:
+    email_clean = _normalise(email)
+    if not email_clean or '@' not in email_clean:
+        raise ValueError("a valid email is required")
+    cleaned = list(dict.fromkeys(_normalise(keyword) for keyword in keywords if keyword and keyword.strip()))
+    if not cleaned:
+        raise ValueError("at least one keyword is required")
+    if len(cleaned) > _MAX_PROFILE_KEYWORDS:
+        raise ValueError(f"at most {_MAX_PROFILE_KEYWORDS} keywords are allowed")
+    if not 1 <= threshold <= len(cleaned):
+        raise ValueError("threshold must be between 1 and the number of keywords")
+    return email_clean, cleaned, threshold
+
+
+
+def set_keyword_profile(email: str, keywords: Iterable[str], threshold: int = 1) -> List[str]:
+    """Create or replace ``email``'s keyword profile; returns the stored keywords."""
+    params = _keyword_profile_params(email, keywords, threshold)
+    with db_connection() as conn, conn.cursor() as cur:
+        cur.execute(_SET_KEYWORD_PROFILE_SQL, params)
+    return params[1]
+
+
+
+def get_keyword_profiles() -> Dict[str, Tuple[List[str], int]]:
+    """All keyword profiles as email -> (keywords, threshold)."""
+    with db_connection() as conn, conn.cursor() as cur:
+        cur.execute(_KEYWORD_PROFILES_SQL)
+        rows = cur.fetchall()
+    return {email: (list(keywords), threshold) for email, keywords, threshold in rows}
+
+
+
+def get_subscribers_for_fields(fields: Iterable[str], cur=None) -> Dict[str, List[str]]:
+    """Subscriber emails per field key; pass ``cur`` to read inside the caller's transaction."""
     normalised = {_normalise(field) for field in fields if field and field.strip()}
     if not normalised:
         return {}
@@ -166,9 +306,13 @@ def get_subscribers_for_fields(fields: Iterable[str]) -> Dict[str, List[str]]:
         WHERE field = ANY(%s);
     """
 
-    with db_connection() as conn, conn.cursor() as cur:
+    if cur is not None:
         cur.execute(query, (list(normalised),))
         rows = cur.fetchall()
+    else:
+        with db_connection() as conn, conn.cursor() as own_cur:
+            own_cur.execute(query, (list(normalised),))
+            rows = own_cur.fetchall()
 
     subscribers: Dict[str, List[str]] = {}
     for field, email in rows:
@@ -0,0 +1,213 @@
+"""Async (psycopg 3) database access for the FastAPI handlers.
+
+The sync helpers in ``grants.sql_utils`` block a Starlette threadpool worker
+for the whole round trip, so request concurrency is capped by the thread
+pool. These coroutines run on the event loop against an
+``AsyncConnectionPool`` and share SQL with their sync counterparts; the
+pipeline keeps using the sync psycopg2 path.
+
+The pool is bound to the event loop that created it. A serverless runtime
+that starts a fresh loop gets a fresh pool, and the stale one is closed on
+its own loop if that loop is still running in another thread; a pool whose
+loop has finished is dropped, and its idle connections close as they are
+garbage collected. A forked worker also gets a fresh pool but leaves the inherited one
+open, as its sockets still belong to the parent. Sizing and recycling reuse
+the ``POSTGRES_POOL_*`` settings.
+
+The subscription field catalog is cached in-process for
+``GRANTS_FIELD_CACHE_SECONDS`` (default 300, ``0`` disables), so listing and
+validating fields normally costs no database round trip at all.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from psycopg import AsyncConnection
+from psycopg.errors import UndefinedTable
+from psycopg.conninfo import make_conninfo
+from psycopg_pool import AsyncConnectionPool
+
+from grants.env import int_env
+from grants.sql_utils import (
+    _ADD_SUBSCRIPTION_SQL,
+    _FIELD_CATALOG_SQL,
+    _FIELD_LABEL_SQL,
+    _SET_KEYWORD_PROFILE_SQL,
+    _SUBSCRIPTION_FIELDS_SQL,
+    _SUBSCRIPTION_FIELD_LABEL_SQL,
+    _connection_kwargs,
+    _keyword_profile_params,
+    _normalise,
+    _subscription_params,
+)
+
+_pool: Optional[AsyncConnectionPool] = None
+_pool_loop: Optional[asyncio.AbstractEventLoop] = None
+_pool_pid: Optional[int] = None
+_pool_lock: Optional[asyncio.Lock] = None
+
+# Pools inherited across a fork, kept referenced so they are never closed
+# here (see ``grants.sql_utils.pool``).
+_inherited_pools: List[AsyncConnectionPool] = []
+
+# Upper bound on catalog rows cached; the API never lists more than 500.
+_CATALOG_LIMIT = 5000
+_CLOSE_TIMEOUT_SECONDS = 5.0
+_catalog_cache: Optional[Tuple[float, List[Tuple[str, str]], Dict[str, str]]] = None
+
+
+def _conninfo() -> str:
+    kwargs: dict[str, Any] = dict(_connection_kwargs())
+    dsn = kwargs.pop("dsn", "")
+    return make_conninfo(dsn, **kwargs)
+
+
+async def get_async_pool() -> AsyncConnectionPool:
+    """Return the pool for the running loop, opening it on first use."""
+    global _pool, _pool_loop, _pool_pid, _pool_lock
+    loop = asyncio.get_running_loop()
+    pid = os.getpid()
+    if _pool is not None and _pool_loop is loop and _pool_pid == pid and not _pool.closed:
+        return _pool
+
+    if _pool_lock is None or _pool_loop is not loop:
+        stale, stale_loop, stale_pid = _pool, _pool_loop, _pool_pid
+        _pool_lock = asyncio.Lock()
+        _pool_loop = loop
+        _pool = None
+        if stale is not None:
+            await _retire_pool(stale, stale_loop, stale_pid)
+    async with _pool_lock:
+        if _pool is not None and _pool_pid != pid:
+            stale, _pool = _pool, None
+            await _retire_pool(stale, loop, _pool_pid)
+        if _pool is None or _pool.closed:
+            max_size = int_env("POSTGRES_POOL_MAX", 5, minimum=1)
+            pool = AsyncConnectionPool(
+                _conninfo(),
+                min_size=min(int_env("POSTGRES_POOL_MIN", 0, minimum=0), max_size),
+                max_size=max_size,
+                max_idle=float(int_env("POSTGRES_POOL_MAX_IDLE_SECONDS", 300)),
+                timeout=float(int_env("POSTGRES_POOL_TIMEOUT", 10)),
+                check=AsyncConnectionPool.check_connection,
+                open=False,
+            )
+            await pool.open()
+            _pool, _pool_pid = pool, pid
+    return _pool
+
+
+async def _retire_pool(
+    pool: AsyncConnectionPool,
+    loop: Optional[asyncio.AbstractEventLoop],
+    pid: Optional[int],
+) -> None:
+    """Close a pool that is no longer this process's current one."""
+    if pid != os.getpid():
+        _inherited_pools.append(pool)
+        return
+    if pool.closed:
+        return
+    if loop is asyncio.get_running_loop():
+        await pool.close(timeout=_CLOSE_TIMEOUT_SECONDS)
+    elif loop is not None and loop.is_running():
+        closing = asyncio.run_coroutine_threadsafe(pool.close(timeout=_CLOSE_TIMEOUT_SECONDS), loop)
+        await asyncio.wrap_future(closing)
+    # Otherwise the pool's loop is gone and close() would need the worker
+    # tasks that died with it. Dropping the last reference lets the idle
+    # connections be collected, which closes their sockets.
+
+
+@asynccontextmanager
+async def async_db_connection() -> AsyncIterator[AsyncConnection]:
+    """Pooled async connection; commits on success, rolls back on error."""
+    pool = await get_async_pool()
+    async with pool.connection() as conn:
+        yield conn
+
+
+async def close_async_pool() -> None:
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None:
+        await _retire_pool(pool, _pool_loop, _pool_pid)
+
+
+def _cache_ttl() -> float:
+    return float(int_env("GRANTS_FIELD_CACHE_SECONDS", 300, minimum=0))
+
+
+def _fresh_catalog() -> Optional[Tuple[List[Tuple[str, str]], Dict[str, str]]]:
+    if _catalog_cache is None:
+        return None
+    loaded_at, fields, labels = _catalog_cache
+    if time.monotonic() - loaded_at >= _cache_ttl():
+        return None
+    return fields, labels
+
+
+def clear_field_catalog_cache() -> None:
+    global _catalog_cache
+    _catalog_cache = None
+
+
+async def _load_field_catalog() -> List[Tuple[str, str]]:
+    async with async_db_connection() as conn, conn.cursor() as cur:
+        try:
+            await cur.execute(_FIELD_CATALOG_SQL, (_CATALOG_LIMIT,))
+        except UndefinedTable:
+            # Schema predates the catalog view (ensure_schema not run yet).
+            await conn.rollback()
+            await cur.execute(_SUBSCRIPTION_FIELDS_SQL, (_CATALOG_LIMIT,))
+        return [(row[0], row[1]) for row in await cur.fetchall()]
+
+
+async def available_subscription_fields_async(limit: int = 200) -> List[Tuple[str, str]]:
+    global _catalog_cache
+    cached = _fresh_catalog()
+    if cached is None:
+        fields = await _load_field_catalog()
+        _catalog_cache = (time.monotonic(), fields, dict(fields))
+    else:
+        fields = cached[0]
+    return fields[:limit]
+
+
+async def subscription_field_label_async(field: str) -> Optional[str]:
+    """Display label for ``field``, or None if it is not in the catalog.
+
+    Served from the cached catalog when fresh; otherwise (or for fields added
+    since the cache was filled) one primary-key lookup on the catalog view.
+    """
+    key = _normalise(field)
+    if not key:
+        return None
+    cached = _fresh_catalog()
+    if cached is not None and key in cached[1]:
+        return cached[1][key]
+    async with async_db_connection() as conn, conn.cursor() as cur:
+        try:
+            await cur.execute(_FIELD_LABEL_SQL, (key,))
+        except UndefinedTable:
+            await conn.rollback()
+            await cur.execute(_SUBSCRIPTION_FIELD_LABEL_SQL, (key,))
+        row = await cur.fetchone()
+    return row[0] if row else None
+
+
+async def add_subscription_async(email: str, field: str) -> bool:
+    params = _subscription_params(email, field)
+    async with async_db_connection() as conn, conn.cursor() as cur:
+        await cur.execute(_ADD_SUBSCRIPTION_SQL, params)
+        return cur.rowcount > 0
+
+
+async def set_keyword_profile_async(email: str, keywords: Iterable[str], threshold: int = 1) -> List[str]:
+    params = _keyword_profile_params(email, keywords, threshold)
+    async with async_db_connection() as conn, conn.cursor() as cur:
+        await cur.execute(_SET_KEYWORD_PROFILE_SQL, params)
+    return params[1]
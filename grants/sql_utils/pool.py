@@ -0,0 +1,172 @@
+"""Process-wide pool of psycopg2 connections.
+
+Opening a connection to Neon/Vercel Postgres costs a TCP + TLS handshake and
+authentication, which dominates the latency of the small queries the web app
+runs. The pool keeps a few connections open per process and hands them out
+through ``grants.sql_utils.db_connection``.
+
+It is built for serverless reuse: the pool is created lazily on first use,
+re-created after a fork, and every checkout validates the connection.
+Connections idle longer than ``POSTGRES_POOL_MAX_IDLE_SECONDS`` are recycled
+(a frozen Vercel instance may wake up with sockets the server already
+dropped) and ones idle longer than ``POSTGRES_POOL_PING_SECONDS`` are pinged
+with ``SELECT 1`` before use.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.pool import PoolError
+
+from grants.env import int_env
+
+
+def pool_enabled() -> bool:
+    raw = os.getenv("POSTGRES_POOL_ENABLED")
+    if raw is None:
+        return True
+    return raw.strip().lower() not in {"0", "false", "no", "off"}
+
+
+class ConnectionPool:
+    """Thread-safe, bounded pool with idle recycling and checkout health checks."""
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        minconn: int = 0,
+        maxconn: int = 5,
+        max_idle: float = 300.0,
+        ping_after: float = 30.0,
+        timeout: float = 10.0,
+    ) -> None:
+        if maxconn < 1:
+            raise ValueError("maxconn must be at least 1")
+        self._connect = connect
+        self._minconn = max(0, min(minconn, maxconn))
+        self._max_idle = max_idle
+        self._ping_after = ping_after
+        self._timeout = timeout
+        self._idle: List[Tuple[Any, float]] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._closed = False
+        for _ in range(self._minconn):
+            self._idle.append((self._connect(), time.monotonic()))
+
+    def getconn(self) -> Any:
+        if self._closed:
+            raise PoolError("connection pool is closed")
+        if not self._slots.acquire(timeout=self._timeout):
+            raise PoolError(f"no database connection available within {self._timeout:.0f}s")
+        try:
+            while True:
+                with self._lock:
+                    entry = self._idle.pop() if self._idle else None
+                if entry is None:
+                    return self._connect()
+                conn, released_at = entry
+                if self._usable(conn, time.monotonic() - released_at):
+                    return conn
+                self._discard(conn)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn: Any, close: bool = False) -> None:
+        try:
+            if close or self._closed or conn.closed:
+                self._discard(conn)
+                return
+            if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            with self._lock:
+                self._idle.append((conn, time.monotonic()))
+        except psycopg2.Error:
+            self._discard(conn)
+        finally:
+            self._slots.release()
+
+    def closeall(self) -> None:
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for conn, _released_at in idle:
+            self._discard(conn)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"idle": len(self._idle)}
+
+    def _usable(self, conn: Any, idle_for: float) -> bool:
+        if conn.closed:
+            return False
+        if self._max_idle and idle_for > self._max_idle:
+            return False
+        if self._ping_after and idle_for > self._ping_after:
+            try:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT 1")
+                conn.rollback()
+            except psycopg2.Error:
+                return False
+        return True
+
+    @staticmethod
+    def _discard(conn: Any) -> None:
+        try:
+            conn.close()
+        except psycopg2.Error:
+            pass
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_pid: Optional[int] = None
+_pool_lock = threading.Lock()
+
+# Pools inherited across a fork. The child must never close (or let the
+# garbage collector close) their connections: libpq would send Terminate on
+# sockets the parent is still using and end the parent's sessions.
+_inherited_pools: List[ConnectionPool] = []
+
+
+def get_pool(connect: Callable[[], Any]) -> ConnectionPool:
+    """Return this process's pool, creating it on first use or after a fork."""
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is not None and _pool_pid == pid:
+        return _pool
+    with _pool_lock:
+        if _pool is None or _pool_pid != pid:
+            if _pool is not None:
+                _inherited_pools.append(_pool)
+            _pool = ConnectionPool(
+                connect,
+                minconn=int_env("POSTGRES_POOL_MIN", 0, minimum=0),
+                maxconn=int_env("POSTGRES_POOL_MAX", 5, minimum=1),
+                max_idle=float(int_env("POSTGRES_POOL_MAX_IDLE_SECONDS", 300)),
+                ping_after=float(int_env("POSTGRES_POOL_PING_SECONDS", 30)),
+                timeout=float(int_env("POSTGRES_POOL_TIMEOUT", 10)),
+            )
+            _pool_pid = pid
+    return _pool
+
+
+def close_pool() -> None:
+    """Close every idle pooled connection (e.g. on application shutdown).
+
+    A pool inherited from the parent process is left untouched.
+    """
+    global _pool, _pool_pid
+    with _pool_lock:
+        pool, pid, _pool, _pool_pid = _pool, _pool_pid, None, None
+        if pool is not None and pid != os.getpid():
+            _inherited_pools.append(pool)
+            return
+    if pool is not None:
+        pool.closeall()
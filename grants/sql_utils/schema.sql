@@ -15,12 +15,51 @@ CREATE INDEX IF NOT EXISTS idx_grants_stage ON grants(stage);
 CREATE INDEX IF NOT EXISTS idx_grants_close_date ON grants(close_date);
 CREATE INDEX IF NOT EXISTS idx_grants_status ON grants(opportunity_status);
 
+-- /api/grants listing order (close date NULLS LAST, post date DESC NULLS
+-- FIRST, opp_id), so keyset pages are index range scans.
+CREATE INDEX IF NOT EXISTS idx_grants_posted_listing
+    ON grants (
+        COALESCE(close_date, 'infinity'::timestamp),
+        COALESCE(post_date, 'infinity'::timestamp) DESC,
+        opp_id
+    )
+    WHERE opportunity_status = 'Posted';
+
 ALTER TABLE grants
     ADD COLUMN IF NOT EXISTS opportunity_category TEXT;
 
 ALTER TABLE grants
     ADD COLUMN IF NOT EXISTS funding_categories TEXT;
 
+-- Lower-cased subscription field keys (opportunity category plus each funding
+-- category), maintained by the loader so category filters use the GIN index.
+ALTER TABLE grants
+    ADD COLUMN IF NOT EXISTS field_keys TEXT[];
+
+UPDATE grants
+SET field_keys = ARRAY(
+    SELECT DISTINCT LOWER(TRIM(value))
+    FROM unnest(
+        regexp_split_to_array(COALESCE(funding_categories, ''), '[;,/]+')
+        || ARRAY[opportunity_category]
+    ) AS value
+    WHERE TRIM(value) <> ''
+)
+WHERE field_keys IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_grants_field_keys ON grants USING GIN (field_keys);
+
+-- Full-text search over title (weight A) and description (weight B). As a
+-- stored generated column it is recomputed on every insert/upsert.
+ALTER TABLE grants
+    ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', COALESCE(title, '')), 'A')
+        || setweight(to_tsvector('english', COALESCE(description, '')), 'B')
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_grants_search_vector ON grants USING GIN (search_vector);
+
 CREATE TABLE IF NOT EXISTS grant_subscriptions (
     id SERIAL PRIMARY KEY,
     email TEXT NOT NULL,
@@ -33,3 +72,81 @@ CREATE UNIQUE INDEX IF NOT EXISTS idx_subscriptions_email_field
 
 CREATE INDEX IF NOT EXISTS idx_subscriptions_field
     ON grant_subscriptions (field);
+
+-- Subscription field catalog: one row per distinct key in grants.field_keys,
+-- so every listed field works with /api/grants?field=, labelled with its
+-- original spelling. Refreshed by the loader after each load so the web tier
+-- never has to unnest the whole grants table per request. Labels are split
+-- on '[;,/]+' exactly like field_keys (and the loader's _SPLIT_PATTERN).
+-- Catalogs built before field_keys (split on ';' only) are rebuilt.
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM pg_matviews
+        WHERE matviewname = 'grant_field_catalog'
+          AND position('field_keys' IN definition) = 0
+    ) THEN
+        DROP MATERIALIZED VIEW grant_field_catalog;
+    END IF;
+END $$;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS grant_field_catalog AS
+    WITH keys AS (
+        SELECT DISTINCT unnest(field_keys) AS field_key
+        FROM grants
+    ),
+    labels AS (
+        SELECT LOWER(TRIM(value)) AS field_key, MIN(TRIM(value)) AS display_label
+        FROM grants,
+            unnest(
+                regexp_split_to_array(COALESCE(funding_categories, ''), '[;,/]+')
+                || ARRAY[opportunity_category]
+            ) AS value
+        WHERE TRIM(value) <> ''
+        GROUP BY LOWER(TRIM(value))
+    )
+    SELECT keys.field_key, COALESCE(labels.display_label, keys.field_key) AS display_label
+    FROM keys
+    LEFT JOIN labels ON labels.field_key = keys.field_key
+    WHERE keys.field_key IS NOT NULL;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_grant_field_catalog_key
+    ON grant_field_catalog (field_key);
+
+CREATE INDEX IF NOT EXISTS idx_grant_field_catalog_label
+    ON grant_field_catalog (display_label);
+
+-- Per-subscriber keyword profiles: a grant matches when at least `threshold`
+-- of `keywords` (lower-cased, whole words) appear in its description.
+CREATE TABLE IF NOT EXISTS grant_keyword_profiles (
+    email TEXT PRIMARY KEY,
+    keywords TEXT[] NOT NULL,
+    threshold INTEGER NOT NULL DEFAULT 1 CHECK (threshold >= 1),
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+
+-- Subscriber alerts, written by the loader in the same transaction as the
+-- grant upsert and drained by grants/data/outbox.py. One row per
+-- (email, opp_id), so reruns never queue the same alert twice.
+CREATE TABLE IF NOT EXISTS notification_outbox (
+    id BIGSERIAL PRIMARY KEY,
+    email TEXT NOT NULL,
+    opp_id TEXT NOT NULL,
+    matched_fields TEXT[] NOT NULL DEFAULT '{}',
+    grant_data JSONB NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending'
+        CHECK (status IN ('pending', 'sending', 'sent', 'failed')),
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    claimed_at TIMESTAMP,
+    last_error TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    sent_at TIMESTAMP
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_notification_outbox_email_opp
+    ON notification_outbox (email, opp_id);
+
+CREATE INDEX IF NOT EXISTS idx_notification_outbox_due
+    ON notification_outbox (next_attempt_at)
+    WHERE status IN ('pending', 'sending');
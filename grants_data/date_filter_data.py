@@ -3,32 +3,14 @@ from __future__ import annotations
 
 import os
 from datetime import datetime, timedelta, timezone
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator, List, Tuple
 
+from grants_data.dates import record_date
 from logs.status_logger import logger
 
-_DATE_FORMATS = [
-    "%Y-%m-%d",
-    "%m/%d/%Y",
-    "%Y-%m-%dT%H:%M:%S",
-    "%Y-%m-%dT%H:%M:%SZ",
-]
 
-
-def _parse_date(value: str | None) -> datetime | None:
-    if not value:
-        return None
-    for fmt in _DATE_FORMATS:
-        try:
-            return datetime.strptime(value, fmt)
-        except ValueError:
-            continue
-    logger("warning", f"Unable to parse date '{value}'")
-    return None
-
-
-def date_filter_json_data(records: List[Dict[str, object]]) -> List[Dict[str, object]]:
-    """Keep grants posted within the configured lookback window."""
+def lookback_cutoff() -> Tuple[datetime, int]:
+    """Oldest posted date kept, and the ``GRANTS_GOV_LOOKBACK_DAYS`` it came from."""
     try:
         lookback_days = int((os.getenv("GRANTS_GOV_LOOKBACK_DAYS") or "90").strip())
     except ValueError:
@@ -36,16 +18,30 @@ def date_filter_json_data(records: List[Dict[str, object]]) -> List[Dict[str, ob
         lookback_days = 90
     # Naive UTC so it stays comparable with the naive parsed record dates.
     cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=lookback_days)
+    return cutoff, lookback_days
+
 
-    filtered: List[Dict[str, object]] = []
+def iter_date_filter_json_data(records: Iterable[Dict[str, object]]) -> Iterator[Dict[str, object]]:
+    """Streaming form of :func:`date_filter_json_data`; logs once exhausted."""
+    cutoff, lookback_days = lookback_cutoff()
+
+    seen = 0
+    kept = 0
     for record in records:
-        raw_posted = record.get("POSTED_DATE")
-        posted = _parse_date(str(raw_posted)) if raw_posted not in (None, "") else None
+        seen += 1
+        posted = record_date(record, "POSTED_DATE")
+        if posted is None and record.get("POSTED_DATE") not in (None, ""):
+            logger("warning", f"Unable to parse date '{record.get('POSTED_DATE')}'")
         if posted and posted >= cutoff:
-            filtered.append(record)
+            kept += 1
+            yield record
 
     logger(
         "info",
-        f"Filtered grants by date: kept {len(filtered)} of {len(records)} within {lookback_days} days"
+        f"Filtered grants by date: kept {kept} of {seen} within {lookback_days} days"
     )
-    return filtered
+
+
+def date_filter_json_data(records: List[Dict[str, object]]) -> List[Dict[str, object]]:
+    """Keep grants posted within the configured lookback window."""
+    return list(iter_date_filter_json_data(records))
@@ -0,0 +1,111 @@
+"""Shared date parsing for grant records.
+
+Grant dates arrive in a handful of fixed shapes, and the same few thousand
+strings repeat across an extract. Rather than trying each ``strptime`` format
+and paying for the ``ValueError`` of every miss, :func:`parse_date` detects
+the format from the string's shape, builds the ``datetime`` directly and
+memoizes the result. Anything it does not recognise goes through the original
+``strptime`` loop, so results are identical.
+
+Records that went through ``normalize_records`` carry a ``PARSED_DATES``
+dict; :func:`record_date` fills it on first use so later stages (date
+filter, sort, loader) reuse the parsed value instead of parsing again.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from functools import lru_cache
+from typing import MutableMapping, Optional, Tuple
+
+DATE_FORMATS = (
+    "%Y-%m-%d",
+    "%m/%d/%Y",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%dT%H:%M:%SZ",
+)
+
+PARSED_DATES_KEY = "PARSED_DATES"
+
+_CACHE_SIZE = 16384
+
+
+def _is_digits(text: str) -> bool:
+    return text.isascii() and text.isdigit()
+
+
+def _parse_by_shape(text: str) -> Optional[datetime]:
+    size = len(text)
+    if size == 10 and text[4] == "-" and text[7] == "-":
+        year, month, day = text[0:4], text[5:7], text[8:10]
+        if _is_digits(year + month + day):
+            return datetime(int(year), int(month), int(day))
+    elif size == 10 and text[2] == "/" and text[5] == "/":
+        month, day, year = text[0:2], text[3:5], text[6:10]
+        if _is_digits(year + month + day):
+            return datetime(int(year), int(month), int(day))
+    elif (
+        (size == 19 or (size == 20 and text[19] == "Z"))
+        and text[4] == "-"
+        and text[7] == "-"
+        and text[10] == "T"
+        and text[13] == ":"
+        and text[16] == ":"
+    ):
+        parts = (text[0:4], text[5:7], text[8:10], text[11:13], text[14:16], text[17:19])
+        if _is_digits("".join(parts)):
+            return datetime(*(int(part) for part in parts))
+    return None
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def _parse_text(text: str) -> Optional[datetime]:
+    try:
+        parsed = _parse_by_shape(text)
+    except ValueError:
+        parsed = None
+    if parsed is not None:
+        return parsed
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def parse_date(value: object) -> Optional[datetime]:
+    """Parse any of :data:`DATE_FORMATS` to a naive ``datetime`` (None if not)."""
+    if isinstance(value, datetime):
+        return value
+    if value in (None, ""):
+        return None
+    return _parse_text(value if isinstance(value, str) else str(value))
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
+def format_extract_date(value: str) -> str:
+    """Convert the XML extract's ``MMDDYYYY`` to ``MM/DD/YYYY``; other input is returned as is."""
+    if len(value) == 8 and _is_digits(value) and value[4] != "0":
+        try:
+            datetime(int(value[4:8]), int(value[0:2]), int(value[2:4]))
+        except ValueError:
+            return value
+        return f"{value[0:2]}/{value[2:4]}/{value[4:8]}"
+    try:
+        return datetime.strptime(value, "%m%d%Y").strftime("%m/%d/%Y")
+    except ValueError:
+        return value
+
+
+def record_date(record: MutableMapping[str, object], field: str) -> Optional[datetime]:
+    """``parse_date(record[field])``, reusing the record's ``PARSED_DATES`` entry."""
+    raw = record.get(field)
+    parsed_dates = record.get(PARSED_DATES_KEY)
+    if not isinstance(parsed_dates, dict):
+        return parse_date(raw)
+    cached: Optional[Tuple[object, Optional[datetime]]] = parsed_dates.get(field)
+    if cached is not None and cached[0] == raw:
+        return cached[1]
+    parsed = parse_date(raw)
+    parsed_dates[field] = (raw, parsed)
+    return parsed
@@ -11,14 +11,17 @@ so it is the robust source for full refreshes.
 """
 from __future__ import annotations
 
+import json
 import os
+import time
 import zipfile
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
 
 import requests
 
+from grants.env import int_env
 from grants_data.retention import prune_old_files
 from logs.status_logger import logger
 
@@ -27,6 +30,7 @@ _DEFAULT_EXTRACT_URL_TEMPLATE = (
     "GrantsDBExtract{date}v2.zip"
 )
 _DATA_DIR = Path(__file__).resolve().parent / "grants_xml_data"
+_STATE_PATH = _DATA_DIR / "extract_download.json"
 _TIMEOUT = int(os.getenv("GRANTS_GOV_TIMEOUT", "60"))
 _CHUNK_SIZE = 1024 * 1024
 _MAX_LOOKBACK_DAYS = int(os.getenv("GRANTS_GOV_EXTRACT_LOOKBACK_DAYS", "3"))
@@ -37,8 +41,18 @@ def _extract_url(date: datetime) -> str:
     return template.format(date=date.strftime("%Y%m%d"))
 
 
-def _find_available_extract() -> Optional[str]:
-    """Return the URL of the most recent extract that exists (today, else back a few days)."""
+def _validators(response: requests.Response) -> Dict[str, str]:
+    """HTTP validators identifying one published version of the extract."""
+    headers = {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "content_length": response.headers.get("Content-Length"),
+    }
+    return {key: value for key, value in headers.items() if value}
+
+
+def _find_available_extract() -> Optional[Tuple[str, Dict[str, str]]]:
+    """Return the URL and validators of the most recent extract that exists (today, else back a few days)."""
     for offset in range(_MAX_LOOKBACK_DAYS + 1):
         candidate_date = datetime.now(timezone.utc) - timedelta(days=offset)
         url = _extract_url(candidate_date)
@@ -48,31 +62,101 @@ def _find_available_extract() -> Optional[str]:
             logger("warning", f"HEAD request failed for {url}: {exc}")
             continue
         if response.status_code == 200:
-            return url
+            return url, _validators(response)
         logger("info", f"No extract at {url} (HTTP {response.status_code})")
     return None
 
 
-def _download_zip(url: str, destination: Path) -> bool:
+def _load_state() -> Dict[str, Any]:
+    if not _STATE_PATH.exists():
+        return {}
+    try:
+        with _STATE_PATH.open("r", encoding="utf-8") as fp:
+            state = json.load(fp)
+    except (OSError, json.JSONDecodeError) as exc:
+        logger("warning", f"Ignoring unreadable download state at {_STATE_PATH}: {exc}")
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+def _save_state(state: Dict[str, Any]) -> None:
     try:
-        with requests.get(url, stream=True, timeout=_TIMEOUT) as response:
-            response.raise_for_status()
-            total = int(response.headers.get("Content-Length", 0))
-            written = 0
-            with destination.open("wb") as fp:
-                for chunk in response.iter_content(chunk_size=_CHUNK_SIZE):
-                    fp.write(chunk)
-                    written += len(chunk)
+        _STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        _STATE_PATH.write_text(json.dumps(state, indent=2), encoding="utf-8")
+    except OSError as exc:
+        logger("warning", f"Could not save download state to {_STATE_PATH}: {exc}")
+
+
+def _same_version(state: Dict[str, Any], url: str, validators: Dict[str, str]) -> bool:
+    if state.get("url") != url:
+        return False
+    for key in ("etag", "last_modified"):
+        if validators.get(key):
+            return state.get(key) == validators[key]
+    # No validators from the server: never assume the extract is unchanged.
+    return False
+
+
+def _download_zip(url: str, destination: Path, validators: Dict[str, str]) -> bool:
+    """Download ``url`` to ``destination`` via a ``.part`` file, resuming with ``Range``.
+
+    Interrupted transfers keep the partial file; the next attempt (in this
+    run or a later one) asks only for the missing bytes, guarded by
+    ``If-Range`` so a newly published extract restarts from scratch.
+    """
+    partial = destination.with_name(destination.name + ".part")
+    if_range = validators.get("etag") or validators.get("last_modified")
+    expected = int(validators.get("content_length", 0) or 0)
+    attempts = int_env("GRANTS_GOV_RETRIES", 3, minimum=1)
+
+    for attempt in range(1, attempts + 1):
+        offset = partial.stat().st_size if partial.exists() else 0
+        if offset and not if_range:
+            partial.unlink(missing_ok=True)
+            offset = 0
+        if offset and expected and offset >= expected:
+            partial.replace(destination)
+            logger("info", f"Completed extract download from partial file {destination}")
+            return True
+
+        headers = {"Range": f"bytes={offset}-", "If-Range": if_range} if offset else {}
+        try:
+            with requests.get(url, stream=True, timeout=_TIMEOUT, headers=headers) as response:
+                if response.status_code == 416:
+                    logger("warning", "Server rejected the resume range; restarting the download")
+                    partial.unlink(missing_ok=True)
+                    continue
+                response.raise_for_status()
+                resumed = bool(offset) and response.status_code == 206
+                if offset and not resumed:
+                    logger("info", "Extract changed since the partial download; restarting")
+                start = offset if resumed else 0
+                total = int(response.headers.get("Content-Length", 0))
+                total = start + total if total else 0
+                written = start
+                if resumed:
+                    logger("info", f"Resuming extract download at {start / (1024 * 1024):.1f} MB")
+                with partial.open("ab" if resumed else "wb") as fp:
+                    for chunk in response.iter_content(chunk_size=_CHUNK_SIZE):
+                        fp.write(chunk)
+                        written += len(chunk)
             if total and written != total:
-                logger("error", f"Incomplete download: {written} of {total} bytes")
-                destination.unlink(missing_ok=True)
+                raise requests.RequestException(f"Incomplete download: {written} of {total} bytes")
+        except requests.RequestException as exc:
+            if attempt == attempts:
+                logger("error", f"Failed to download extract after {attempts} attempts: {exc}")
                 return False
-    except requests.RequestException as exc:
-        logger("error", f"Failed to download extract: {exc}")
-        destination.unlink(missing_ok=True)
-        return False
-    logger("info", f"Downloaded {written / (1024 * 1024):.1f} MB to {destination}")
-    return True
+            wait = 2 ** attempt
+            logger("warning", f"Download attempt {attempt}/{attempts} failed ({exc}); resuming in {wait}s")
+            time.sleep(wait)
+            continue
+
+        partial.replace(destination)
+        logger("info", f"Downloaded {(written - start) / (1024 * 1024):.1f} MB to {destination}")
+        return True
+
+    logger("error", f"Failed to download extract after {attempts} attempts")
+    return False
 
 
 def _unzip(archive_path: Path) -> Optional[Path]:
@@ -89,25 +173,84 @@ def _unzip(archive_path: Path) -> Optional[Path]:
     return Path(extracted)
 
 
-def gen_extract(keep_zip: bool = False) -> bool:
+def _parse_from_zip() -> bool:
+    raw = os.getenv("GRANTS_EXTRACT_FROM_ZIP")
+    if raw is None:
+        return False
+    return raw.strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _force_reprocess() -> bool:
+    raw = os.getenv("GRANTS_EXTRACT_FORCE")
+    if raw is None:
+        return False
+    return raw.strip().lower() in {"1", "true", "yes", "on"}
+
+
+def gen_extract(keep_zip: bool = False, from_zip: Optional[bool] = None) -> bool:
     """Download the latest daily XML extract and unzip it locally.
 
     On success ``gen_extract.last_extract_path`` points at the extracted XML.
+    With ``from_zip`` (default from ``GRANTS_EXTRACT_FROM_ZIP``) the ~300 MB
+    XML is never written: ``last_extract_path`` is the ZIP itself, which
+    ``parse_extract`` decompresses while parsing.
+
+    When the newest extract carries the same ETag/Last-Modified as the last
+    one marked by :func:`mark_extract_processed`, nothing is downloaded,
+    ``gen_extract.unchanged`` is set and ``last_extract_path`` stays ``None``
+    (``GRANTS_EXTRACT_FORCE=true`` overrides this).
     """
 
     gen_extract.last_extract_path = None  # type: ignore[attr-defined]
+    gen_extract.unchanged = False  # type: ignore[attr-defined]
+    if from_zip is None:
+        from_zip = _parse_from_zip()
 
-    url = _find_available_extract()
-    if url is None:
+    found = _find_available_extract()
+    if found is None:
         logger("error", f"No extract found in the last {_MAX_LOOKBACK_DAYS + 1} days")
         return False
+    url, validators = found
 
     _DATA_DIR.mkdir(parents=True, exist_ok=True)
     zip_path = _DATA_DIR / url.rsplit("/", 1)[-1]
 
-    logger("info", f"Downloading Grants.gov extract from {url}")
-    if not _download_zip(url, zip_path):
-        return False
+    state = _load_state()
+    same_version = _same_version(state, url, validators)
+    if same_version and state.get("processed") and not _force_reprocess():
+        logger("info", f"Extract at {url} is unchanged since the last processed run; skipping")
+        gen_extract.unchanged = True  # type: ignore[attr-defined]
+        return True
+
+    artifact = Path(state["artifact"]) if state.get("artifact") else None
+    if same_version and artifact is not None and artifact.exists():
+        if (artifact.suffix.lower() == ".zip") == from_zip:
+            logger("info", f"Reusing previously downloaded extract at {artifact}")
+            gen_extract.last_extract_path = artifact  # type: ignore[attr-defined]
+            return True
+
+    if not (same_version and zip_path.exists()):
+        # A fresh version: any old state (including its processed flag) is void.
+        _save_state({"url": url, **validators, "processed": False})
+        logger("info", f"Downloading Grants.gov extract from {url}")
+        if not _download_zip(url, zip_path, validators):
+            return False
+
+    if from_zip:
+        try:
+            with zipfile.ZipFile(zip_path) as archive:
+                has_xml = any(name.lower().endswith(".xml") for name in archive.namelist())
+        except zipfile.BadZipFile as exc:
+            logger("error", f"Downloaded file is not a valid ZIP: {exc}")
+            return False
+        if not has_xml:
+            logger("error", f"No XML file found inside {zip_path}")
+            return False
+        prune_old_files(_DATA_DIR, "GrantsDBExtract*.zip", keep=1)
+        logger("info", f"Parsing straight from {zip_path} ({zip_path.stat().st_size / (1024 * 1024):.1f} MB)")
+        _save_state({"url": url, **validators, "artifact": str(zip_path), "processed": False})
+        gen_extract.last_extract_path = zip_path  # type: ignore[attr-defined]
+        return True
 
     xml_path = _unzip(zip_path)
     if xml_path is None:
@@ -120,8 +263,23 @@ def gen_extract(keep_zip: bool = False) -> bool:
     prune_old_files(_DATA_DIR, "GrantsDBExtract*.xml", keep=2)
 
     logger("info", f"Extracted XML to {xml_path} ({xml_path.stat().st_size / (1024 * 1024):.1f} MB)")
+    _save_state({"url": url, **validators, "artifact": str(xml_path), "processed": False})
     gen_extract.last_extract_path = xml_path  # type: ignore[attr-defined]
     return True
 
 
+def mark_extract_processed() -> None:
+    """Record that the downloaded extract made it through the pipeline.
+
+    The next ``gen_extract`` then skips both download and parse until
+    Grants.gov publishes a new version.
+    """
+    state = _load_state()
+    if not state or state.get("processed"):
+        return
+    state["processed"] = True
+    _save_state(state)
+
+
 gen_extract.last_extract_path = None  # type: ignore[attr-defined]
+gen_extract.unchanged = False  # type: ignore[attr-defined]
@@ -1,7 +1,6 @@
-"""Download grants data from Grants.gov and persist as JSON."""
+"""Download grants data from Grants.gov and persist it (see ``json_store``)."""
 from __future__ import annotations
 
-import json
 import os
 import time
 from datetime import datetime, timezone
@@ -10,6 +9,8 @@ from typing import Any, Dict, Optional
 
 import requests
 
+from grants.env import int_env
+from grants_data.json_store import FILE_PATTERN, loads, write_records
 from grants_data.retention import keep_limit, prune_old_files
 from logs.status_logger import logger
 
@@ -17,17 +18,7 @@ _DEFAULT_EXPORT_URL = "https://micro.grants.gov/rest/opportunities/search_export
 _DATA_DIR = Path(__file__).resolve().parent / "grants_json_data"
 
 
-def _int_env(name: str, default: int) -> int:
-    raw = os.getenv(name)
-    if raw is None or not raw.strip():
-        return default
-    try:
-        return int(raw.strip())
-    except ValueError:
-        return default
-
-
-_TIMEOUT = _int_env("GRANTS_GOV_TIMEOUT", 60)
+_TIMEOUT = int_env("GRANTS_GOV_TIMEOUT", 60)
 _DEFAULT_ROWS = 5000
 _DEFAULT_SORT = "openDate|desc"
 _DEFAULT_STATUSES = "forecasted|posted"
@@ -83,12 +74,9 @@ def _build_payload(rows: int) -> Dict[str, Any]:
 
 
 def _write_output(records: list[dict[str, Any]]) -> Path:
-    _DATA_DIR.mkdir(parents=True, exist_ok=True)
     timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
-    destination = _DATA_DIR / f"grants_{timestamp}.json"
-    with destination.open("w", encoding="utf-8") as fp:
-        json.dump(records, fp, ensure_ascii=False, indent=2)
-    prune_old_files(_DATA_DIR, "grants_*.json", keep_limit())
+    destination = write_records(records, _DATA_DIR, f"grants_{timestamp}")
+    prune_old_files(_DATA_DIR, FILE_PATTERN, keep_limit())
     return destination
 
 
@@ -128,7 +116,7 @@ def gen_grants(rows: Optional[int] = None) -> bool:
             time.sleep(wait)
 
     try:
-        records = response.json()
+        records = loads(response.content)
     except ValueError as exc:
         logger("error", f"Unexpected response format from Grants.gov: {exc}")
         return False
@@ -0,0 +1,108 @@
+"""Bounded-memory sorting for the streaming pipeline.
+
+Records are buffered up to ``chunk_size``; each full buffer is sorted and
+spilled to a temporary pickle file, and iteration k-way merges the sorted
+runs with ``heapq.merge``. Peak memory is one chunk during ingestion and one
+record per run while iterating, regardless of how many records are sorted.
+Small inputs never touch disk.
+"""
+from __future__ import annotations
+
+import heapq
+import pickle
+import tempfile
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from grants.env import int_env
+
+Record = Dict[str, object]
+
+_DEFAULT_CHUNK_SIZE = 10000
+
+
+def sort_chunk_size() -> int:
+    return int_env("GRANTS_SORT_CHUNK_SIZE", _DEFAULT_CHUNK_SIZE, minimum=1)
+
+
+def _read_run(path: Path) -> Iterator[Record]:
+    with path.open("rb") as fp:
+        while True:
+            try:
+                yield pickle.load(fp)
+            except EOFError:
+                return
+
+
+class ExternalSorter:
+    """Sort an arbitrarily long record stream with bounded memory.
+
+    Iterating the sorter (any number of times) yields records in sorted order,
+    stable across runs like ``list.sort``. It also supports ``len()`` and
+    slicing, so it can stand in for the final record list.
+    """
+
+    def __init__(
+        self,
+        key: Callable[[Record], Any],
+        reverse: bool = False,
+        chunk_size: Optional[int] = None,
+    ) -> None:
+        self._key = key
+        self._reverse = reverse
+        self._chunk_size = chunk_size or sort_chunk_size()
+        self._buffer: List[Record] = []
+        self._runs: List[Path] = []
+        self._tmpdir: Optional[tempfile.TemporaryDirectory] = None
+        self._count = 0
+
+    def add(self, record: Record) -> None:
+        self._buffer.append(record)
+        self._count += 1
+        if len(self._buffer) >= self._chunk_size:
+            self._spill()
+
+    def extend(self, records: Iterable[Record]) -> "ExternalSorter":
+        for record in records:
+            self.add(record)
+        return self
+
+    def _spill(self) -> None:
+        if self._tmpdir is None:
+            self._tmpdir = tempfile.TemporaryDirectory(prefix="grantwatch-sort-")
+        self._buffer.sort(key=self._key, reverse=self._reverse)
+        path = Path(self._tmpdir.name) / f"run-{len(self._runs):05d}.pkl"
+        with path.open("wb") as fp:
+            for record in self._buffer:
+                pickle.dump(record, fp, protocol=pickle.HIGHEST_PROTOCOL)
+        self._runs.append(path)
+        self._buffer = []
+
+    @property
+    def spilled_runs(self) -> int:
+        return len(self._runs)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[Record]:
+        self._buffer.sort(key=self._key, reverse=self._reverse)
+        if not self._runs:
+            return iter(list(self._buffer))
+        # Runs come before the in-memory tail so merge ties keep input order.
+        sources = [_read_run(path) for path in self._runs] + [iter(list(self._buffer))]
+        return heapq.merge(*sources, key=self._key, reverse=self._reverse)
+
+    def __getitem__(self, index: slice) -> List[Record]:
+        if not isinstance(index, slice):
+            raise TypeError("ExternalSorter supports slicing only")
+        return list(islice(iter(self), index.start, index.stop, index.step))
+
+    def close(self) -> None:
+        if self._tmpdir is not None:
+            self._tmpdir.cleanup()
+            self._tmpdir = None
+        self._runs = []
+        self._buffer = []
+        self._count = 0
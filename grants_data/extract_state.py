@@ -0,0 +1,116 @@
+"""Persisted per-opportunity fingerprints for incremental extract ingestion.
+
+Only a few hundred of the ~82k opportunities in the daily extract change from
+one day to the next. The store remembers the ``Version``/``LastUpdatedDate``
+seen for every opportunity so ``parse_extract.process_extract_xml`` can skip
+unchanged elements before mapping them, and the rest of the pipeline only
+processes the delta.
+
+New fingerprints are staged while parsing and only written by ``commit()``,
+which the pipeline calls once the database load succeeded; a failed run
+therefore re-processes the same delta next time instead of losing it.
+"""
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+from logs.status_logger import logger
+
+_DEFAULT_STATE_PATH = Path(__file__).resolve().parent / "grants_state" / "extract_fingerprints.json"
+
+
+def incremental_enabled() -> bool:
+    raw = os.getenv("GRANTS_EXTRACT_INCREMENTAL")
+    if raw is None:
+        return False
+    return raw.strip().lower() in {"1", "true", "yes", "on"}
+
+
+def state_path() -> Path:
+    override = os.getenv("GRANTS_EXTRACT_STATE_FILE")
+    if override and override.strip():
+        return Path(override.strip())
+    return _DEFAULT_STATE_PATH
+
+
+class FingerprintStore:
+    """Map of ``<status>:<OpportunityID>`` to its last processed fingerprint."""
+
+    def __init__(self, path: Path, seen: Optional[Dict[str, str]] = None) -> None:
+        self.path = path
+        self._seen: Dict[str, str] = self._load() if seen is None else seen
+        self._pending: Dict[str, str] = {}
+        self.unchanged = 0
+
+    def _load(self) -> Dict[str, str]:
+        if not self.path.exists():
+            return {}
+        try:
+            with self.path.open("r", encoding="utf-8") as fp:
+                payload = json.load(fp)
+        except (OSError, json.JSONDecodeError) as exc:
+            logger("warning", f"Ignoring unreadable extract state at {self.path}: {exc}")
+            return {}
+        if not isinstance(payload, dict):
+            logger("warning", f"Ignoring malformed extract state at {self.path}")
+            return {}
+        return {str(key): str(value) for key, value in payload.items()}
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def is_unchanged(self, key: str, fingerprint: Optional[str]) -> bool:
+        """True when ``key`` was already processed with this exact fingerprint.
+
+        Opportunities without a version or update timestamp are never skipped.
+        """
+        if not fingerprint or self._seen.get(key) != fingerprint:
+            return False
+        self.unchanged += 1
+        return True
+
+    def stage(self, key: str, fingerprint: Optional[str]) -> None:
+        if fingerprint:
+            self._pending[key] = fingerprint
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def snapshot(self) -> Dict[str, str]:
+        """Committed fingerprints, e.g. to seed stores in parser worker processes."""
+        return dict(self._seen)
+
+    def staged(self) -> Dict[str, str]:
+        """Fingerprints staged since the last commit, e.g. to return from a worker."""
+        return dict(self._pending)
+
+    def merge(self, pending: Dict[str, str], unchanged: int) -> None:
+        """Fold a worker's staged fingerprints and skip count into this store."""
+        self._pending.update(pending)
+        self.unchanged += unchanged
+
+    def commit(self) -> None:
+        """Merge staged fingerprints and atomically rewrite the state file."""
+        if not self._pending:
+            return
+        self._seen.update(self._pending)
+        self._pending = {}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with tmp_path.open("w", encoding="utf-8") as fp:
+            json.dump(self._seen, fp, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+        logger("info", f"Saved {len(self._seen)} extract fingerprints to {self.path}")
+
+
+def load_fingerprint_store() -> Optional[FingerprintStore]:
+    """Return the configured store, or ``None`` when incremental mode is off."""
+    if not incremental_enabled():
+        return None
+    store = FingerprintStore(state_path())
+    logger("info", f"Incremental extract mode: {len(store)} known opportunities")
+    return store
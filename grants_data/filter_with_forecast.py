@@ -1,15 +1,24 @@
 """Helpers to remove forecasted opportunities."""
 from __future__ import annotations
 
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator, List
 
 from logs.status_logger import logger
 
 
-def filter_forecasted_data(records: List[Dict[str, object]]) -> List[Dict[str, object]]:
-    filtered = [record for record in records if str(record.get("OPPORTUNITY_STATUS", "")).lower() != "forecasted"]
+def iter_filter_forecasted_data(records: Iterable[Dict[str, object]]) -> Iterator[Dict[str, object]]:
+    seen = 0
+    kept = 0
+    for record in records:
+        seen += 1
+        if str(record.get("OPPORTUNITY_STATUS", "")).lower() != "forecasted":
+            kept += 1
+            yield record
     logger(
         "info",
-        f"Removed forecasted opportunities: kept {len(filtered)} of {len(records)} records"
+        f"Removed forecasted opportunities: kept {kept} of {seen} records"
     )
-    return filtered
+
+
+def filter_forecasted_data(records: List[Dict[str, object]]) -> List[Dict[str, object]]:
+    return list(iter_filter_forecasted_data(records))
@@ -4,6 +4,7 @@ from __future__ import annotations
 from pathlib import Path
 from typing import Optional
 
+from grants_data.json_store import FILE_PATTERN
 from logs.status_logger import logger
 
 _DATA_DIR = Path(__file__).resolve().parent / "grants_json_data"
@@ -15,7 +16,7 @@ def get_latest_file_path() -> Optional[Path]:
         return None
 
     candidates = sorted(
-        _DATA_DIR.glob("grants_*.json"),
+        _DATA_DIR.glob(FILE_PATTERN),
         key=lambda path: path.stat().st_mtime,
         reverse=True,
     )
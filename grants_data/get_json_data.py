@@ -1,28 +1,65 @@
 """Load grants JSON data from disk."""
 from __future__ import annotations
 
-import json
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterator, List
 
+from grants_data.grant_record import GrantRecord
+from grants_data.json_store import iter_records
 from logs.status_logger import logger
 
 
+class ExportReadError(Exception):
+    """A stored export could not be read to the end."""
+
+
+def iter_json_data(file_path: str | Path) -> Iterator[Dict[str, object]]:
+    """Streaming form of :func:`process_json_data`.
+
+    A bad line, a truncated gzip member or an early EOF raises
+    :class:`ExportReadError` after the records before it were yielded, so a
+    streaming run fails like the eager one instead of loading a partial
+    export.
+    """
+    path = Path(file_path)
+    if not path.exists():
+        logger("error", f"Grants file not found at {path}")
+        return
+
+    count = 0
+    try:
+        for item in iter_records(path):
+            count += 1
+            yield GrantRecord.from_mapping(item) if isinstance(item, dict) else item
+    except ValueError as exc:
+        logger("error", f"Failed to parse JSON at {path}: {exc}")
+        raise ExportReadError(f"{path}: {exc}") from exc
+    except (OSError, EOFError) as exc:
+        logger("error", f"Failed to read {path}: {exc}")
+        raise ExportReadError(f"{path}: {exc}") from exc
+
+    logger("info", f"Loaded {count} grants from {path}")
+
+
 def process_json_data(file_path: str | Path) -> List[Dict[str, object]]:
+    """Load a stored export (any ``json_store`` format) as :class:`GrantRecord` rows.
+
+    A file that cannot be read completely yields no records at all.
+    """
     path = Path(file_path)
     if not path.exists():
         logger("error", f"Grants file not found at {path}")
         return []
 
     try:
-        with path.open("r", encoding="utf-8") as fp:
-            payload = json.load(fp)
-    except json.JSONDecodeError as exc:
+        payload = [
+            GrantRecord.from_mapping(item) if isinstance(item, dict) else item for item in iter_records(path)
+        ]
+    except ValueError as exc:
         logger("error", f"Failed to parse JSON at {path}: {exc}")
         return []
-
-    if not isinstance(payload, list):
-        logger("error", f"Unexpected JSON structure in {path}; expected a list")
+    except (OSError, EOFError) as exc:
+        logger("error", f"Failed to read {path}: {exc}")
         return []
 
     logger("info", f"Loaded {len(payload)} grants from {path}")
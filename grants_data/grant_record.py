@@ -0,0 +1,219 @@
+"""Compact record type for parsed grants.
+
+Records used to be plain dicts of ~30 keys, several of them duplicates:
+``AGENCY`` repeats ``AGENCY_NAME``, ``OPPORTUNITY_URL`` repeats
+``OPPORTUNITY_NUMBER_LINK`` and ``CATEGORY_OF_FUNDING_ACTIVITY`` is
+``FUNDING_CATEGORIES`` joined. :class:`GrantRecord` stores the source fields
+in ``__slots__`` and derives those canonical keys on read, with the same
+fallbacks ``normalize_records`` applies, so a parsed record is already
+normalized.
+
+It is a ``MutableMapping``, so ``record.get(...)``, ``dict(record)`` and
+item assignment keep working everywhere a dict record did. Keys outside the
+known fields (export-only columns, ``MATCHED_KEYWORDS`` and friends) live in
+a small overflow dict.
+"""
+from __future__ import annotations
+
+from collections.abc import MutableMapping
+from typing import Dict, Iterator, Mapping, Optional, Tuple
+
+from grants_data.dates import PARSED_DATES_KEY
+
+# Known fields, in the order the XML extract mapping has always produced them.
+FIELDS: Tuple[str, ...] = (
+    "OPPORTUNITY_ID",
+    "OPPORTUNITY_NUMBER",
+    "OPPORTUNITY_TITLE",
+    "OPPORTUNITY_STATUS",
+    "OPPORTUNITY_CATEGORY",
+    "OPPORTUNITY_NUMBER_LINK",
+    "OPPORTUNITY_URL",
+    "AGENCY_CODE",
+    "AGENCY_NAME",
+    "AGENCY",
+    "CATEGORY_OF_FUNDING_ACTIVITY",
+    "FUNDING_CATEGORIES",
+    "FUNDING_CATEGORY_EXPLANATION",
+    "FUNDING_INSTRUMENT_TYPE",
+    "ASSISTANCE_LISTINGS",
+    "ESTIMATED_TOTAL_FUNDING",
+    "EXPECTED_NUMBER_OF_AWARDS",
+    "AWARD_CEILING",
+    "AWARD_FLOOR",
+    "COST_SHARING_MATCH_REQUIRMENT",
+    "LINK_TO_ADDITIONAL_INFORMATION",
+    "GRANTOR_CONTACT",
+    "GRANTOR_CONTACT_EMAIL",
+    "POSTED_DATE",
+    "CLOSE_DATE",
+    "ARCHIVE_DATE",
+    "LAST_UPDATED_DATETIME",
+    "VERSION",
+    "FUNDING_DESCRIPTION",
+    "ADDITIONAL_INFORMATION_ON_ELIGIBILITY",
+)
+
+# Derived keys -> source fields tried in order while the key itself is empty.
+# Derived keys are always present; the first three mirror normalize._KEY_FALLBACKS.
+_DERIVED: Dict[str, Tuple[str, ...]] = {
+    "AGENCY": ("AGENCY_NAME", "AGENCY_CODE"),
+    "OPPORTUNITY_URL": ("OPPORTUNITY_NUMBER_LINK", "LINK_TO_ADDITIONAL_INFORMATION"),
+    "FUNDING_CATEGORIES": ("CATEGORY_OF_FUNDING_ACTIVITY",),
+    "CATEGORY_OF_FUNDING_ACTIVITY": ("FUNDING_CATEGORIES",),
+}
+
+_FIELD_SET = frozenset(FIELDS)
+
+
+class _Unset:
+    """Marks a slot that was never assigned; pickles back to the singleton."""
+
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return "<unset>"
+
+    def __reduce__(self) -> str:
+        return "_UNSET"
+
+
+_UNSET = _Unset()
+
+
+def _is_empty(value: object) -> bool:
+    return value is _UNSET or value is None or (isinstance(value, str) and not value.strip())
+
+
+class GrantRecord(MutableMapping):
+    """Slotted grant record with a dict-compatible mapping interface."""
+
+    __slots__ = FIELDS + ("_parsed_dates", "_extra")
+
+    def __init__(self, values: Optional[Mapping[str, object]] = None, **fields: object) -> None:
+        for field in FIELDS:
+            object.__setattr__(self, field, _UNSET)
+        self._parsed_dates: Optional[dict] = None
+        self._extra: Optional[Dict[str, object]] = None
+        if values is not None:
+            self.update(values)
+        if fields:
+            self.update(fields)
+
+    @classmethod
+    def from_mapping(cls, values: Mapping[str, object]) -> "GrantRecord":
+        """Wrap a source dict (e.g. one search_export row); unknown keys are kept."""
+        return values if isinstance(values, GrantRecord) else cls(values)
+
+    def _derive(self, key: str) -> object:
+        value = getattr(self, key)
+        if not _is_empty(value):
+            return value
+        for source in _DERIVED[key]:
+            fallback = getattr(self, source)
+            if key == "CATEGORY_OF_FUNDING_ACTIVITY":
+                # Only the extract's category list is joined; a string is not a duplicate.
+                if isinstance(fallback, list):
+                    return "; ".join(fallback) or None
+            elif not _is_empty(fallback):
+                return fallback
+        return None if value is _UNSET else value
+
+    # -- mapping protocol ---------------------------------------------------
+
+    def __getitem__(self, key: str) -> object:
+        if key in _DERIVED:
+            return self._derive(key)
+        if key in _FIELD_SET:
+            value = getattr(self, key)
+            if value is _UNSET:
+                raise KeyError(key)
+            return value
+        if key == PARSED_DATES_KEY and self._parsed_dates is not None:
+            return self._parsed_dates
+        if self._extra is not None and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def get(self, key: str, default: object = None) -> object:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key: object) -> bool:
+        if key in _DERIVED:
+            return True
+        if key in _FIELD_SET:
+            return getattr(self, key) is not _UNSET
+        if key == PARSED_DATES_KEY:
+            return self._parsed_dates is not None
+        return self._extra is not None and key in self._extra
+
+    def __setitem__(self, key: str, value: object) -> None:
+        if key in _FIELD_SET:
+            object.__setattr__(self, key, value)
+        elif key == PARSED_DATES_KEY and isinstance(value, dict):
+            self._parsed_dates = value
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        if key in _FIELD_SET and getattr(self, key) is not _UNSET:
+            object.__setattr__(self, key, _UNSET)
+        elif key == PARSED_DATES_KEY and self._parsed_dates is not None:
+            self._parsed_dates = None
+        elif self._extra is not None and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        for field in FIELDS:
+            if field in _DERIVED or getattr(self, field) is not _UNSET:
+                yield field
+        if self._parsed_dates is not None:
+            yield PARSED_DATES_KEY
+        if self._extra is not None:
+            yield from self._extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"GrantRecord({self.as_dict()!r})"
+
+    # -- conversions ----------------------------------------------------------
+
+    def as_dict(self) -> Dict[str, object]:
+        """Plain-dict copy with every derived key filled in."""
+        return {key: self[key] for key in self}
+
+    def stored_items(self) -> Iterator[Tuple[str, object]]:
+        """Assigned fields and overflow keys only; derived keys are left to be re-derived."""
+        for field in FIELDS:
+            value = getattr(self, field)
+            if value is not _UNSET:
+                yield field, value
+        if self._extra is not None:
+            yield from self._extra.items()
+
+    def copy(self) -> "GrantRecord":
+        clone = GrantRecord.__new__(GrantRecord)
+        clone.__setstate__(self.__getstate__())
+        return clone
+
+    def __getstate__(self) -> tuple:
+        values = tuple(getattr(self, field) for field in FIELDS)
+        extra = dict(self._extra) if self._extra is not None else None
+        parsed = dict(self._parsed_dates) if self._parsed_dates is not None else None
+        return values, parsed, extra
+
+    def __setstate__(self, state: tuple) -> None:
+        values, parsed, extra = state
+        for field, value in zip(FIELDS, values):
+            object.__setattr__(self, field, value)
+        self._parsed_dates = parsed
+        self._extra = extra
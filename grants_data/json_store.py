@@ -0,0 +1,152 @@
+"""Storage format for downloaded search_export records.
+
+Exports used to be written as one ``indent=2`` JSON array and reloaded with
+``json.load``: slow, several times larger than the data, and never
+compressed. They are now written as JSON Lines, by default gzip-compressed,
+one record per line so writes and reads stream. ``GRANTS_JSON_FORMAT``
+picks the format:
+
+- ``jsonl.gz`` (default): gzip, stdlib only
+- ``jsonl.zst``: Zstandard, needs ``zstandard`` (falls back to gzip)
+- ``jsonl``: uncompressed
+- ``json``: the old pretty-printed array
+
+Readers pick the format from the file suffix, so older ``.json`` downloads
+still load. ``orjson`` is used for encoding and decoding when installed.
+"""
+from __future__ import annotations
+
+import gzip
+import io
+import json
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Any, Dict, Iterable, Iterator, List
+
+from logs.status_logger import logger
+
+try:  # optional accelerator; the stdlib encoder writes equivalent JSON
+    import orjson as _orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    _orjson = None
+
+try:  # optional; jsonl.zst falls back to jsonl.gz without it
+    import zstandard as _zstd
+except ImportError:  # pragma: no cover - depends on the environment
+    _zstd = None
+
+FORMATS = ("jsonl.gz", "jsonl.zst", "jsonl", "json")
+DEFAULT_FORMAT = "jsonl.gz"
+
+# Every format's files match this; temp files are dot-prefixed and never do.
+FILE_PATTERN = "grants_*.json*"
+
+_GZIP_LEVEL = 1
+_ZSTD_LEVEL = 3
+
+
+def storage_format() -> str:
+    raw = (os.getenv("GRANTS_JSON_FORMAT") or DEFAULT_FORMAT).strip().lower().lstrip(".")
+    if raw not in FORMATS:
+        logger("warning", f"Unknown GRANTS_JSON_FORMAT '{raw}'; using {DEFAULT_FORMAT}")
+        return DEFAULT_FORMAT
+    if raw == "jsonl.zst" and _zstd is None:
+        logger("warning", "GRANTS_JSON_FORMAT=jsonl.zst needs the zstandard package; using jsonl.gz")
+        return "jsonl.gz"
+    return raw
+
+
+def json_backend() -> str:
+    return "orjson" if _orjson is not None else "json"
+
+
+def dumps(value: Any) -> bytes:
+    """Compact UTF-8 JSON for one value."""
+    if _orjson is not None:
+        return _orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: bytes | str) -> Any:
+    if _orjson is not None:
+        return _orjson.loads(data)
+    return json.loads(data)
+
+
+def _format_of(path: Path) -> str:
+    name = path.name.lower()
+    for fmt in FORMATS:
+        if name.endswith("." + fmt):
+            return fmt
+    return "json"
+
+
+@contextmanager
+def _open(path: Path, mode: str, fmt: str) -> Iterator[IO[bytes]]:
+    if fmt == "jsonl.gz":
+        with gzip.open(path, mode, compresslevel=_GZIP_LEVEL) as fp:
+            yield fp
+    elif fmt == "jsonl.zst":
+        if _zstd is None:
+            raise OSError(f"{path.name} is Zstandard-compressed; install zstandard to read it")
+        with path.open(mode) as raw:
+            if "w" in mode:
+                with _zstd.ZstdCompressor(level=_ZSTD_LEVEL).stream_writer(raw, closefd=False) as fp:
+                    yield fp
+            else:
+                with _zstd.ZstdDecompressor().stream_reader(raw, closefd=False) as fp:
+                    yield io.BufferedReader(fp)
+    else:
+        with path.open(mode) as fp:
+            yield fp
+
+
+def write_records(records: Iterable[Dict[str, Any]], directory: Path, stem: str) -> Path:
+    """Write ``records`` to ``directory/stem.<format>`` and return the path.
+
+    The file is streamed to a dot-prefixed temp name and renamed into place
+    once complete, so a crash never leaves a truncated "latest" download.
+    """
+    fmt = storage_format()
+    directory.mkdir(parents=True, exist_ok=True)
+    destination = directory / f"{stem}.{fmt}"
+    tmp_path = directory / f".{destination.name}.tmp"
+    try:
+        with _open(tmp_path, "wb", fmt) as fp:
+            if fmt == "json":
+                fp.write(json.dumps(list(records), ensure_ascii=False, indent=2).encode("utf-8"))
+            else:
+                for record in records:
+                    fp.write(dumps(record))
+                    fp.write(b"\n")
+        os.replace(tmp_path, destination)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return destination
+
+
+def iter_records(path: str | Path) -> Iterator[Any]:
+    """Yield the stored records one at a time (a legacy ``.json`` is loaded whole).
+
+    Raises ``ValueError`` for malformed JSON and ``OSError``/``EOFError`` for
+    unreadable or truncated files.
+    """
+    path = Path(path)
+    fmt = _format_of(path)
+    if fmt == "json":
+        with path.open("rb") as fp:
+            payload = loads(fp.read())
+        if not isinstance(payload, list):
+            raise ValueError("expected a JSON array of records")
+        yield from payload
+        return
+    with _open(path, "rb", fmt) as fp:
+        for line in fp:
+            if line.strip():
+                yield loads(line)
+
+
+def load_records(path: str | Path) -> List[Any]:
+    return list(iter_records(path))
@@ -2,39 +2,242 @@
 from __future__ import annotations
 
 import re
-from typing import Dict, Iterable, List
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Pattern, Sequence, Tuple
 
 from grants_data.normalize import strip_html
 from logs.status_logger import logger
 
+# Trie nodes are dicts keyed by character; this key marks the end of a keyword.
+_TERMINAL = ""
 
-def filter_grants_by_keywords(
-    records: List[Dict[str, object]],
+# Profile id used for the global GRANTS_KEYWORDS set (emails are never empty).
+_GLOBAL_PROFILE = ""
+
+KeywordProfiles = Mapping[str, Tuple[Sequence[str], int]]
+
+
+def _keyword_pattern(keyword: str) -> Pattern[str]:
+    return re.compile(r"\b" + re.escape(keyword) + r"\b", re.IGNORECASE)
+
+
+def _trie_regex(node: Dict[str, dict]) -> str:
+    """Regex for a keyword trie; longer keywords are tried before their prefixes."""
+    branches = [re.escape(char) + _trie_regex(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    return "(?:" + body + ")?" if _TERMINAL in node else body
+
+
+class KeywordMatcher:
+    """Find which of many keywords occur in a text in a single regex pass.
+
+    Equivalent to running ``\\bkeyword\\b`` (case-insensitive) once per
+    keyword, but the keywords are compiled into one trie-shaped alternation,
+    so each text position costs one walk down the trie instead of one scan
+    per keyword. The scan is a zero-width lookahead, so overlapping
+    occurrences ("climate change" / "change") are all seen; at any position
+    the longest keyword wins and shorter keywords that are prefixes of it
+    are re-checked with their own pattern. Keywords whose case folding is
+    not plain one-to-one lower-casing (and the empty keyword) always use
+    their own pattern, and a text whose match cannot be mapped back to a
+    keyword falls back to the per-keyword scan, so results are identical
+    either way.
+    """
+
+    def __init__(self, keywords: Iterable[str]) -> None:
+        self.keywords: List[str] = list(dict.fromkeys(keywords))
+        self._patterns = {keyword: _keyword_pattern(keyword) for keyword in self.keywords}
+        self._by_lower: Dict[str, List[str]] = {}
+        self._special: List[str] = []
+        for keyword in self.keywords:
+            lowered = keyword.lower()
+            if not keyword or len(lowered) != len(keyword) or lowered != keyword.casefold():
+                self._special.append(keyword)
+            else:
+                self._by_lower.setdefault(lowered, []).append(keyword)
+
+        trie: Dict[str, dict] = {}
+        self._prefixes: Dict[str, List[str]] = {}
+        for lowered in self._by_lower:
+            node = trie
+            for char in lowered:
+                node = node.setdefault(char, {})
+            node[_TERMINAL] = {}
+        for lowered in self._by_lower:
+            node = trie
+            prefixes = []
+            for index, char in enumerate(lowered[:-1]):
+                node = node[char]
+                if _TERMINAL in node:
+                    prefixes.append(lowered[: index + 1])
+            self._prefixes[lowered] = prefixes
+
+        self._scanner: Optional[Pattern[str]] = None
+        if trie:
+            self._scanner = re.compile(r"\b(?=(" + _trie_regex(trie) + r")\b)", re.IGNORECASE)
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+    def matches(self, text: str) -> List[str]:
+        """Keywords found in ``text``, in the order they were given."""
+        found = set()
+        if self._scanner is not None:
+            total = len(self._by_lower)
+            prefixes = self._prefixes
+            for match in self._scanner.finditer(text):
+                lowered = match.group(1).lower()
+                if lowered in found and not prefixes[lowered]:
+                    continue
+                if lowered not in prefixes:
+                    return self._matches_each(text)
+                found.add(lowered)
+                for prefix in prefixes[lowered]:
+                    if prefix not in found and self._patterns[self._by_lower[prefix][0]].match(text, match.start()):
+                        found.add(prefix)
+                if len(found) == total:
+                    break
+        special = {keyword for keyword in self._special if self._patterns[keyword].search(text)}
+        return [keyword for keyword in self.keywords if keyword in special or keyword.lower() in found]
+
+    def _matches_each(self, text: str) -> List[str]:
+        return [keyword for keyword in self.keywords if self._patterns[keyword].search(text)]
+
+
+class ProfileMatcher:
+    """Evaluate many keyword profiles against a text in one scan.
+
+    ``profiles`` maps a profile id to ``(keywords, threshold)``. Every
+    distinct keyword goes into a single :class:`KeywordMatcher`, and an
+    inverted index maps each keyword to the profiles that list it, so the
+    cost per text is one scan plus work proportional to the keywords that
+    actually occur, not to the number of profiles.
+    """
+
+    def __init__(self, profiles: KeywordProfiles) -> None:
+        self._index: Dict[str, List[str]] = {}
+        self._thresholds: Dict[str, int] = {}
+        for profile_id, (keywords, threshold) in profiles.items():
+            self._thresholds[profile_id] = threshold
+            for keyword in dict.fromkeys(keywords):
+                self._index.setdefault(keyword, []).append(profile_id)
+        self._always = [profile_id for profile_id, threshold in self._thresholds.items() if threshold <= 0]
+        self._matcher = KeywordMatcher(self._index)
+
+    def __len__(self) -> int:
+        return len(self._thresholds)
+
+    def hits(self, text: str) -> Dict[str, List[str]]:
+        """Matched keywords per profile, whether or not its threshold is met."""
+        hits: Dict[str, List[str]] = {profile_id: [] for profile_id in self._always}
+        for keyword in self._matcher.matches(text):
+            for profile_id in self._index[keyword]:
+                hits.setdefault(profile_id, []).append(keyword)
+        return hits
+
+    def meets(self, profile_id: str, keywords: Sequence[str]) -> bool:
+        return len(keywords) >= self._thresholds[profile_id]
+
+    def match(self, text: str) -> Dict[str, List[str]]:
+        """Profiles whose threshold is met, each with its matched keywords."""
+        return {
+            profile_id: keywords
+            for profile_id, keywords in self.hits(text).items()
+            if self.meets(profile_id, keywords)
+        }
+
+
+def iter_filter_grants_by_keywords(
+    records: Iterable[Dict[str, object]],
     field: str,
     keywords: Iterable[str],
     threshold: int,
-) -> List[Dict[str, object]]:
-    """Keep grants where ``threshold`` or more keywords appear in ``field``.
+    profiles: Optional[KeywordProfiles] = None,
+) -> Iterator[Dict[str, object]]:
+    """Streaming form of :func:`filter_grants_by_keywords`."""
+    if profiles:
+        yield from _iter_filter_with_profiles(records, field, keywords, threshold, profiles)
+        return
 
-    Matches on word boundaries so short keywords do not fire inside longer
-    words (e.g. "art" no longer matches "particular").
-    """
-    keyword_patterns = {
-        keyword: re.compile(r"\b" + re.escape(keyword) + r"\b", re.IGNORECASE)
-        for keyword in keywords
-    }
-    filtered: List[Dict[str, object]] = []
+    matcher = keywords if isinstance(keywords, KeywordMatcher) else KeywordMatcher(keywords)
+    seen = 0
+    kept = 0
 
     for record in records:
+        seen += 1
         haystack = strip_html(record.get(field, ""))
-        matches = [keyword for keyword, pattern in keyword_patterns.items() if pattern.search(haystack)]
+        matches = matcher.matches(haystack)
         if len(matches) >= threshold:
             enriched = dict(record)
             enriched["MATCHED_KEYWORDS"] = matches
-            filtered.append(enriched)
+            kept += 1
+            yield enriched
+
+    logger(
+        "info",
+        f"Keyword filtering on {field}: kept {kept} of {seen} records"
+    )
+
+
+def _iter_filter_with_profiles(
+    records: Iterable[Dict[str, object]],
+    field: str,
+    keywords: Iterable[str],
+    threshold: int,
+    profiles: KeywordProfiles,
+) -> Iterator[Dict[str, object]]:
+    global_keywords = keywords.keywords if isinstance(keywords, KeywordMatcher) else list(keywords)
+    combined: Dict[str, Tuple[Sequence[str], int]] = {_GLOBAL_PROFILE: (global_keywords, threshold)}
+    combined.update((email, profile) for email, profile in profiles.items() if email)
+    matcher = ProfileMatcher(combined)
+    seen = 0
+    kept = 0
+    profile_hits = 0
+
+    for record in records:
+        seen += 1
+        hits = matcher.hits(strip_html(record.get(field, "")))
+        matches = hits.pop(_GLOBAL_PROFILE, [])
+        matched_profiles = {email: found for email, found in hits.items() if matcher.meets(email, found)}
+        global_match = matcher.meets(_GLOBAL_PROFILE, matches)
+        if not global_match and not matched_profiles:
+            continue
+        enriched = dict(record)
+        enriched["MATCHED_KEYWORDS"] = matches
+        enriched["MATCHED_PROFILES"] = matched_profiles
+        if not global_match:
+            enriched["PROFILE_ONLY"] = True
+        profile_hits += len(matched_profiles)
+        kept += 1
+        yield enriched
 
     logger(
         "info",
-        f"Keyword filtering on {field}: kept {len(filtered)} of {len(records)} records"
+        f"Keyword filtering on {field}: kept {kept} of {seen} records "
+        f"({profile_hits} matches across {len(matcher) - 1} subscriber profiles)"
     )
-    return filtered
+
+
+def filter_grants_by_keywords(
+    records: List[Dict[str, object]],
+    field: str,
+    keywords: Iterable[str],
+    threshold: int,
+    profiles: Optional[KeywordProfiles] = None,
+) -> List[Dict[str, object]]:
+    """Keep grants where ``threshold`` or more keywords appear in ``field``.
+
+    Matches on word boundaries so short keywords do not fire inside longer
+    words (e.g. "art" no longer matches "particular"). ``keywords`` may be a
+    prebuilt :class:`KeywordMatcher` to reuse its compiled scanner.
+
+    With subscriber ``profiles`` (email -> ``(keywords, threshold)``), a grant
+    is also kept when any profile matches, and ``MATCHED_PROFILES`` records
+    which ones did (email -> matched keywords). A grant kept only because of
+    a profile is tagged ``PROFILE_ONLY``: it is an alert for those subscribers
+    alone and stays out of the shared CSV, grants table and release email.
+    All profiles and the global keywords are evaluated in the same single
+    scan per record.
+    """
+    return list(iter_filter_grants_by_keywords(records, field, keywords, threshold, profiles))
@@ -12,7 +12,10 @@ from __future__ import annotations
 
 import html
 import re
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator, List
+
+from grants_data.dates import PARSED_DATES_KEY
+from grants_data.grant_record import GrantRecord
 
 _TAG_RE = re.compile(r"<[^>]+>")
 _WS_RE = re.compile(r"\s+")
@@ -38,11 +41,17 @@ def _is_empty(value: object) -> bool:
     return value is None or (isinstance(value, str) and not value.strip())
 
 
-def normalize_records(records: List[Dict[str, object]]) -> List[Dict[str, object]]:
-    """Fill canonical keys from source-specific aliases; leaves originals intact."""
-    normalized: List[Dict[str, object]] = []
+def iter_normalize_records(records: Iterable[Dict[str, object]]) -> Iterator[Dict[str, object]]:
+    """Streaming form of :func:`normalize_records`."""
     for record in records:
+        if isinstance(record, GrantRecord):
+            # Canonical keys are derived on read; only the date cache is missing.
+            if PARSED_DATES_KEY not in record:
+                record[PARSED_DATES_KEY] = {}
+            yield record
+            continue
         merged = dict(record)
+        merged[PARSED_DATES_KEY] = {}
         for canonical, fallbacks in _KEY_FALLBACKS.items():
             if not _is_empty(merged.get(canonical)):
                 continue
@@ -51,5 +60,15 @@ def normalize_records(records: List[Dict[str, object]]) -> List[Dict[str, object
                 if not _is_empty(value):
                     merged[canonical] = value
                     break
-        normalized.append(merged)
-    return normalized
+        yield merged
+
+
+def normalize_records(records: List[Dict[str, object]]) -> List[Dict[str, object]]:
+    """Fill canonical keys from source-specific aliases; leaves originals intact.
+
+    Each normalized record also gets an empty ``PARSED_DATES`` cache that
+    :func:`grants_data.dates.record_date` fills as later stages read dates.
+    :class:`GrantRecord` inputs already derive their canonical keys, so they
+    are passed through (not copied) with just that cache attached.
+    """
+    return list(iter_normalize_records(records))
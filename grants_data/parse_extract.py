@@ -8,16 +8,47 @@ existing date/status/keyword filters and CSV writer work unchanged.
 """
 from __future__ import annotations
 
-from datetime import datetime
+import argparse
+import io
+import mmap
+import os
+import re
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
 from xml.etree import ElementTree
 
+from grants.env import int_env
+from grants_data.dates import format_extract_date
+from grants_data.extract_state import FingerprintStore
+from grants_data.grant_record import GrantRecord
 from logs.status_logger import logger
 
+try:  # optional accelerator; the stdlib parser produces identical records
+    from lxml import etree as _lxml_etree
+except ImportError:  # pragma: no cover - depends on the environment
+    _lxml_etree = None
+
 _NS = "{http://apply.grants.gov/system/OpportunityDetail-V1.0}"
 _SYNOPSIS_TAG = f"{_NS}OpportunitySynopsisDetail_1_0"
 _FORECAST_TAG = f"{_NS}OpportunityForecastDetail_1_0"
+_STATUS_BY_TAG = {_SYNOPSIS_TAG: "Posted", _FORECAST_TAG: "Forecasted"}
+
+# Child tag -> stripped texts of every such child, in document order.
+Fields = Dict[str, List[str]]
+
+# Byte-level markers used to shard the document for parallel parsing. Both
+# opportunity elements share the ``Detail_1_0`` suffix; text content cannot
+# contain a raw ``<``, so an opening tag match is always a real element.
+_OPEN_TAG_RE = re.compile(rb"<(?:[\w.-]+:)?Opportunity(?:Synopsis|Forecast)Detail_1_0[\s>]")
+_CLOSE_TAG_SUFFIX = b"Detail_1_0>"
+_MIN_SHARD_BYTES = 8 * 1024 * 1024
+_SHARDS_PER_WORKER = 4
 
 _FUNDING_ACTIVITY_CATEGORIES = {
     "ACA": "Affordable Care Act",
@@ -63,131 +94,401 @@ _OPPORTUNITY_CATEGORIES = {
 }
 
 
-def _text(element: ElementTree.Element, tag: str) -> Optional[str]:
-    child = element.find(f"{_NS}{tag}")
-    if child is None or child.text is None:
+def _collect_fields(element: ElementTree.Element) -> Fields:
+    """Gather every child's stripped text by tag in one pass over the element."""
+    fields: Fields = {}
+    for child in element:
+        tag = child.tag
+        if not isinstance(tag, str):  # lxml yields comments/PIs as children
+            continue
+        text = child.text
+        value = text.strip() if text else ""
+        bucket = fields.get(tag)
+        if bucket is None:
+            fields[tag] = [value]
+        else:
+            bucket.append(value)
+    return fields
+
+
+def _text(fields: Fields, tag: str) -> Optional[str]:
+    """First ``tag`` child's text, like ``element.find(tag).text`` stripped."""
+    values = fields.get(_NS + tag)
+    if not values:
         return None
-    value = child.text.strip()
-    return value or None
+    return values[0] or None
 
 
-def _texts(element: ElementTree.Element, tag: str) -> List[str]:
-    return [
-        child.text.strip()
-        for child in element.findall(f"{_NS}{tag}")
-        if child.text and child.text.strip()
-    ]
+def _texts(fields: Fields, tag: str) -> List[str]:
+    return [value for value in fields.get(_NS + tag, ()) if value]
 
 
 def _format_date(value: Optional[str]) -> Optional[str]:
     """Convert the extract's MMDDYYYY dates to MM/DD/YYYY."""
     if not value:
         return None
-    try:
-        return datetime.strptime(value, "%m%d%Y").strftime("%m/%d/%Y")
-    except ValueError:
-        return value
+    return format_extract_date(value)
 
 
 def _lookup_all(codes: List[str], table: Dict[str, str]) -> List[str]:
     return [table.get(code, code) for code in codes]
 
 
-def _map_record(element: ElementTree.Element, status: str) -> Dict[str, object]:
-    opportunity_id = _text(element, "OpportunityID")
+def _fingerprint(fields: Fields) -> Optional[str]:
+    version = _text(fields, "Version")
+    updated = _text(fields, "LastUpdatedDate")
+    if not version and not updated:
+        return None
+    return f"{version or ''}|{updated or ''}"
+
+
+def _map_record(fields: Fields, status: str) -> GrantRecord:
+    opportunity_id = _text(fields, "OpportunityID")
     funding_categories = _lookup_all(
-        _texts(element, "CategoryOfFundingActivity"), _FUNDING_ACTIVITY_CATEGORIES
+        _texts(fields, "CategoryOfFundingActivity"), _FUNDING_ACTIVITY_CATEGORIES
     )
     instrument_types = _lookup_all(
-        _texts(element, "FundingInstrumentType"), _FUNDING_INSTRUMENT_TYPES
+        _texts(fields, "FundingInstrumentType"), _FUNDING_INSTRUMENT_TYPES
     )
-    opportunity_category = _text(element, "OpportunityCategory")
+    opportunity_category = _text(fields, "OpportunityCategory")
 
     if status == "Forecasted":
-        posted_date = _format_date(_text(element, "EstimatedSynopsisPostDate"))
-        close_date = _format_date(_text(element, "EstimatedApplicationDueDate"))
+        posted_date = _format_date(_text(fields, "EstimatedSynopsisPostDate"))
+        close_date = _format_date(_text(fields, "EstimatedApplicationDueDate"))
     else:
-        posted_date = _format_date(_text(element, "PostDate"))
-        close_date = _format_date(_text(element, "CloseDate"))
-
-    return {
-        "OPPORTUNITY_ID": opportunity_id,
-        "OPPORTUNITY_NUMBER": _text(element, "OpportunityNumber"),
-        "OPPORTUNITY_TITLE": _text(element, "OpportunityTitle"),
-        "OPPORTUNITY_STATUS": status,
-        "OPPORTUNITY_CATEGORY": _OPPORTUNITY_CATEGORIES.get(
+        posted_date = _format_date(_text(fields, "PostDate"))
+        close_date = _format_date(_text(fields, "CloseDate"))
+
+    # AGENCY, OPPORTUNITY_URL and CATEGORY_OF_FUNDING_ACTIVITY are derived by
+    # GrantRecord from AGENCY_NAME, OPPORTUNITY_NUMBER_LINK and FUNDING_CATEGORIES.
+    return GrantRecord(
+        OPPORTUNITY_ID=opportunity_id,
+        OPPORTUNITY_NUMBER=_text(fields, "OpportunityNumber"),
+        OPPORTUNITY_TITLE=_text(fields, "OpportunityTitle"),
+        OPPORTUNITY_STATUS=status,
+        OPPORTUNITY_CATEGORY=_OPPORTUNITY_CATEGORIES.get(
             opportunity_category or "", opportunity_category
         ),
-        "OPPORTUNITY_NUMBER_LINK": (
-            f"https://www.grants.gov/search-results-detail/{opportunity_id}"
-            if opportunity_id
-            else None
-        ),
-        "OPPORTUNITY_URL": (
+        OPPORTUNITY_NUMBER_LINK=(
             f"https://www.grants.gov/search-results-detail/{opportunity_id}"
             if opportunity_id
             else None
         ),
-        "AGENCY_CODE": _text(element, "AgencyCode"),
-        "AGENCY_NAME": _text(element, "AgencyName"),
-        "AGENCY": _text(element, "AgencyName"),
-        "CATEGORY_OF_FUNDING_ACTIVITY": "; ".join(funding_categories) or None,
-        "FUNDING_CATEGORIES": funding_categories,
-        "FUNDING_CATEGORY_EXPLANATION": _text(element, "CategoryExplanation"),
-        "FUNDING_INSTRUMENT_TYPE": "; ".join(instrument_types) or None,
-        "ASSISTANCE_LISTINGS": "; ".join(_texts(element, "CFDANumbers")) or None,
-        "ESTIMATED_TOTAL_FUNDING": _text(element, "EstimatedTotalProgramFunding"),
-        "EXPECTED_NUMBER_OF_AWARDS": _text(element, "ExpectedNumberOfAwards"),
-        "AWARD_CEILING": _text(element, "AwardCeiling"),
-        "AWARD_FLOOR": _text(element, "AwardFloor"),
-        "COST_SHARING_MATCH_REQUIRMENT": _text(element, "CostSharingOrMatchingRequirement"),
-        "LINK_TO_ADDITIONAL_INFORMATION": _text(element, "AdditionalInformationURL"),
-        "GRANTOR_CONTACT": _text(element, "GrantorContactText"),
-        "GRANTOR_CONTACT_EMAIL": _text(element, "GrantorContactEmail"),
-        "POSTED_DATE": posted_date,
-        "CLOSE_DATE": close_date,
-        "ARCHIVE_DATE": _format_date(_text(element, "ArchiveDate")),
-        "LAST_UPDATED_DATETIME": _format_date(_text(element, "LastUpdatedDate")),
-        "VERSION": _text(element, "Version"),
-        "FUNDING_DESCRIPTION": _text(element, "Description"),
-        "ADDITIONAL_INFORMATION_ON_ELIGIBILITY": _text(
-            element, "AdditionalInformationOnEligibility"
+        AGENCY_CODE=_text(fields, "AgencyCode"),
+        AGENCY_NAME=_text(fields, "AgencyName"),
+        FUNDING_CATEGORIES=funding_categories,
+        FUNDING_CATEGORY_EXPLANATION=_text(fields, "CategoryExplanation"),
+        FUNDING_INSTRUMENT_TYPE="; ".join(instrument_types) or None,
+        ASSISTANCE_LISTINGS="; ".join(_texts(fields, "CFDANumbers")) or None,
+        ESTIMATED_TOTAL_FUNDING=_text(fields, "EstimatedTotalProgramFunding"),
+        EXPECTED_NUMBER_OF_AWARDS=_text(fields, "ExpectedNumberOfAwards"),
+        AWARD_CEILING=_text(fields, "AwardCeiling"),
+        AWARD_FLOOR=_text(fields, "AwardFloor"),
+        COST_SHARING_MATCH_REQUIRMENT=_text(fields, "CostSharingOrMatchingRequirement"),
+        LINK_TO_ADDITIONAL_INFORMATION=_text(fields, "AdditionalInformationURL"),
+        GRANTOR_CONTACT=_text(fields, "GrantorContactText"),
+        GRANTOR_CONTACT_EMAIL=_text(fields, "GrantorContactEmail"),
+        POSTED_DATE=posted_date,
+        CLOSE_DATE=close_date,
+        ARCHIVE_DATE=_format_date(_text(fields, "ArchiveDate")),
+        LAST_UPDATED_DATETIME=_format_date(_text(fields, "LastUpdatedDate")),
+        VERSION=_text(fields, "Version"),
+        FUNDING_DESCRIPTION=_text(fields, "Description"),
+        ADDITIONAL_INFORMATION_ON_ELIGIBILITY=_text(
+            fields, "AdditionalInformationOnEligibility"
         ),
-    }
+    )
+
+
+@contextmanager
+def _open_extract(path: Path) -> Iterator[BinaryIO]:
+    """Open the extract XML, or stream its member straight out of a ``.zip``."""
+    if path.suffix.lower() != ".zip":
+        with path.open("rb") as fp:
+            yield fp
+        return
+
+    with zipfile.ZipFile(path) as archive:
+        xml_names = [name for name in archive.namelist() if name.lower().endswith(".xml")]
+        if not xml_names:
+            raise ElementTree.ParseError(f"No XML file found inside {path}")
+        with archive.open(xml_names[0]) as member:
+            yield member
+
+
+def _iter_stdlib(source: str | BinaryIO) -> Iterator[Tuple[str, ElementTree.Element]]:
+    for _event, element in ElementTree.iterparse(source, events=("end",)):
+        status = _STATUS_BY_TAG.get(element.tag)
+        if status is None:
+            continue
+        yield status, element
+        element.clear()
+
+
+def _iter_lxml(source: str | BinaryIO) -> Iterator[Tuple[str, ElementTree.Element]]:
+    """lxml fires events only for the two opportunity tags, not every leaf."""
+    try:
+        for _event, element in _lxml_etree.iterparse(
+            source, events=("end",), tag=(_SYNOPSIS_TAG, _FORECAST_TAG)
+        ):
+            yield _STATUS_BY_TAG[element.tag], element
+            element.clear(keep_tail=True)
+            # Drop already-processed siblings so the root does not grow.
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+    except _lxml_etree.XMLSyntaxError as exc:
+        raise ElementTree.ParseError(str(exc)) from exc
+
+
+def parser_backend(requested: Optional[str] = None) -> str:
+    """Resolve ``GRANTS_EXTRACT_PARSER`` (``auto``/``lxml``/``stdlib``) to a backend.
+
+    ``auto`` prefers lxml when it is installed; both produce identical records.
+    """
+    choice = (requested or os.getenv("GRANTS_EXTRACT_PARSER") or "auto").strip().lower()
+    if choice not in {"auto", "lxml", "stdlib"}:
+        logger("warning", f"Unknown GRANTS_EXTRACT_PARSER '{choice}'; using 'auto'")
+        choice = "auto"
+    if choice == "stdlib":
+        return "stdlib"
+    if _lxml_etree is None:
+        if choice == "lxml":
+            logger("warning", "lxml is not installed; parsing the extract with the stdlib")
+        return "stdlib"
+    return "lxml"
+
+
+def _iter_opportunities(
+    source: str | BinaryIO,
+    include_forecasted: bool,
+    fingerprints: Optional[FingerprintStore],
+    counts: Dict[str, int],
+    backend: str = "stdlib",
+) -> Iterator[Dict[str, object]]:
+    elements = _iter_lxml(source) if backend == "lxml" else _iter_stdlib(source)
+    for status, element in elements:
+        if status == "Posted":
+            counts["posted"] += 1
+        else:
+            counts["forecasted"] += 1
+            if not include_forecasted:
+                continue
+
+        fields = _collect_fields(element)
+        if fingerprints is not None:
+            key = f"{status}:{_text(fields, 'OpportunityID')}"
+            fingerprint = _fingerprint(fields)
+            if fingerprints.is_unchanged(key, fingerprint):
+                continue
+            fingerprints.stage(key, fingerprint)
+
+        counts["returned"] += 1
+        yield _map_record(fields, status)
+
+
+def extract_workers() -> int:
+    """Parser processes from ``GRANTS_EXTRACT_WORKERS`` (``0``/``auto`` = all cores)."""
+    raw = (os.getenv("GRANTS_EXTRACT_WORKERS") or "").strip().lower()
+    if raw in {"0", "auto"}:
+        return os.cpu_count() or 1
+    return int_env("GRANTS_EXTRACT_WORKERS", 1, minimum=1)
+
+
+def _shard_ranges(path: Path, shards: int) -> Optional[Tuple[bytes, bytes, List[Tuple[int, int]]]]:
+    """Split the document into byte ranges that each start at an opportunity.
+
+    Returns the prologue (XML declaration and root start tag), the epilogue
+    (root end tag) and the ``(start, end)`` ranges between them, or ``None``
+    when the file holds no opportunity elements.
+    """
+    with path.open("rb") as fp, mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        first = _OPEN_TAG_RE.search(data)
+        body_end = data.rfind(_CLOSE_TAG_SUFFIX)
+        if first is None or body_end == -1:
+            return None
+        body_start = first.start()
+        body_end += len(_CLOSE_TAG_SUFFIX)
+
+        step = max(1, (body_end - body_start) // shards)
+        starts = [body_start]
+        for index in range(1, shards):
+            match = _OPEN_TAG_RE.search(data, max(starts[-1] + 1, body_start + index * step), body_end)
+            if match is None:
+                break
+            starts.append(match.start())
+
+        prologue = bytes(data[:body_start])
+        epilogue = bytes(data[body_end:])
+
+    ends = starts[1:] + [body_end]
+    return prologue, epilogue, list(zip(starts, ends))
+
+
+# Committed fingerprints, installed once per worker process by ``_init_worker``.
+_worker_seen: Optional[Dict[str, str]] = None
+
+
+def _init_worker(seen: Optional[Dict[str, str]]) -> None:
+    global _worker_seen
+    _worker_seen = seen
+
+
+def _parse_shard(
+    task: Tuple[str, bytes, bytes, int, int, bool, str],
+) -> Tuple[List[Dict[str, object]], Dict[str, int], Optional[Dict[str, str]], int]:
+    """Process-pool worker: parse one byte range wrapped in the document's root.
+
+    Returns the records, the element counts and, in incremental mode, only
+    the fingerprints staged for this shard plus how many were skipped.
+    """
+    path, prologue, epilogue, start, end, include_forecasted, backend = task
+    with open(path, "rb") as fp:
+        fp.seek(start)
+        body = fp.read(end - start)
+
+    fingerprints = FingerprintStore(Path(path), seen=_worker_seen) if _worker_seen is not None else None
+    counts = {"posted": 0, "forecasted": 0, "returned": 0}
+    source = io.BytesIO(prologue + body + epilogue)
+    records = list(_iter_opportunities(source, include_forecasted, fingerprints, counts, backend))
+    if fingerprints is None:
+        return records, counts, None, 0
+    return records, counts, fingerprints.staged(), fingerprints.unchanged
+
+
+def _iter_parallel(
+    path: Path,
+    include_forecasted: bool,
+    fingerprints: Optional[FingerprintStore],
+    counts: Dict[str, int],
+    workers: int,
+    backend: str,
+) -> Iterator[Dict[str, object]]:
+    shard_count = min(workers * _SHARDS_PER_WORKER, max(1, path.stat().st_size // _MIN_SHARD_BYTES))
+    layout = _shard_ranges(path, shard_count)
+    if layout is None or len(layout[2]) < 2:
+        yield from _iter_opportunities(str(path), include_forecasted, fingerprints, counts, backend)
+        return
+
+    prologue, epilogue, ranges = layout
+    seen = fingerprints.snapshot() if fingerprints is not None else None
+    tasks = iter(
+        (str(path), prologue, epilogue, start, end, include_forecasted, backend)
+        for start, end in ranges
+    )
+    logger("info", f"Parsing {path.name} in {len(ranges)} shards on {workers} workers ({backend})")
+
+    # The committed fingerprints go to each worker once, not with every shard.
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(seen,)) as pool:
+        # At most ``workers + 1`` shards are queued or finished-but-unread, so
+        # a slow consumer (the streaming pipeline) never holds the whole
+        # extract in memory. Results are consumed in document order.
+        in_flight = deque(pool.submit(_parse_shard, task) for task in islice(tasks, workers + 1))
+        while in_flight:
+            records, shard_counts, staged, unchanged = in_flight.popleft().result()
+            next_task = next(tasks, None)
+            if next_task is not None:
+                in_flight.append(pool.submit(_parse_shard, next_task))
+            for name, value in shard_counts.items():
+                counts[name] += value
+            if fingerprints is not None and staged is not None:
+                fingerprints.merge(staged, unchanged)
+            yield from records
+
+
+def iter_extract_xml(
+    file_path: str | Path,
+    include_forecasted: bool = True,
+    fingerprints: Optional[FingerprintStore] = None,
+    workers: Optional[int] = None,
+    backend: Optional[str] = None,
+) -> Iterator[Dict[str, object]]:
+    """Yield pipeline records from an extract XML file in document order.
+
+    ``file_path`` may be the XML itself or the downloaded ``.zip``, in which
+    case the member is decompressed on the fly and never written to disk.
+    ``workers`` > 1 (default from ``GRANTS_EXTRACT_WORKERS``) splits an XML
+    file at opportunity boundaries and maps the shards in a process pool;
+    ZIP input always streams on one core. ``backend`` picks the XML parser
+    (see :func:`parser_backend`). Raises ``ElementTree.ParseError``
+    if the document is malformed; records before the error have already
+    been yielded.
+    """
+    path = Path(file_path)
+    if workers is None:
+        workers = extract_workers()
+    backend = parser_backend(backend)
+    counts = {"posted": 0, "forecasted": 0, "returned": 0}
+    from_zip = path.suffix.lower() == ".zip"
+
+    if workers > 1 and from_zip:
+        logger("info", f"{path.name} is parsed from the ZIP stream on one core")
+    if workers > 1 and not from_zip:
+        yield from _iter_parallel(path, include_forecasted, fingerprints, counts, workers, backend)
+    else:
+        with _open_extract(path) as source:
+            yield from _iter_opportunities(source, include_forecasted, fingerprints, counts, backend)
+
+    skipped = f", {fingerprints.unchanged} unchanged skipped" if fingerprints is not None else ""
+    logger(
+        "info",
+        f"Parsed extract {path.name}: {counts['posted']} posted, {counts['forecasted']} forecasted "
+        f"({counts['returned']} records returned{skipped})",
+    )
 
 
 def process_extract_xml(
     file_path: str | Path,
     include_forecasted: bool = True,
+    fingerprints: Optional[FingerprintStore] = None,
+    workers: Optional[int] = None,
+    backend: Optional[str] = None,
 ) -> List[Dict[str, object]]:
-    """Stream-parse an extract XML file into a list of pipeline records."""
+    """Stream-parse an extract XML file into a list of pipeline records.
+
+    With ``fingerprints`` only opportunities whose ``Version``/``LastUpdatedDate``
+    differ from the stored fingerprint are mapped; their new fingerprints are
+    staged on the store for the caller to ``commit()``.
+    """
     path = Path(file_path)
     if not path.exists():
         logger("error", f"Extract XML not found at {path}")
         return []
 
-    records: List[Dict[str, object]] = []
-    synopsis_count = 0
-    forecast_count = 0
-
     try:
-        for _event, element in ElementTree.iterparse(str(path), events=("end",)):
-            if element.tag == _SYNOPSIS_TAG:
-                records.append(_map_record(element, "Posted"))
-                synopsis_count += 1
-                element.clear()
-            elif element.tag == _FORECAST_TAG:
-                if include_forecasted:
-                    records.append(_map_record(element, "Forecasted"))
-                forecast_count += 1
-                element.clear()
-    except ElementTree.ParseError as exc:
+        return list(iter_extract_xml(path, include_forecasted, fingerprints, workers, backend))
+    except (ElementTree.ParseError, zipfile.BadZipFile) as exc:
         logger("error", f"Failed to parse extract XML at {path}: {exc}")
         return []
 
-    logger(
-        "info",
-        f"Parsed extract {path.name}: {synopsis_count} posted, {forecast_count} forecasted "
-        f"({len(records)} records returned)",
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """``python -m grants_data.parse_extract FILE [--workers N]``: parse and report."""
+    parser = argparse.ArgumentParser(description="Parse a Grants.gov XML extract.")
+    parser.add_argument("file", type=Path)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="parser processes (default: GRANTS_EXTRACT_WORKERS, 0 = all cores)",
     )
-    return records
+    parser.add_argument("--no-forecasted", action="store_true", help="skip forecast elements")
+    parser.add_argument(
+        "--parser",
+        choices=("auto", "lxml", "stdlib"),
+        default=None,
+        help="XML backend (default: GRANTS_EXTRACT_PARSER, else auto)",
+    )
+    args = parser.parse_args(argv)
+
+    workers = args.workers if args.workers is not None else extract_workers()
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    started = time.perf_counter()
+    backend = parser_backend(args.parser)
+    records = process_extract_xml(args.file, not args.no_forecasted, workers=workers, backend=backend)
+    elapsed = time.perf_counter() - started
+    print(f"{len(records)} records in {elapsed:.2f}s with {workers} worker(s) ({backend})")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,33 +3,42 @@ from __future__ import annotations
 
 import csv
 import os
+import zipfile
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from xml.etree import ElementTree
 
 from grants.data.loader import load_grants_from_records
+from grants.sql_utils import get_keyword_profiles
 
-from grants_data.date_filter_data import date_filter_json_data
-from grants_data.download_extract import gen_extract
+from grants_data.columnar import ColumnarRecords
+from grants_data.date_filter_data import date_filter_json_data, iter_date_filter_json_data, lookback_cutoff
+from grants_data.dates import record_date
+from grants_data.download_extract import gen_extract, mark_extract_processed
 from grants_data.download_json import gen_grants
-from grants_data.filter_with_forecast import filter_forecasted_data
+from grants_data.extract_state import FingerprintStore, load_fingerprint_store
+from grants_data.external_sort import ExternalSorter
+from grants_data.filter_with_forecast import filter_forecasted_data, iter_filter_forecasted_data
 from grants_data.get_file_path import get_latest_file_path
-from grants_data.get_json_data import process_json_data
-from grants_data.normalize import normalize_records
-from grants_data.parse_extract import process_extract_xml
+from grants_data.get_json_data import ExportReadError, iter_json_data, process_json_data
+from grants_data.normalize import iter_normalize_records, normalize_records
+from grants_data.parse_extract import iter_extract_xml
 from grants_data.retention import keep_limit, prune_old_files
-from grants_data.keyword_filter_data import filter_grants_by_keywords
-from llm_utils.gpt_summarizer import description_summarizer
+from grants_data.snapshot import GrantSnapshot, iter_with_snapshot, latest_snapshot_path, snapshot_enabled
+from grants_data.keyword_filter_data import (
+    KeywordProfiles,
+    filter_grants_by_keywords,
+    iter_filter_grants_by_keywords,
+)
+from llm_utils.gpt_summarizer import description_summarizer, iter_description_summarizer
 from llm_utils.keywords_gen import keyword_extractor
 from logs.status_logger import logger
 
 _CSV_DIR = Path(__file__).resolve().parent / "grants_csv_data"
-_DATE_FORMATS = [
-    "%Y-%m-%d",
-    "%m/%d/%Y",
-    "%Y-%m-%dT%H:%M:%S",
-    "%Y-%m-%dT%H:%M:%SZ",
-]
+
+# Raised part-way through a streamed source; the run fails without loading.
+_SOURCE_ERRORS = (ElementTree.ParseError, zipfile.BadZipFile, ExportReadError)
 
 
 def _ensure_csv_dir() -> Path:
@@ -45,7 +54,7 @@ def _serialise_value(value: object) -> str:
     return str(value)
 
 
-def _write_csv(records: List[Dict[str, object]]) -> Path:
+def _write_csv(records: Iterable[Dict[str, object]]) -> Path:
     destination_dir = _ensure_csv_dir()
     timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
     destination = destination_dir / f"grants_{timestamp}.csv"
@@ -77,36 +86,108 @@ def _write_csv(records: List[Dict[str, object]]) -> Path:
     return destination
 
 
-def _parse_sort_date(value: object) -> datetime:
-    if value in (None, ""):
-        return datetime.min
-    text = str(value)
-    for fmt in _DATE_FORMATS:
-        try:
-            return datetime.strptime(text, fmt)
-        except ValueError:
-            continue
-    return datetime.min
+def _sort_key(record: Dict[str, object]) -> Tuple[datetime, str]:
+    return record_date(record, "POSTED_DATE") or datetime.min, str(record.get("OPPORTUNITY_NUMBER", ""))
 
 
-def _sort_key(record: Dict[str, object]) -> Tuple[datetime, str]:
-    return _parse_sort_date(record.get("POSTED_DATE")), str(record.get("OPPORTUNITY_NUMBER", ""))
+def _env_flag(name: str) -> bool:
+    raw = os.getenv(name)
+    if raw is None:
+        return False
+    return raw.strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _streaming_enabled() -> bool:
+    return _env_flag("GRANTS_PIPELINE_STREAMING")
+
+
+def _columnar_enabled() -> bool:
+    return _env_flag("GRANTS_PIPELINE_COLUMNAR")
+
+
+def _data_source() -> str:
+    return os.getenv("GRANTS_DATA_SOURCE", "export").strip().lower()
+
+
+def _keyword_profiles() -> KeywordProfiles:
+    """Subscriber keyword profiles, unless ``GRANTS_KEYWORD_PROFILES`` is off."""
+    raw = os.getenv("GRANTS_KEYWORD_PROFILES")
+    if raw is not None and raw.strip().lower() in {"0", "false", "no", "off"}:
+        return {}
+    try:
+        profiles = get_keyword_profiles()
+    except Exception as exc:
+        logger("warning", f"Could not load subscriber keyword profiles: {exc}")
+        return {}
+    logger("info", f"Loaded {len(profiles)} subscriber keyword profiles")
+    return profiles
+
+
+def _source_unchanged(fingerprints: Optional[FingerprintStore]) -> bool:
+    """True when an empty source means "nothing new" rather than a failure."""
+    if _data_source() == "extract" and getattr(gen_extract, "unchanged", False):
+        return True
+    return fingerprints is not None and fingerprints.unchanged > 0
 
 
-def _load_source_records() -> List[Dict[str, object]]:
+def _load_source_records(
+    fingerprints: Optional[FingerprintStore] = None,
+    streaming: bool = False,
+) -> Iterable[Dict[str, object]]:
     """Fetch raw records from the configured source.
 
     ``GRANTS_DATA_SOURCE=extract`` downloads and parses the full daily XML
     database extract (every opportunity, no row cap); the default ``export``
-    keeps the existing search_export JSON flow.
+    keeps the existing search_export JSON flow, and ``snapshot`` re-reads the
+    newest local snapshot without downloading anything. ``fingerprints``
+    limits the extract to opportunities changed since the last committed run.
+    With ``streaming`` either source is returned as a lazy generator. With
+    ``GRANTS_SNAPSHOT`` on, downloaded records are also written to a snapshot.
     """
-    source = os.getenv("GRANTS_DATA_SOURCE", "export").strip().lower()
+    source = _data_source()
+    if source == "snapshot":
+        return _snapshot_records(streaming)
+
+    records = _fetch_source_records(source, fingerprints, streaming)
+    if not snapshot_enabled():
+        return records
+    snapshotted = iter_with_snapshot(records)
+    return snapshotted if streaming else list(snapshotted)
+
+
+def _snapshot_records(streaming: bool) -> Iterable[Dict[str, object]]:
+    path = latest_snapshot_path()
+    if path is None:
+        logger("error", "GRANTS_DATA_SOURCE=snapshot but no snapshot has been written yet.")
+        return []
+    logger("info", f"Reading records from snapshot {path}")
+    snapshot = GrantSnapshot(path)
+    if streaming:
+        return _closing_iter(snapshot)
+    with snapshot:
+        return list(snapshot)
+
+
+def _closing_iter(snapshot: GrantSnapshot) -> Iterator[Dict[str, object]]:
+    with snapshot:
+        yield from snapshot
 
+
+def _fetch_source_records(
+    source: str,
+    fingerprints: Optional[FingerprintStore],
+    streaming: bool,
+) -> Iterable[Dict[str, object]]:
     if source == "extract":
         if not gen_extract():
             logger("error", "Failed to download the XML database extract.")
             return []
-        return process_extract_xml(gen_extract.last_extract_path)
+        if gen_extract.unchanged:
+            return []
+        # Parse errors propagate in both modes: with fingerprints, a partly
+        # read extract would otherwise look like "nothing changed".
+        records = iter_extract_xml(gen_extract.last_extract_path, fingerprints=fingerprints)
+        return records if streaming else list(records)
 
     if source != "export":
         logger("warning", f"Unknown GRANTS_DATA_SOURCE '{source}'; falling back to 'export'")
@@ -125,36 +206,240 @@ def _load_source_records() -> List[Dict[str, object]]:
         logger("error", "No latest file path found.")
         return []
 
+    if streaming:
+        return iter_json_data(latest_file_path)
     return process_json_data(latest_file_path)
 
 
-def onlyTheGoodStuff() -> Tuple[bool, List[Dict[str, object]]]:
-    whole_json_data = normalize_records(_load_source_records())
+def _commit_run(fingerprints: Optional[FingerprintStore]) -> None:
+    """Persist incremental state once a run's records are safely processed."""
+    if _data_source() == "extract":
+        mark_extract_processed()
+    if fingerprints is None:
+        return
+    try:
+        fingerprints.commit()
+    except OSError as exc:
+        logger("warning", f"Could not save extract fingerprints: {exc}")
+
+
+def _counted(records: Iterable[Dict[str, object]], tally: List[int]) -> Iterator[Dict[str, object]]:
+    for record in records:
+        tally[0] += 1
+        yield record
+
+
+RunResult = Tuple[bool, Sequence[Dict[str, object]]]
+
+
+def _no_results(success: bool, fingerprints: Optional[FingerprintStore] = None, commit: bool = False) -> RunResult:
+    """End a run that has nothing to write or load.
+
+    ``commit`` marks the source as processed, for runs where every record
+    was legitimately filtered out.
+    """
+    if commit:
+        _commit_run(fingerprints)
+    onlyTheGoodStuff.last_csv_path = None  # type: ignore[attr-defined]
+    return success, []
+
+
+def _empty_source(fingerprints: Optional[FingerprintStore]) -> RunResult:
+    if _source_unchanged(fingerprints):
+        logger("info", "No opportunities changed since the last run.")
+        return _no_results(True)
+    logger("error", "Failed to process JSON data.")
+    return _no_results(False)
+
+
+def _extract_keywords() -> Optional[Tuple[Sequence[str], int, bool]]:
+    keywords, threshold, forecast = keyword_extractor()
+    if keywords is None or len(keywords) == 0:
+        logger("error", "Failed to extract keywords.")
+        return None
+    return keywords, threshold, forecast
+
+
+def _split_profile_only(
+    records: Iterable[Dict[str, object]],
+) -> Tuple[List[Dict[str, object]], List[Dict[str, object]]]:
+    """Separate grants kept only by a subscriber keyword profile from the rest."""
+    shared: List[Dict[str, object]] = []
+    profile_only: List[Dict[str, object]] = []
+    for record in records:
+        (profile_only if record.get("PROFILE_ONLY") else shared).append(record)
+    return shared, profile_only
+
+
+def _finish_run(
+    fingerprints: Optional[FingerprintStore],
+    final_records: Sequence[Dict[str, object]],
+    length_initial: int,
+    profile_records: Sequence[Dict[str, object]] = (),
+) -> RunResult:
+    """Write the CSV, load the database and commit; shared by every runner.
+
+    ``final_records`` is the sorted, summarized output. It is iterated twice
+    (CSV, then database), so it must be a sequence, not a generator.
+    ``profile_records`` (``PROFILE_ONLY`` grants) only queue alerts for the
+    subscribers whose keyword profile matched them; they are not written to
+    the CSV, the grants table or the returned records.
+    """
+    if len(final_records) == 0 and not profile_records:
+        logger("warning", "No data found after filtering.")
+        return _no_results(True, fingerprints, commit=True)
+    if profile_records:
+        logger("info", f"{len(profile_records)} grants matched only subscriber keyword profiles")
+
+    csv_path = _write_csv(final_records) if len(final_records) else None
+
+    try:
+        inserted = load_grants_from_records(final_records, profile_records=profile_records)
+        logger("info", f"Database insert complete (rows affected: {inserted})")
+        _commit_run(fingerprints)
+    except Exception as exc:
+        logger("error", f"Failed to load data into the database: {exc}")
+
+    final_length = len(final_records)
+    retained_pct = (final_length / length_initial) * 100 if length_initial else 0
+    logger("info", f"Initial by final length: {length_initial} / {final_length}")
+    logger("info", f"Percentage of data retained: {round(retained_pct, 2)}%")
+
+    onlyTheGoodStuff.last_csv_path = csv_path  # type: ignore[attr-defined]
+    return True, final_records
+
+
+def _run_streaming(fingerprints: Optional[FingerprintStore]) -> RunResult:
+    """Generator-chained variant of :func:`onlyTheGoodStuff`.
+
+    Every stage pulls one record at a time from the previous one; only the
+    final sort buffers, and it spills sorted runs to disk past
+    ``GRANTS_SORT_CHUNK_SIZE`` records. The CSV writer and the database
+    loader each iterate the merged sort output, the loader in batches.
+    """
+    extracted = _extract_keywords()
+    if extracted is None:
+        return _no_results(False)
+    keywords, threshold, forecast = extracted
+
+    source_tally = [0]
+    stream: Iterable[Dict[str, object]] = _counted(
+        _load_source_records(fingerprints, streaming=True), source_tally
+    )
+    stream = iter_date_filter_json_data(iter_normalize_records(stream))
+    if not forecast:
+        logger("info", "Forecast is set to False. Filtering grants with OPPORTUNITY_STATUS = 'Forecasted'")
+        stream = iter_filter_forecasted_data(stream)
+    stream = iter_filter_grants_by_keywords(
+        stream, "FUNDING_DESCRIPTION", keywords, threshold, _keyword_profiles()
+    )
+    stream = iter_description_summarizer(stream)
+
+    final_records = ExternalSorter(key=_sort_key, reverse=True)
+    profile_records: List[Dict[str, object]] = []
+    try:
+        for record in stream:
+            if record.get("PROFILE_ONLY"):
+                profile_records.append(record)
+            else:
+                final_records.add(record)
+    except _SOURCE_ERRORS as exc:
+        logger("error", f"Failed to read source records: {exc}")
+        return _no_results(False)
+
+    if source_tally[0] == 0:
+        return _empty_source(fingerprints)
+    if len(final_records):
+        logger("info", f"Sorted {len(final_records)} records ({final_records.spilled_runs} spilled runs)")
+    return _finish_run(fingerprints, final_records, source_tally[0], profile_records)
+
+
+def _run_columnar(fingerprints: Optional[FingerprintStore]) -> RunResult:
+    """Variant of :func:`onlyTheGoodStuff` that filters a :class:`ColumnarRecords` store.
+
+    The normalized extract is held column-wise; the date filter, forecast
+    filter and sort only narrow and reorder a row selection, and dicts are
+    rebuilt just for the surviving rows as they enter keyword filtering.
+    Keyword filtering and summarizing keep order, so the output is already
+    sorted.
+    """
+    try:
+        store = ColumnarRecords.from_records(
+            iter_normalize_records(_load_source_records(fingerprints, streaming=True))
+        )
+    except _SOURCE_ERRORS as exc:
+        logger("error", f"Failed to read source records: {exc}")
+        return _no_results(False)
+
+    length_initial = len(store)
+    if length_initial == 0:
+        return _empty_source(fingerprints)
+
+    cutoff, lookback_days = lookback_cutoff()
+    selection = store.filter_posted_since(cutoff)
+    logger(
+        "info",
+        f"Filtered grants by date: kept {len(selection)} of {length_initial} within {lookback_days} days"
+    )
+    if len(selection) == 0:
+        logger("warning", "No data found after date filtering.")
+        return _no_results(True, fingerprints, commit=True)
+
+    extracted = _extract_keywords()
+    if extracted is None:
+        return _no_results(False)
+    keywords, threshold, forecast = extracted
+
+    if not forecast:
+        logger("info", "Forecast is set to False. Filtering grants with OPPORTUNITY_STATUS = 'Forecasted'")
+        selection = selection.without_forecasted()
+        if len(selection) == 0:
+            logger("info", "No data found after status filtering.")
+            return _no_results(True, fingerprints, commit=True)
+    else:
+        logger("info", "Forecast is set to True. Keeping all data.")
+
+    stream = iter_filter_grants_by_keywords(
+        selection.sorted_by_posted(), "FUNDING_DESCRIPTION", keywords, threshold, _keyword_profiles()
+    )
+    final_records, profile_records = _split_profile_only(iter_description_summarizer(stream))
+    if final_records:
+        logger("info", f"Filtered keyword length: {len(final_records)}")
+    return _finish_run(fingerprints, final_records, length_initial, profile_records)
+
+
+def onlyTheGoodStuff() -> RunResult:
+    fingerprints = load_fingerprint_store()
+    if _streaming_enabled():
+        return _run_streaming(fingerprints)
+    if _columnar_enabled():
+        return _run_columnar(fingerprints)
+
+    try:
+        whole_json_data = normalize_records(_load_source_records(fingerprints))
+    except _SOURCE_ERRORS as exc:
+        logger("error", f"Failed to read source records: {exc}")
+        return _no_results(False)
     length_initial = len(whole_json_data)
     if length_initial == 0:
-        logger("error", "Failed to process JSON data.")
-        onlyTheGoodStuff.last_csv_path = None  # type: ignore[attr-defined]
-        return False, []
+        return _empty_source(fingerprints)
 
     date_sorted_data = date_filter_json_data(whole_json_data)
     if len(date_sorted_data) == 0:
         logger("warning", "No data found after date filtering.")
-        onlyTheGoodStuff.last_csv_path = None  # type: ignore[attr-defined]
-        return True, []
+        return _no_results(True, fingerprints, commit=True)
 
-    keywords, threshold, forecast = keyword_extractor()
-    if keywords is None or len(keywords) == 0:
-        logger("error", "Failed to extract keywords.")
-        onlyTheGoodStuff.last_csv_path = None  # type: ignore[attr-defined]
-        return False, []
+    extracted = _extract_keywords()
+    if extracted is None:
+        return _no_results(False)
+    keywords, threshold, forecast = extracted
 
     if not forecast:
         logger("info", "Forecast is set to False. Filtering grants with OPPORTUNITY_STATUS = 'Forecasted'")
         status_sorted_data = filter_forecasted_data(date_sorted_data)
         if len(status_sorted_data) == 0:
             logger("info", "No data found after status filtering.")
-            onlyTheGoodStuff.last_csv_path = None  # type: ignore[attr-defined]
-            return True, []
+            return _no_results(True, fingerprints, commit=True)
     else:
         logger("info", "Forecast is set to True. Keeping all data.")
         status_sorted_data = date_sorted_data
@@ -164,38 +449,22 @@ def onlyTheGoodStuff() -> Tuple[bool, List[Dict[str, object]]]:
         "FUNDING_DESCRIPTION",
         keywords,
         threshold,
+        _keyword_profiles(),
     )
     if len(keyword_json_data) == 0:
         logger("warning", "No data found after keyword filtering.")
-        onlyTheGoodStuff.last_csv_path = None  # type: ignore[attr-defined]
-        return True, []
+        return _no_results(True, fingerprints, commit=True)
     logger("info", f"Filtered keyword length: {len(keyword_json_data)}")
 
     summarized_json_data = description_summarizer(keyword_json_data)
     if summarized_json_data is None or len(summarized_json_data) == 0:
         logger("error", "Failed to summarize descriptions.")
-        onlyTheGoodStuff.last_csv_path = None  # type: ignore[attr-defined]
-        return False, []
+        return _no_results(False)
 
-    final_json_data = list(summarized_json_data)
-    final_json_data.sort(key=_sort_key, reverse=True)
+    final_records, profile_records = _split_profile_only(summarized_json_data)
+    final_records.sort(key=_sort_key, reverse=True)
     logger("info", "Sorted JSON data")
-
-    csv_path = _write_csv(final_json_data)
-
-    try:
-        inserted = load_grants_from_records(final_json_data)
-        logger("info", f"Database insert complete (rows affected: {inserted})")
-    except Exception as exc:
-        logger("error", f"Failed to load data into the database: {exc}")
-
-    final_length = len(final_json_data)
-    retained_pct = (final_length / length_initial) * 100 if length_initial else 0
-    logger("info", f"Initial by final length: {length_initial} / {final_length}")
-    logger("info", f"Percentage of data retained: {round(retained_pct, 2)}%")
-
-    onlyTheGoodStuff.last_csv_path = csv_path  # type: ignore[attr-defined]
-    return True, final_json_data
+    return _finish_run(fingerprints, final_records, length_initial, profile_records)
 
 
 onlyTheGoodStuff.last_csv_path = None  # type: ignore[attr-defined]
@@ -0,0 +1,330 @@
+"""Memory-mapped local snapshots of parsed grant records.
+
+A snapshot is one file holding every record of a source (export JSON or XML
+extract) plus sorted lookup indexes on ``OPPORTUNITY_ID`` and
+``OPPORTUNITY_NUMBER``. Opening one only maps the file and reads a 40-byte
+header; a lookup is a binary search over the mapped index and decodes just
+the matching record, so single opportunities can be inspected without
+parsing a 300 MB extract.
+
+Layout (all integers little-endian)::
+
+    header    magic, record count, offsets_pos, id_index_pos, number_index_pos
+    records   one compact JSON object per record, back to back
+    offsets   count + 1 uint64 byte offsets; record i is offsets[i]:offsets[i+1]
+    index     entry count, then (key_pos uint64, key_len uint32, record uint32)
+              entries sorted by key bytes, then the key bytes themselves
+
+``GRANTS_SNAPSHOT=true`` makes the pipeline write one per run and
+``GRANTS_DATA_SOURCE=snapshot`` re-runs it from the newest one.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import time
+from bisect import bisect_left
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from grants_data.dates import PARSED_DATES_KEY
+from grants_data.grant_record import GrantRecord
+from grants_data.retention import keep_limit, prune_old_files
+from logs.status_logger import logger
+
+_SNAPSHOT_DIR = Path(__file__).resolve().parent / "grants_snapshot_data"
+_SUFFIX = ".gwsnap"
+
+_MAGIC = b"GWSNAP01"
+_HEADER = struct.Struct("<8sQQQQ")
+_OFFSET = struct.Struct("<Q")
+_ENTRY = struct.Struct("<QII")
+
+INDEXED_FIELDS = ("OPPORTUNITY_ID", "OPPORTUNITY_NUMBER")
+
+
+def snapshot_enabled() -> bool:
+    raw = os.getenv("GRANTS_SNAPSHOT")
+    if raw is None:
+        return False
+    return raw.strip().lower() in {"1", "true", "yes", "on"}
+
+
+def latest_snapshot_path() -> Optional[Path]:
+    if not _SNAPSHOT_DIR.exists():
+        return None
+    candidates = sorted(
+        _SNAPSHOT_DIR.glob(f"grants_*{_SUFFIX}"), key=lambda path: path.stat().st_mtime, reverse=True
+    )
+    return candidates[0] if candidates else None
+
+
+def _new_snapshot_path() -> Path:
+    _SNAPSHOT_DIR.mkdir(parents=True, exist_ok=True)
+    timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    return _SNAPSHOT_DIR / f"grants_{timestamp}{_SUFFIX}"
+
+
+def _encode(record: Dict[str, object]) -> bytes:
+    if isinstance(record, GrantRecord):
+        items = dict(record.stored_items())
+    else:
+        items = {key: value for key, value in record.items() if key != PARSED_DATES_KEY}
+    return json.dumps(items, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def _index_key(value: object) -> Optional[bytes]:
+    if value in (None, ""):
+        return None
+    return str(value).encode("utf-8")
+
+
+class SnapshotWriter:
+    """Append records to a new snapshot; :meth:`close` writes the indexes.
+
+    The file is built under a ``.tmp`` name and renamed into place only once
+    complete, so readers never see a partial snapshot.
+    """
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self.path = Path(path) if path is not None else _new_snapshot_path()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        self._fp = self._tmp_path.open("wb")
+        self._fp.write(_HEADER.pack(_MAGIC, 0, 0, 0, 0))
+        self._offsets: List[int] = [_HEADER.size]
+        self._keys: Dict[str, List[Tuple[bytes, int]]] = {field: [] for field in INDEXED_FIELDS}
+
+    def __enter__(self) -> "SnapshotWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def add(self, record: Dict[str, object]) -> None:
+        index = len(self)
+        self._fp.write(_encode(record))
+        self._offsets.append(self._fp.tell())
+        for field, keys in self._keys.items():
+            key = _index_key(record.get(field))
+            if key is not None:
+                keys.append((key, index))
+
+    def _write_index(self, keys: List[Tuple[bytes, int]]) -> int:
+        position = self._fp.tell()
+        keys.sort()
+        key_pos = position + _OFFSET.size + _ENTRY.size * len(keys)
+        self._fp.write(_OFFSET.pack(len(keys)))
+        for key, index in keys:
+            self._fp.write(_ENTRY.pack(key_pos, len(key), index))
+            key_pos += len(key)
+        for key, _index in keys:
+            self._fp.write(key)
+        return position
+
+    def close(self) -> Path:
+        if self._fp.closed:
+            return self.path
+        offsets_pos = self._fp.tell()
+        self._fp.write(struct.pack(f"<{len(self._offsets)}Q", *self._offsets))
+        id_pos = self._write_index(self._keys["OPPORTUNITY_ID"])
+        number_pos = self._write_index(self._keys["OPPORTUNITY_NUMBER"])
+        self._fp.seek(0)
+        self._fp.write(_HEADER.pack(_MAGIC, len(self), offsets_pos, id_pos, number_pos))
+        self._fp.close()
+        os.replace(self._tmp_path, self.path)
+        logger("info", f"Wrote snapshot of {len(self)} records to {self.path}")
+        return self.path
+
+    def abort(self) -> None:
+        if not self._fp.closed:
+            self._fp.close()
+        self._tmp_path.unlink(missing_ok=True)
+
+
+def _prune(written: Path, path: Optional[Path]) -> None:
+    if path is None:
+        prune_old_files(written.parent, f"grants_*{_SUFFIX}", keep_limit())
+
+
+def write_snapshot(records: Iterable[Dict[str, object]], path: Optional[Path] = None) -> Path:
+    """Snapshot ``records`` to ``path`` (default: a new file in the snapshot directory)."""
+    with SnapshotWriter(path) as writer:
+        for record in records:
+            writer.add(record)
+    _prune(writer.path, path)
+    return writer.path
+
+
+def iter_with_snapshot(
+    records: Iterable[Dict[str, object]], path: Optional[Path] = None
+) -> Iterator[Dict[str, object]]:
+    """Pass ``records`` through unchanged, snapshotting them once fully consumed.
+
+    A source that fails part-way, is not exhausted or is empty leaves no
+    snapshot behind.
+    """
+    writer = SnapshotWriter(path)
+    try:
+        for record in records:
+            writer.add(record)
+            yield record
+    except BaseException:
+        writer.abort()
+        raise
+    if len(writer) == 0:
+        writer.abort()
+        return
+    writer.close()
+    _prune(writer.path, path)
+
+
+class _IndexKeys:
+    """Sequence view of one index's sorted keys, read straight from the map."""
+
+    def __init__(self, buffer: mmap.mmap, position: int) -> None:
+        self._buffer = buffer
+        self._entries = position + _OFFSET.size
+        (self._count,) = _OFFSET.unpack_from(buffer, position)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def entry(self, position: int) -> Tuple[int, int, int]:
+        return _ENTRY.unpack_from(self._buffer, self._entries + position * _ENTRY.size)
+
+    def __getitem__(self, position: int) -> bytes:
+        key_pos, key_len, _index = self.entry(position)
+        return self._buffer[key_pos:key_pos + key_len]
+
+
+class GrantSnapshot:
+    """Read-only, memory-mapped snapshot with lookups by opportunity id/number."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        with self.path.open("rb") as fp:
+            self._buffer = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._buffer) < _HEADER.size:
+            self._buffer.close()
+            raise ValueError(f"{self.path} is not a grants snapshot")
+        magic, self._count, self._offsets_pos, id_pos, number_pos = _HEADER.unpack_from(self._buffer)
+        if magic != _MAGIC:
+            self._buffer.close()
+            raise ValueError(f"{self.path} is not a grants snapshot")
+        self._indexes = {
+            "OPPORTUNITY_ID": _IndexKeys(self._buffer, id_pos),
+            "OPPORTUNITY_NUMBER": _IndexKeys(self._buffer, number_pos),
+        }
+
+    def __enter__(self) -> "GrantSnapshot":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._buffer.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _span(self, index: int) -> Tuple[int, int]:
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        return struct.unpack_from("<2Q", self._buffer, self._offsets_pos + index * _OFFSET.size)
+
+    def raw(self, index: int) -> memoryview:
+        """Zero-copy view of record ``index``'s encoded JSON."""
+        start, end = self._span(index)
+        return memoryview(self._buffer)[start:end]
+
+    def record(self, index: int) -> GrantRecord:
+        start, end = self._span(index)
+        return GrantRecord(json.loads(self._buffer[start:end]))
+
+    def __iter__(self) -> Iterator[GrantRecord]:
+        for index in range(self._count):
+            yield self.record(index)
+
+    def find(self, value: object, field: Optional[str] = None) -> List[GrantRecord]:
+        """Records whose ``field`` equals ``value``, in file order.
+
+        Without ``field`` both OPPORTUNITY_ID and OPPORTUNITY_NUMBER are tried.
+        """
+        key = _index_key(value)
+        if key is None:
+            return []
+        matches: List[int] = []
+        for name in (field,) if field else INDEXED_FIELDS:
+            keys = self._indexes[name]
+            position = bisect_left(keys, key)
+            while position < len(keys) and keys[position] == key:
+                matches.append(keys.entry(position)[2])
+                position += 1
+            if matches:
+                break
+        return [self.record(index) for index in sorted(matches)]
+
+    def get(self, value: object, field: Optional[str] = None) -> Optional[GrantRecord]:
+        found = self.find(value, field)
+        return found[0] if found else None
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """``python -m grants_data.snapshot``: build, inspect and query snapshots."""
+    parser = argparse.ArgumentParser(description="Build or query a local grants snapshot.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="snapshot a stored export (.json/.jsonl[.gz]) or extract XML/ZIP")
+    build.add_argument("source", type=Path)
+    build.add_argument("--output", type=Path, default=None)
+    get = sub.add_parser("get", help="print records by opportunity id or number")
+    get.add_argument("key")
+    get.add_argument("--field", choices=INDEXED_FIELDS, default=None)
+    info = sub.add_parser("info", help="record count and open time")
+    for command in (get, info):
+        command.add_argument("--snapshot", type=Path, default=None, help="default: newest snapshot")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        if any(suffix.lower().startswith(".json") for suffix in args.source.suffixes):
+            from grants_data.get_json_data import process_json_data
+
+            records: Iterable[Dict[str, object]] = process_json_data(args.source)
+        else:
+            from grants_data.parse_extract import iter_extract_xml
+
+            records = iter_extract_xml(args.source)
+        started = time.perf_counter()
+        path = write_snapshot(records, args.output)
+        print(f"{path} written in {time.perf_counter() - started:.2f}s")
+        return
+
+    path = args.snapshot or latest_snapshot_path()
+    if path is None:
+        parser.error("no snapshot found; pass --snapshot or build one first")
+    started = time.perf_counter()
+    with GrantSnapshot(path) as snapshot:
+        opened = time.perf_counter() - started
+        if args.command == "info":
+            print(f"{path}: {len(snapshot)} records, opened in {opened * 1000:.2f} ms")
+            return
+        found = snapshot.find(args.key, args.field)
+        for record in found:
+            print(json.dumps(record.as_dict(), ensure_ascii=False, indent=2, default=str))
+        if not found:
+            raise SystemExit(f"{args.key} not found in {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 """Fallback summariser for grant descriptions."""
 from __future__ import annotations
 
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator, List
 
 from grants_data.normalize import strip_html
 from logs.status_logger import logger
@@ -16,19 +16,23 @@ def _summarise_text(text: str) -> str:
     return f"{cleaned[:_MAX_SUMMARY_LENGTH].rstrip()}..."
 
 
+def iter_description_summarizer(records: Iterable[Dict[str, object]]) -> Iterator[Dict[str, object]]:
+    """Streaming form of :func:`description_summarizer`."""
+    count = 0
+    for record in records:
+        description = str(record.get("FUNDING_DESCRIPTION", ""))
+        enriched = dict(record)
+        enriched["SUMMARY"] = _summarise_text(description)
+        count += 1
+        yield enriched
+
+    logger("info", f"Generated summaries for {count} records")
+
+
 def description_summarizer(records: List[Dict[str, object]]) -> List[Dict[str, object]]:
     """Attach a short summary to each grant record."""
     if records is None:
         logger("error", "No records provided for summarisation")
         return []
 
-    summarised = []
-    for record in records:
-        description = str(record.get("FUNDING_DESCRIPTION", ""))
-        summary = _summarise_text(description)
-        enriched = dict(record)
-        enriched["SUMMARY"] = summary
-        summarised.append(enriched)
-
-    logger("info", f"Generated summaries for {len(summarised)} records")
-    return summarised
+    return list(iter_description_summarizer(records))
@@ -1,10 +1,13 @@
 """Entry point for the GrantWatch data pipeline."""
 from __future__ import annotations
 
+import os
+
 from dotenv import load_dotenv
 
 load_dotenv()
 
+from grants.data.outbox import dispatch_outbox
 from grants_data.pipeline import onlyTheGoodStuff
 from notifications.gmail_notifier import notify_grant_release
 from grants.sql_utils import ensure_schema, fetch_upcoming
@@ -25,6 +28,17 @@ def _print_upcoming(stage: str, days: int) -> None:
         print(f"{row['title']} | Due: {row['close_date']}")
 
 
+def _drain_outbox() -> None:
+    # Deployments running ``python -m grants.data.outbox`` on their own
+    # schedule set NOTIFY_OUTBOX_DISPATCH=false.
+    if os.getenv("NOTIFY_OUTBOX_DISPATCH", "true").strip().lower() not in {"1", "true", "yes", "on"}:
+        return
+    try:
+        dispatch_outbox()
+    except Exception as exc:
+        print(f"Failed to send queued subscriber alerts: {exc}")
+
+
 def main() -> None:
     try:
         ensure_schema()
@@ -32,6 +46,7 @@ def main() -> None:
         print(f"Warning: could not verify database schema: {exc}")
 
     success, filtered_grants = onlyTheGoodStuff()
+    _drain_outbox()
     if not success:
         print("Pipeline failed; check logs for details.")
         return
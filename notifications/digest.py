@@ -0,0 +1,259 @@
+"""Build per-subscriber grant digests."""
+from __future__ import annotations
+
+import html
+import os
+from datetime import datetime
+from pathlib import Path
+from string import Template
+from typing import Any, Dict, FrozenSet, Hashable, Iterable, List, Mapping, Tuple
+
+from notifications.transport import OutgoingEmail
+from logs.status_logger import logger
+
+# email -> {"fields": set of labels, "grants": opp_id -> grant entry,
+#           optionally "key": the followed field keys when the payload is shared}
+Payloads = Dict[str, Dict[str, Any]]
+
+
+def format_date(value: datetime | None) -> str:
+    if not value:
+        return "N/A"
+    return value.strftime("%b %d, %Y")
+
+
+def grant_entry(grant_map: Dict[str, Dict[str, Any]], grant: Mapping[str, Any]) -> Dict[str, Any]:
+    return grant_map.setdefault(
+        grant["opp_id"],
+        {
+            "opp_id": grant["opp_id"],
+            "title": grant["title"],
+            "stage": grant.get("stage"),
+            "close_date": grant.get("close_date"),
+            "post_date": grant.get("post_date"),
+            "url": grant.get("url"),
+            "agency": grant.get("agency"),
+            "matched_fields": set(),
+        },
+    )
+
+
+def collect_payloads(
+    field_grants: Mapping[str, List[Dict[str, Any]]],
+    field_labels: Mapping[str, str],
+    subscribers_map: Mapping[str, Iterable[str]],
+    profile_grants: Mapping[str, List[Tuple[Dict[str, Any], List[str]]]] | None = None,
+) -> Payloads:
+    """Group new grants by recipient, recording why each grant matched.
+
+    Subscribers following the same set of fields share one payload (tagged
+    with that set under ``"key"``), so the grants are grouped once per
+    distinct subscription rather than once per subscriber. Treat payloads as
+    read-only.
+    """
+    followed: Dict[str, set] = {}
+    for field_key in field_grants:
+        for email in subscribers_map.get(field_key) or ():
+            followed.setdefault(email, set()).add(field_key)
+
+    shared: Dict[FrozenSet[str], Dict[str, Any]] = {}
+    payloads: Payloads = {}
+    for email, keys in followed.items():
+        key = frozenset(keys)
+        payload = shared.get(key)
+        if payload is None:
+            payload = {"fields": set(), "grants": {}, "key": key}
+            for field_key, grants in field_grants.items():
+                if field_key not in key:
+                    continue
+                label = field_labels.get(field_key, field_key.title())
+                payload["fields"].add(label)
+                for grant in grants:
+                    grant_entry(payload["grants"], grant)["matched_fields"].add(label)
+            shared[key] = payload
+        payloads[email] = payload
+
+    for email, matches in (profile_grants or {}).items():
+        payload = payloads.get(email)
+        if payload is None:
+            payload = {"fields": set(), "grants": {}}
+        elif "key" in payload:
+            payload = _own_copy(payload)
+        payloads[email] = payload
+        for grant, keywords in matches:
+            labels = {f'"{keyword}"' for keyword in keywords}
+            payload["fields"].update(labels)
+            grant_entry(payload["grants"], grant)["matched_fields"].update(labels)
+    return payloads
+
+
+def _own_copy(payload: Mapping[str, Any]) -> Dict[str, Any]:
+    return {
+        "fields": set(payload["fields"]),
+        "grants": {
+            opp_id: {**entry, "matched_fields": set(entry["matched_fields"])}
+            for opp_id, entry in payload["grants"].items()
+        },
+    }
+
+
+_HEADER = (
+    "Hi there,",
+    "",
+    "You asked to hear about new grants in: {fields}.",
+    "",
+    "Here are the latest opportunities:",
+    "",
+)
+_FOOTER = "--\nUpdate your subscription preferences any time from the GrantWatch dashboard."
+
+_DEFAULT_HTML_TEMPLATE = Path(__file__).resolve().parent / "templates" / "digest.html"
+
+
+def load_html_template() -> Template | None:
+    """``NOTIFY_DIGEST_HTML_TEMPLATE``: unset for plain text only, ``default`` or a file path."""
+    raw = (os.getenv("NOTIFY_DIGEST_HTML_TEMPLATE") or "").strip()
+    if not raw:
+        return None
+    path = _DEFAULT_HTML_TEMPLATE if raw.lower() == "default" else Path(raw)
+    try:
+        return Template(path.read_text(encoding="utf-8"))
+    except OSError as exc:
+        logger("warning", f"Unable to read digest HTML template {path}: {exc}; sending plain text")
+        return None
+
+
+def _subject(fields_sorted: List[str]) -> str:
+    subject_focus = ", ".join(fields_sorted[:2])
+    if len(fields_sorted) > 2:
+        subject_focus += " + more"
+    return f"GrantWatch: new grants in {subject_focus or 'your fields'}"
+
+
+class DigestRenderer:
+    """Assemble digests from fragments rendered once and shared across subscribers.
+
+    A grant's text (and HTML) block is formatted once per distinct set of
+    matched labels, its sort key is computed once, and subscribers whose
+    digests come out identical share one rendered subject and body (payloads
+    shared by :func:`collect_payloads` are recognised by their ``"key"``). Cost therefore grows with unique
+    grants and unique subscriptions, not grants × subscribers. Use one
+    renderer per batch: fragments are cached by ``opp_id``.
+    """
+
+    def __init__(self, html_template: Template | None = None) -> None:
+        self.html_template = html_template
+        self._static: Dict[str, Tuple[Tuple[str, ...], str, Tuple[str, ...]]] = {}
+        self._sort_keys: Dict[str, Tuple[Any, ...]] = {}
+        self._blocks: Dict[Tuple[str, FrozenSet[str]], Tuple[str, str]] = {}
+        self._digests: Dict[Hashable, Tuple[str, str, str | None]] = {}
+
+    @classmethod
+    def from_env(cls) -> "DigestRenderer":
+        return cls(load_html_template())
+
+    def _grant_parts(self, grant: Mapping[str, Any]) -> Tuple[Tuple[str, ...], str, Tuple[str, ...]]:
+        opp_id = grant["opp_id"]
+        parts = self._static.get(opp_id)
+        if parts is None:
+            meta: List[str] = []
+            if grant.get("close_date"):
+                meta.append(f"Due {format_date(grant['close_date'])}")
+            if grant.get("post_date"):
+                meta.append(f"Posted {format_date(grant['post_date'])}")
+            if grant.get("stage"):
+                meta.append(f"Stage: {grant['stage'].title()}")
+            tail: List[str] = []
+            if grant.get("agency"):
+                tail.append(f"Agency: {grant['agency']}")
+            if grant.get("url"):
+                tail.append(grant["url"])
+            parts = (tuple(meta), f"{grant['title']} (ID: {opp_id})", tuple(tail))
+            self._static[opp_id] = parts
+            self._sort_keys[opp_id] = (
+                grant["close_date"] is None,
+                grant["close_date"] or grant["post_date"] or datetime.max,
+                opp_id,
+            )
+        return parts
+
+    def _block(self, grant: Mapping[str, Any], matched: FrozenSet[str]) -> Tuple[str, str]:
+        key = (grant["opp_id"], matched)
+        block = self._blocks.get(key)
+        if block is None:
+            meta, heading, tail = self._grant_parts(grant)
+            if matched:
+                meta = meta + (f"Matches: {', '.join(sorted(matched))}",)
+            lines = [f"- {heading}"]
+            if meta:
+                lines.append(f"  {' | '.join(meta)}")
+            lines.extend(f"  {line}" for line in tail)
+            html_block = ""
+            if self.html_template is not None:
+                html_block = _html_block(heading, meta, tail, grant.get("url"))
+            block = ("\n".join(lines), html_block)
+            self._blocks[key] = block
+        return block
+
+    def render(self, email: str, payload: Mapping[str, Any]) -> OutgoingEmail:
+        entries = payload["grants"].values()
+        if "key" in payload:
+            signature: Hashable = ("fields", payload["key"])
+        else:
+            signature = (
+                frozenset(payload["fields"]),
+                frozenset((entry["opp_id"], frozenset(entry["matched_fields"])) for entry in entries),
+            )
+        digest = self._digests.get(signature)
+        if digest is None:
+            digest = self._assemble(payload["fields"], entries)
+            self._digests[signature] = digest
+        subject, body, html_body = digest
+        return OutgoingEmail(subject, body, (email,), html_body)
+
+    def render_all(self, payloads: Payloads) -> List[OutgoingEmail]:
+        return [self.render(email, payload) for email, payload in payloads.items()]
+
+    def _assemble(self, fields: Iterable[str], entries: Iterable[Mapping[str, Any]]) -> Tuple[str, str, str | None]:
+        fields_sorted = sorted(fields)
+        subject = _subject(fields_sorted)
+        keyed = []
+        for entry in entries:
+            block = self._block(entry, frozenset(entry["matched_fields"]))
+            keyed.append((self._sort_keys[entry["opp_id"]], block))
+        keyed.sort(key=lambda item: item[0])
+
+        header = "\n".join(_HEADER).format(fields=", ".join(fields_sorted))
+        body = (header + "\n" + "".join(block[0] + "\n\n" for _key, block in keyed) + _FOOTER).strip()
+
+        html_body = None
+        if self.html_template is not None:
+            html_body = self.html_template.safe_substitute(
+                subject=html.escape(subject),
+                fields=html.escape(", ".join(fields_sorted)),
+                grants="\n".join(block[1] for _key, block in keyed),
+            )
+        return subject, body, html_body
+
+
+def _html_block(heading: str, meta: Tuple[str, ...], tail: Tuple[str, ...], url: str | None) -> str:
+    title = html.escape(heading)
+    if url:
+        title = f'<a href="{html.escape(url, quote=True)}">{title}</a>'
+    parts = [f"<li><strong>{title}</strong>"]
+    if meta:
+        parts.append(f"<br>{html.escape(' | '.join(meta))}")
+    for line in tail:
+        if line != url:
+            parts.append(f"<br>{html.escape(line)}")
+    parts.append("</li>")
+    return "".join(parts)
+
+
+def render_digest(email: str, payload: Mapping[str, Any]) -> OutgoingEmail:
+    return DigestRenderer.from_env().render(email, payload)
+
+
+def render_digests(payloads: Payloads) -> List[OutgoingEmail]:
+    """One digest per recipient, sharing rendered fragments across the batch."""
+    return DigestRenderer.from_env().render_all(payloads)
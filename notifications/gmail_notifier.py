@@ -1,21 +1,43 @@
-"""Send grant notifications via the Gmail API."""
+"""Send grant notifications via the Gmail API.
+
+The module-level helpers deliver through whichever transport
+``NOTIFY_TRANSPORT`` selects (see ``notifications.transport``); Gmail is
+the default.
+"""
 from __future__ import annotations
 
 import base64
 import os
-from email.mime.text import MIMEText
+import threading
+import time
 from pathlib import Path
-from typing import Iterable, List, Sequence
+from typing import Iterable, List, Optional, Sequence
 
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
+from grants.env import int_env
 from logs.status_logger import logger
+from notifications.transport import (
+    SEND_BACKOFF_MAX_SECONDS,
+    OutgoingEmail,
+    Transport,
+    backoff_delay,
+    build_mime,
+    get_transport,
+    normalise_recipients,
+)
 
 _SCOPES: Sequence[str] = ("https://www.googleapis.com/auth/gmail.send",)
 
+# Gmail answers quota pressure with 429 (or 403 + rateLimitExceeded) and
+# transient faults with 5xx; those sends are retried with backoff.
+_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+_sleep = time.sleep
+
 
 def _load_credentials() -> Credentials | None:
     token_path = os.getenv("GMAIL_TOKEN_FILE")
@@ -54,49 +76,128 @@ def _load_credentials() -> Credentials | None:
     return creds
 
 
-def _normalise_recipients(recipients: Iterable[str]) -> List[str]:
-    return [recipient.strip() for recipient in recipients if recipient and recipient.strip()]
-
-
-def _build_message(sender: str, to: Sequence[str], subject: str, body: str) -> dict[str, str]:
-    mime = MIMEText(body, "plain", "utf-8")
-    mime["To"] = ", ".join(to)
-    mime["From"] = sender
-    mime["Subject"] = subject
+def _build_message(sender: str, to: Sequence[str], subject: str, body: str, html: Optional[str] = None) -> dict[str, str]:
+    mime = build_mime(sender, to, subject, body, html)
     raw = base64.urlsafe_b64encode(mime.as_bytes()).decode("utf-8")
     return {"raw": raw}
 
 
-def send_grant_notification(subject: str, body: str, recipients: Iterable[str]) -> bool:
-    """Send a Gmail notification; returns True if the message was dispatched."""
-    recipients_list = _normalise_recipients(recipients)
-    if not recipients_list:
-        logger("info", "No Gmail recipients configured; skipping notification")
+def _retry_delay(exc: HttpError, attempt: int) -> Optional[float]:
+    """Seconds to wait before retrying ``exc``, or None when it is not retryable.
+
+    A ``Retry-After`` longer than the backoff cap is not waited out in a
+    send worker: the send fails and the outbox reschedules the message.
+    """
+    status = getattr(exc.resp, "status", None)
+    if status == 403:
+        content = exc.content.decode("utf-8", "replace") if isinstance(exc.content, bytes) else str(exc.content)
+        if "ratelimitexceeded" not in content.lower():
+            return None
+    elif status not in _RETRY_STATUSES:
+        return None
+    retry_after = str(exc.resp.get("retry-after", "")).strip()
+    if retry_after.isdigit():
+        delay = float(retry_after)
+        if delay > SEND_BACKOFF_MAX_SECONDS:
+            logger("warning", f"Gmail asked to retry after {delay:.0f}s; leaving the message for a later run")
+            return None
+        return delay
+    return backoff_delay(attempt)
+
+
+class GmailSession(Transport):
+    """Gmail credentials loaded (and refreshed) once, reused for many sends.
+
+    ``googleapiclient`` clients are not thread-safe, so each sending thread
+    builds its own service once and keeps it; :meth:`send_many` fans out
+    over a bounded pool of ``GMAIL_SEND_WORKERS`` threads. Rate-limit and
+    5xx responses are retried with jittered exponential backoff (honouring
+    ``Retry-After``) up to ``GMAIL_SEND_RETRIES`` times.
+    """
+
+    name = "gmail"
+
+    def __init__(self, sender: Optional[str] = None, credentials: Optional[Credentials] = None) -> None:
+        self.credentials = credentials if credentials is not None else _load_credentials()
+        self.sender = sender or os.getenv("GMAIL_SENDER_EMAIL")
+        self.workers = int_env("GMAIL_SEND_WORKERS", 4, minimum=1)
+        self.retries = int_env("GMAIL_SEND_RETRIES", 5, minimum=1)
+        self._local = threading.local()
+
+    @property
+    def ready(self) -> bool:
+        return self.credentials is not None
+
+    def _service(self):
+        service = getattr(self._local, "service", None)
+        if service is None:
+            service = build("gmail", "v1", credentials=self.credentials, cache_discovery=False)
+            self._local.service = service
+        return service
+
+    def send(self, subject: str, body: str, recipients: Iterable[str], html: Optional[str] = None) -> bool:
+        """Send one message (multipart when ``html`` is given); returns True if it was dispatched."""
+        recipients_list = normalise_recipients(recipients)
+        if not recipients_list:
+            logger("info", "No Gmail recipients configured; skipping notification")
+            return False
+        if not self.ready:
+            return False
+
+        message = _build_message(self.sender or recipients_list[0], recipients_list, subject, body, html)
+        for attempt in range(self.retries + 1):
+            try:
+                self._service().users().messages().send(userId="me", body=message).execute()
+                logger("info", f"Sent Gmail notification to {', '.join(recipients_list)}")
+                return True
+            except HttpError as exc:
+                delay = _retry_delay(exc, attempt)
+                if delay is None or attempt == self.retries:
+                    logger("error", f"Gmail API error while sending notification: {exc}")
+                    return False
+                logger("warning", f"Gmail send throttled or failed ({exc.resp.status}); retrying in {delay:.1f}s")
+                _sleep(delay)
+            except Exception as exc:
+                logger("error", f"Unexpected failure sending Gmail notification: {exc}")
+                return False
         return False
 
-    sender = os.getenv("GMAIL_SENDER_EMAIL") or recipients_list[0]
 
-    creds = _load_credentials()
-    if creds is None:
+def send_grant_notification(
+    subject: str,
+    body: str,
+    recipients: Iterable[str],
+    session: Optional[Transport] = None,
+) -> bool:
+    """Send one notification; returns True if the message was dispatched.
+
+    Goes through the ``NOTIFY_TRANSPORT`` transport unless ``session`` is
+    given; pass one when sending several messages so credentials and
+    connections are not set up for each one.
+    """
+    recipients_list = normalise_recipients(recipients)
+    if not recipients_list:
+        logger("info", "No recipients configured; skipping notification")
         return False
+    if session is None:
+        session = get_transport()
+    return session.send(subject, body, recipients_list)
 
-    try:
-        service = build("gmail", "v1", credentials=creds, cache_discovery=False)
-        message = _build_message(sender, recipients_list, subject, body)
-        service.users().messages().send(userId="me", body=message).execute()
-        logger("info", f"Sent Gmail notification to {', '.join(recipients_list)}")
-        return True
-    except HttpError as exc:
-        logger("error", f"Gmail API error while sending notification: {exc}")
-    except Exception as exc:
-        logger("error", f"Unexpected failure sending Gmail notification: {exc}")
 
-    return False
+def send_grant_notifications(messages: Sequence[OutgoingEmail]) -> List[bool]:
+    """Send many messages over one ``NOTIFY_TRANSPORT`` transport and a bounded thread pool."""
+    if not messages:
+        return []
+    transport = get_transport()
+    try:
+        return transport.send_many(messages)
+    finally:
+        transport.close()
 
 
 def notify_grant_release(grants: Sequence[dict[str, object]], csv_path: str | None) -> None:
     recipients_env = os.getenv("GMAIL_NOTIFY_RECIPIENTS", "")
-    recipients = _normalise_recipients(recipients_env.split(","))
+    recipients = normalise_recipients(recipients_env.split(","))
     if not recipients:
         logger("info", "GMAIL_NOTIFY_RECIPIENTS not configured; no email will be sent")
         return
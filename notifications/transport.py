@@ -0,0 +1,283 @@
+"""Pluggable delivery for notification emails.
+
+``NOTIFY_TRANSPORT`` picks how messages leave the process:
+
+- ``gmail`` (default): the Gmail API via :class:`~notifications.gmail_notifier.GmailSession`
+- ``smtp``: any SMTP server (``SMTP_HOST``/``SMTP_PORT``, optional
+  ``SMTP_SECURITY`` ``starttls``/``ssl`` and ``SMTP_USERNAME``/``SMTP_PASSWORD``)
+- ``maildir``: a local Maildir at ``NOTIFY_MAILDIR``, for offline runs and
+  load tests
+
+Every transport sends one message with :meth:`Transport.send` and fans a
+batch out over a bounded thread pool with :meth:`Transport.send_many`.
+"""
+from __future__ import annotations
+
+import mailbox
+import os
+import random
+import smtplib
+import ssl
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from email.utils import formatdate, make_msgid
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from grants.env import int_env
+from logs.status_logger import logger
+
+TRANSPORTS = ("gmail", "smtp", "maildir")
+DEFAULT_TRANSPORT = "gmail"
+# Longest wait between retries of a single send.
+SEND_BACKOFF_MAX_SECONDS = 32.0
+
+_DEFAULT_MAILDIR = Path(__file__).resolve().parent / "maildir"
+_SMTP_TIMEOUT_SECONDS = 30
+_BACKOFF_BASE_SECONDS = 1.0
+
+_sleep = time.sleep
+_executor_lock = threading.Lock()
+
+
+def backoff_delay(attempt: int) -> float:
+    """Jittered exponential backoff for retry ``attempt`` (0-based)."""
+    return min(SEND_BACKOFF_MAX_SECONDS, _BACKOFF_BASE_SECONDS * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+
+@dataclass(frozen=True)
+class OutgoingEmail:
+    subject: str
+    body: str
+    recipients: Tuple[str, ...]
+    html: Optional[str] = None
+
+
+def normalise_recipients(recipients: Iterable[str]) -> List[str]:
+    return [recipient.strip() for recipient in recipients if recipient and recipient.strip()]
+
+
+def build_mime(sender: str, to: Sequence[str], subject: str, body: str, html: Optional[str] = None) -> MIMEText | MIMEMultipart:
+    """Plain-text message, or multipart/alternative when ``html`` is given."""
+    if html:
+        mime: MIMEText | MIMEMultipart = MIMEMultipart("alternative")
+        mime.attach(MIMEText(body, "plain", "utf-8"))
+        mime.attach(MIMEText(html, "html", "utf-8"))
+    else:
+        mime = MIMEText(body, "plain", "utf-8")
+    mime["To"] = ", ".join(to)
+    mime["From"] = sender
+    mime["Subject"] = subject
+    return mime
+
+
+class Transport(ABC):
+    """Base class: subclasses implement :meth:`send` and set ``workers``."""
+
+    name = "transport"
+    workers = 1
+    _executor: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def ready(self) -> bool:
+        return True
+
+    @abstractmethod
+    def send(self, subject: str, body: str, recipients: Iterable[str], html: Optional[str] = None) -> bool:
+        """Deliver one message; ``True`` once it has been handed off."""
+
+    def send_many(self, messages: Sequence[OutgoingEmail]) -> List[bool]:
+        """Send ``messages`` concurrently; results are in input order."""
+        if not messages:
+            return []
+        if not self.ready:
+            return [False] * len(messages)
+        if self.workers == 1:
+            return [self.send(m.subject, m.body, m.recipients, m.html) for m in messages]
+        return list(self._send_pool().map(lambda m: self.send(m.subject, m.body, m.recipients, m.html), messages))
+
+    def _send_pool(self) -> ThreadPoolExecutor:
+        # One pool for the transport's lifetime: later batches run on the same
+        # threads, so per-thread connections are reused rather than reopened.
+        with _executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"{self.name}-send")
+            return self._executor
+
+    def close(self) -> None:
+        """Stop the sending threads and release connections.
+
+        The transport stays usable: threads and connections are recreated lazily.
+        """
+        with _executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+class SmtpTransport(Transport):
+    """SMTP delivery with one persistent connection per sending thread.
+
+    ``SMTP_SEND_WORKERS`` threads (default 4) each keep their connection
+    open across messages. 4xx replies and dropped connections are retried
+    with jittered exponential backoff up to ``SMTP_SEND_RETRIES`` times
+    (default 3); 5xx replies and refused recipients are not.
+    """
+
+    name = "smtp"
+
+    def __init__(
+        self,
+        host: Optional[str] = None,
+        port: Optional[int] = None,
+        sender: Optional[str] = None,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        security: Optional[str] = None,
+    ) -> None:
+        self.host = host or os.getenv("SMTP_HOST", "localhost")
+        self.port = port or int_env("SMTP_PORT", 25, minimum=1)
+        self.sender = sender or os.getenv("SMTP_SENDER") or os.getenv("GMAIL_SENDER_EMAIL")
+        self.username = username if username is not None else os.getenv("SMTP_USERNAME")
+        self.password = password if password is not None else os.getenv("SMTP_PASSWORD", "")
+        self.security = (security or os.getenv("SMTP_SECURITY") or "none").strip().lower()
+        self.workers = int_env("SMTP_SEND_WORKERS", 4, minimum=1)
+        self.retries = int_env("SMTP_SEND_RETRIES", 3, minimum=1)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: List[smtplib.SMTP] = []
+
+    def _connection(self) -> smtplib.SMTP:
+        conn = getattr(self._local, "smtp", None)
+        if conn is None:
+            if self.security == "ssl":
+                conn = smtplib.SMTP_SSL(self.host, self.port, timeout=_SMTP_TIMEOUT_SECONDS, context=ssl.create_default_context())
+            else:
+                conn = smtplib.SMTP(self.host, self.port, timeout=_SMTP_TIMEOUT_SECONDS)
+                if self.security == "starttls":
+                    conn.starttls(context=ssl.create_default_context())
+            if self.username:
+                conn.login(self.username, self.password)
+            self._local.smtp = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _drop_connection(self) -> None:
+        conn = getattr(self._local, "smtp", None)
+        self._local.smtp = None
+        if conn is None:
+            return
+        with self._lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+        try:
+            conn.close()
+        except OSError:
+            pass
+
+    def send(self, subject: str, body: str, recipients: Iterable[str], html: Optional[str] = None) -> bool:
+        recipients_list = normalise_recipients(recipients)
+        if not recipients_list:
+            logger("info", "No recipients configured; skipping notification")
+            return False
+
+        sender = self.sender or recipients_list[0]
+        mime = build_mime(sender, recipients_list, subject, body, html)
+        mime["Date"] = formatdate(localtime=True)
+        # Without a domain make_msgid() resolves the local FQDN on every call.
+        mime["Message-ID"] = make_msgid(domain=sender.rpartition("@")[2] or "localhost")
+        for attempt in range(self.retries + 1):
+            try:
+                self._connection().send_message(mime, from_addr=sender, to_addrs=recipients_list)
+                return True
+            except smtplib.SMTPRecipientsRefused as exc:
+                logger("error", f"SMTP server refused {', '.join(exc.recipients)}")
+                return False
+            except smtplib.SMTPResponseException as exc:
+                if not 400 <= exc.smtp_code < 500 or attempt == self.retries:
+                    logger("error", f"SMTP error while sending notification: {exc.smtp_code} {exc.smtp_error!r}")
+                    self._drop_connection()
+                    return False
+                self._drop_connection()
+            except (smtplib.SMTPException, OSError) as exc:
+                self._drop_connection()
+                if attempt == self.retries:
+                    logger("error", f"SMTP connection to {self.host}:{self.port} failed: {exc}")
+                    return False
+            delay = backoff_delay(attempt)
+            logger("warning", f"SMTP send failed transiently; retrying in {delay:.1f}s")
+            _sleep(delay)
+        return False
+
+    def close(self) -> None:
+        super().close()
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.quit()
+            except (smtplib.SMTPException, OSError):
+                conn.close()
+        self._local = threading.local()
+
+
+class MaildirTransport(Transport):
+    """Deliver into a local Maildir instead of sending anything.
+
+    Each message becomes one file under ``new/``, readable by any mail
+    client or :class:`mailbox.Maildir`.
+    """
+
+    name = "maildir"
+
+    def __init__(self, path: Optional[str | Path] = None, sender: Optional[str] = None) -> None:
+        self.path = Path(path or os.getenv("NOTIFY_MAILDIR") or _DEFAULT_MAILDIR)
+        self.sender = sender or os.getenv("SMTP_SENDER") or os.getenv("GMAIL_SENDER_EMAIL") or "grantwatch@localhost"
+        # Maildir(create=True) skips the subfolders when the directory exists.
+        for sub in ("tmp", "new", "cur"):
+            (self.path / sub).mkdir(parents=True, exist_ok=True)
+        self._box = mailbox.Maildir(str(self.path), create=False)
+        self._lock = threading.Lock()
+
+    def send(self, subject: str, body: str, recipients: Iterable[str], html: Optional[str] = None) -> bool:
+        recipients_list = normalise_recipients(recipients)
+        if not recipients_list:
+            logger("info", "No recipients configured; skipping notification")
+            return False
+        mime = build_mime(self.sender, recipients_list, subject, body, html)
+        mime["Date"] = formatdate(localtime=True)
+        try:
+            with self._lock:
+                self._box.add(mime)
+        except OSError as exc:
+            logger("error", f"Could not write notification to {self.path}: {exc}")
+            return False
+        return True
+
+
+def transport_name() -> str:
+    raw = (os.getenv("NOTIFY_TRANSPORT") or DEFAULT_TRANSPORT).strip().lower()
+    if raw == "file":
+        return "maildir"
+    if raw not in TRANSPORTS:
+        logger("warning", f"Unknown NOTIFY_TRANSPORT '{raw}'; using {DEFAULT_TRANSPORT}")
+        return DEFAULT_TRANSPORT
+    return raw
+
+
+def get_transport(name: Optional[str] = None) -> Transport:
+    """A new transport for ``name`` (default ``NOTIFY_TRANSPORT``)."""
+    name = name or transport_name()
+    if name == "smtp":
+        return SmtpTransport()
+    if name == "maildir":
+        return MaildirTransport()
+    from notifications.gmail_notifier import GmailSession
+
+    return GmailSession()
@@ -0,0 +1,110 @@
+"""Benchmark the columnar store against the dict-list filter stages.
+
+    python scripts/bench_columnar.py --records 80000
+    python scripts/bench_columnar.py --records 80000 --no-numpy
+
+Builds synthetic normalized records with the extract's ~35 keys (fresh
+string objects per record, as the XML parser produces them), then measures
+retained memory (tracemalloc) of a list of dicts versus
+:class:`ColumnarRecords`, and the time for date filter, forecast filter and
+sort over each. The surviving records are checked to be identical.
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from grants_data.columnar import ColumnarRecords, numpy_available
+from grants_data.date_filter_data import date_filter_json_data, lookback_cutoff
+from grants_data.filter_with_forecast import filter_forecasted_data
+from grants_data.normalize import normalize_records
+from grants_data.pipeline import _sort_key
+
+_AGENCIES = ("HHS-NIH11", "DOE-ARPAE", "NSF", "USDA-NIFA", "DOC-NOAA", "ED-OESE", "DOT-FHWA", "EPA")
+_STATUSES = ("Posted", "Posted", "Posted", "Forecasted", "Closed")
+
+
+def _records(count: int, seed: int) -> list:
+    rng = random.Random(seed)
+    today = datetime.now()
+    records = []
+    for index in range(count):
+        posted = (today - timedelta(days=rng.randrange(0, 900))).strftime("%m/%d/%Y")
+        record = {
+            "OPPORTUNITY_NUMBER": f"{rng.choice(_AGENCIES)}-{index:07d}",
+            "OPPORTUNITY_ID": str(300000 + index),
+            "OPPORTUNITY_TITLE": f"Grant opportunity {index} for research and community programs",
+            "OPPORTUNITY_STATUS": rng.choice(_STATUSES),
+            "AGENCY_CODE": rng.choice(_AGENCIES),
+            "AGENCY_NAME": "Department of " + rng.choice(_AGENCIES),
+            "POSTED_DATE": posted,
+            "CLOSE_DATE": (today + timedelta(days=rng.randrange(0, 400))).strftime("%m/%d/%Y"),
+            "FUNDING_DESCRIPTION": " ".join(f"word{rng.randrange(5000)}" for _ in range(60)),
+        }
+        for extra in range(26):
+            record[f"FIELD_{extra:02d}"] = rng.choice(("", "Y", "N", "01", "Unrestricted", str(rng.randrange(100))))
+        records.append(record)
+    return normalize_records(records)
+
+
+def _measure(build):
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    value = build()
+    elapsed = time.perf_counter() - started
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, retained, elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=80000)
+    parser.add_argument("--no-numpy", action="store_true")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    use_numpy = numpy_available() and not args.no_numpy
+    cutoff = lookback_cutoff()[0]
+
+    _, dict_bytes, _ = _measure(lambda: _records(args.records, args.seed))
+    _, store_bytes, _ = _measure(
+        lambda: ColumnarRecords.from_records(_records(args.records, args.seed), use_numpy=use_numpy)
+    )
+    source = _records(args.records, args.seed)
+    started = time.perf_counter()
+    store = ColumnarRecords.from_records(source, use_numpy=use_numpy)
+    build_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    expected = filter_forecasted_data(date_filter_json_data(source))
+    expected.sort(key=_sort_key, reverse=True)
+    dict_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    selection = store.filter_posted_since(cutoff).without_forecasted().sorted_by_posted()
+    columnar_time = time.perf_counter() - started
+
+    identical = "identical" if selection.to_records() == expected else "MISMATCH"
+    print(f"records={len(source)} kept={len(selection)} numpy={use_numpy}")
+    print(
+        f"memory   dicts {dict_bytes / len(source):7.0f} B/record  "
+        f"columnar {store_bytes / len(source):7.0f} B/record  x{dict_bytes / store_bytes:.2f}"
+    )
+    print(
+        f"filters  dicts {dict_time:7.3f}s  columnar {columnar_time:7.3f}s  "
+        f"x{dict_time / columnar_time:.2f}  (columnar build {build_time:.3f}s)  {identical}"
+    )
+
+
+if __name__ == "__main__":
+    main()
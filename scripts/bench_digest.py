@@ -0,0 +1,84 @@
+"""Benchmark subscriber digest rendering.
+
+    python scripts/bench_digest.py --grants 300 --fields 25 --subscribers 10000
+    python scripts/bench_digest.py --html
+
+Builds synthetic new grants spread over subscription fields and subscribers
+each following one to three fields, then renders every digest two ways:
+per subscriber from scratch (the old cost, grants x subscribers) and with
+one shared ``DigestRenderer``. Both outputs are checked to be identical.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from notifications.digest import DigestRenderer, collect_payloads, load_html_template
+
+
+def _scenario(grants: int, fields: int, subscribers: int, rng: random.Random):
+    base = datetime(2026, 7, 1)
+    field_keys = [f"field-{index:03d}" for index in range(fields)]
+    field_grants = {key: [] for key in field_keys}
+    for index in range(grants):
+        grant = {
+            "opp_id": f"HHS-2026-{index:05d}",
+            "title": f"Community research opportunity {index}",
+            "stage": rng.choice(("full", "concept", None)),
+            "close_date": base + timedelta(days=rng.randrange(10, 200)),
+            "post_date": base,
+            "agency": "Department of Health and Human Services",
+            "url": f"https://www.grants.gov/search-results-detail/{300000 + index}",
+        }
+        for key in rng.sample(field_keys, rng.randint(1, 2)):
+            field_grants[key].append(grant)
+    labels = {key: key.replace("-", " ").title() for key in field_keys}
+    subscribers_map = {key: [] for key in field_keys}
+    for index in range(subscribers):
+        for key in rng.sample(field_keys, rng.randint(1, 3)):
+            subscribers_map[key].append(f"user{index}@example.org")
+    return field_grants, labels, subscribers_map
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--grants", type=int, default=300)
+    parser.add_argument("--fields", type=int, default=25)
+    parser.add_argument("--subscribers", type=int, default=10000)
+    parser.add_argument("--html", action="store_true", help="also render the bundled HTML template")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    field_grants, labels, subscribers_map = _scenario(args.grants, args.fields, args.subscribers, random.Random(args.seed))
+    started = time.perf_counter()
+    payloads = collect_payloads(field_grants, labels, subscribers_map)
+    collect_s = time.perf_counter() - started
+    template = None
+    if args.html:
+        import os
+
+        os.environ["NOTIFY_DIGEST_HTML_TEMPLATE"] = "default"
+        template = load_html_template()
+    print(f"grants={args.grants} fields={args.fields} recipients={len(payloads)} html={template is not None}")
+
+    started = time.perf_counter()
+    naive = [DigestRenderer(template).render(email, payload) for email, payload in payloads.items()]
+    naive_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    shared = DigestRenderer(template).render_all(payloads)
+    shared_s = time.perf_counter() - started
+
+    print(f"collect payloads {collect_s:7.3f}s")
+    print(f"per subscriber   {naive_s:7.3f}s")
+    print(f"shared renderer  {shared_s:7.3f}s (x{naive_s / shared_s:5.1f})  {'identical' if naive == shared else 'MISMATCH'}")
+
+
+if __name__ == "__main__":
+    main()
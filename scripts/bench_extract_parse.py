@@ -0,0 +1,112 @@
+"""Benchmark extract parsing on a synthetic Grants.gov XML extract.
+
+    python scripts/bench_extract_parse.py --records 200000 --workers 1 2 4 8
+    python scripts/bench_extract_parse.py --records 250000 --parsers stdlib lxml
+
+Writes a synthetic extract (~1.3 KB per opportunity, so 200k records is
+roughly 260 MB) to a temp directory, parses it once per parser backend and
+worker count, and prints wall time and speed-up relative to the first run.
+Records from every run are checked against the first one.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from grants_data.parse_extract import parser_backend, process_extract_xml
+
+_NAMESPACE = "http://apply.grants.gov/system/OpportunityDetail-V1.0"
+
+_SYNOPSIS = """  <OpportunitySynopsisDetail_1_0>
+    <OpportunityID>{opp_id}</OpportunityID>
+    <OpportunityTitle>Synthetic research and education opportunity {opp_id}</OpportunityTitle>
+    <OpportunityNumber>SYN-{opp_id}</OpportunityNumber>
+    <OpportunityCategory>D</OpportunityCategory>
+    <FundingInstrumentType>G</FundingInstrumentType>
+    <FundingInstrumentType>CA</FundingInstrumentType>
+    <CategoryOfFundingActivity>ST</CategoryOfFundingActivity>
+    <CategoryOfFundingActivity>ED</CategoryOfFundingActivity>
+    <CFDANumbers>47.076</CFDANumbers>
+    <AgencyCode>NSF</AgencyCode>
+    <AgencyName>U.S. National Science Foundation</AgencyName>
+    <PostDate>{month:02d}152026</PostDate>
+    <CloseDate>12312026</CloseDate>
+    <LastUpdatedDate>{month:02d}162026</LastUpdatedDate>
+    <AwardCeiling>500000</AwardCeiling>
+    <AwardFloor>100000</AwardFloor>
+    <EstimatedTotalProgramFunding>5000000</EstimatedTotalProgramFunding>
+    <ExpectedNumberOfAwards>10</ExpectedNumberOfAwards>
+    <Description>&lt;p&gt;Supports research infrastructure, technology innovation and education programs at institutions of higher education. Proposals should describe measurable outcomes.&lt;/p&gt;</Description>
+    <Version>Synopsis 1</Version>
+    <CostSharingOrMatchingRequirement>No</CostSharingOrMatchingRequirement>
+    <AdditionalInformationURL>https://www.nsf.gov/funding/{opp_id}</AdditionalInformationURL>
+    <GrantorContactEmail>grants@example.gov</GrantorContactEmail>
+  </OpportunitySynopsisDetail_1_0>
+"""
+
+_FORECAST = """  <OpportunityForecastDetail_1_0>
+    <OpportunityID>{opp_id}</OpportunityID>
+    <OpportunityTitle>Forecasted opportunity {opp_id}</OpportunityTitle>
+    <OpportunityNumber>FC-{opp_id}</OpportunityNumber>
+    <AgencyName>Department of Energy</AgencyName>
+    <EstimatedSynopsisPostDate>{month:02d}012027</EstimatedSynopsisPostDate>
+    <Description>Forecast of upcoming energy technology funding.</Description>
+    <Version>Forecast 1</Version>
+  </OpportunityForecastDetail_1_0>
+"""
+
+
+def write_synthetic_extract(path: Path, records: int) -> None:
+    with path.open("w", encoding="utf-8") as fp:
+        fp.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        fp.write(f'<Grants xmlns="{_NAMESPACE}">\n')
+        for index in range(records):
+            template = _FORECAST if index % 10 == 9 else _SYNOPSIS
+            fp.write(template.format(opp_id=100000 + index, month=index % 12 + 1))
+        fp.write("</Grants>\n")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=100000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--parsers", nargs="+", default=["stdlib"], choices=("stdlib", "lxml"))
+    parser.add_argument("--file", type=Path, help="reuse an existing extract instead of generating one")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="grantwatch-bench-") as tmp:
+        path = args.file
+        if path is None:
+            path = Path(tmp) / "GrantsDBExtractSynthetic.xml"
+            write_synthetic_extract(path, args.records)
+        size_mb = path.stat().st_size / (1024 * 1024)
+        print(f"extract: {path} ({size_mb:.1f} MB)")
+
+        baseline = None
+        reference = None
+        for backend in args.parsers:
+            if parser_backend(backend) != backend:
+                print(f"parser={backend} unavailable; skipped")
+                continue
+            for workers in args.workers:
+                started = time.perf_counter()
+                parsed = process_extract_xml(path, workers=workers, backend=backend)
+                elapsed = time.perf_counter() - started
+                baseline = baseline or elapsed
+                if reference is None:
+                    reference = parsed
+                identical = "identical" if parsed == reference else "MISMATCH"
+                print(
+                    f"parser={backend:<6} workers={workers:<3} records={len(parsed):<8} "
+                    f"{elapsed:7.2f}s  {size_mb / elapsed:7.1f} MB/s  "
+                    f"speed-up x{baseline / elapsed:.2f}  {identical}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Benchmark export persistence formats.
+
+    python scripts/bench_json_store.py --records 5000
+    python scripts/bench_json_store.py --records 20000 --formats json jsonl jsonl.gz
+
+Writes synthetic search_export rows (~30 fields, ~2 KB description) the old
+way (``json.dump(indent=2)`` / ``json.load``) and in each ``json_store``
+format, timing write and reload and reporting file size. Reloaded records
+are checked to equal the originals.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from grants_data import json_store
+
+_WORDS = "research education health community infrastructure climate energy rural tribal housing".split()
+
+
+def _rows(count: int, rng: random.Random) -> list:
+    rows = []
+    for index in range(count):
+        row = {
+            "OPPORTUNITY_ID": 300000 + index,
+            "OPPORTUNITY_NUMBER": f"HHS-2026-{index:05d}",
+            "OPPORTUNITY_TITLE": " ".join(rng.choice(_WORDS) for _ in range(8)).title(),
+            "AGENCY_NAME": "Department of Health and Human Services",
+            "OPPORTUNITY_NUMBER_LINK": f"https://www.grants.gov/search-results-detail/{300000 + index}",
+            "POSTED_DATE": "07/01/2026",
+            "CLOSE_DATE": "12/31/2026",
+            "FUNDING_DESCRIPTION": "<p>" + " ".join(rng.choice(_WORDS) for _ in range(280)) + "</p>",
+            "AWARD_CEILING": rng.randrange(10_000, 5_000_000),
+        }
+        for extra in range(21):
+            row[f"FIELD_{extra:02d}"] = rng.choice((None, "", "Yes", "No", "Unrestricted (i.e., open to any type)"))
+        rows.append(row)
+    return rows
+
+
+def _legacy(rows: list, directory: Path) -> tuple:
+    path = directory / "legacy.json"
+    started = time.perf_counter()
+    with path.open("w", encoding="utf-8") as fp:
+        json.dump(rows, fp, ensure_ascii=False, indent=2)
+    written = time.perf_counter() - started
+    started = time.perf_counter()
+    with path.open("r", encoding="utf-8") as fp:
+        loaded = json.load(fp)
+    return path, written, time.perf_counter() - started, loaded
+
+
+def _store(rows: list, directory: Path, fmt: str) -> tuple:
+    os.environ["GRANTS_JSON_FORMAT"] = fmt
+    started = time.perf_counter()
+    path = json_store.write_records(rows, directory, f"grants_{fmt.replace('.', '_')}")
+    written = time.perf_counter() - started
+    started = time.perf_counter()
+    loaded = json_store.load_records(path)
+    return path, written, time.perf_counter() - started, loaded
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=5000)
+    parser.add_argument("--formats", nargs="*", default=["jsonl", "jsonl.gz", "jsonl.zst"])
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rows = _rows(args.records, random.Random(args.seed))
+    print(f"records={len(rows)} json backend={json_store.json_backend()}")
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        results = [("legacy json indent=2", *_legacy(rows, directory))]
+        for fmt in args.formats:
+            results.append((fmt, *_store(rows, directory, fmt)))
+        baseline = results[0]
+        for name, path, written, read, loaded in results:
+            size = path.stat().st_size
+            print(
+                f"{name:<22} {path.suffix:<6} size {size / 1e6:7.2f} MB ({size / baseline[1].stat().st_size:5.1%})  "
+                f"write {written:6.3f}s (x{baseline[2] / written:4.1f})  "
+                f"read {read:6.3f}s (x{baseline[3] / read:4.1f})  "
+                f"{'identical' if loaded == rows else 'MISMATCH'}"
+            )
+
+
+if __name__ == "__main__":
+    main()
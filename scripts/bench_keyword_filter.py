@@ -0,0 +1,108 @@
+"""Benchmark keyword filtering as the keyword list grows.
+
+    python scripts/bench_keyword_filter.py --records 2000 --keywords 10 100 500 2000
+    python scripts/bench_keyword_filter.py --keywords --profiles 100 1000 10000
+
+Builds synthetic grant descriptions (~2 KB each) and keyword lists of each
+size, then times the original one-regex-per-keyword scan against
+:class:`KeywordMatcher`'s single trie-regex pass. MATCHED_KEYWORDS from both
+are checked to be identical.
+
+``--profiles`` times :class:`ProfileMatcher` with that many subscriber
+profiles (5 keywords each, threshold 2); its cost should stay roughly flat
+as the number of profiles grows.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from grants_data.keyword_filter_data import KeywordMatcher, ProfileMatcher, _keyword_pattern
+from grants_data.normalize import strip_html
+
+_VOCABULARY = (
+    "research education health community infrastructure climate resilience energy "
+    "technology innovation rural tribal workforce training housing water quality "
+    "broadband transportation safety agriculture nutrition youth veterans disability "
+    "biomedical clinical trial data science artificial intelligence cyber security "
+    "manufacturing supply chain environmental justice conservation wildlife fisheries "
+    "arts humanities museum library archive preservation capacity building outreach"
+).split()
+
+
+def _descriptions(count: int, words: int, rng: random.Random) -> list:
+    return [
+        "<p>" + " ".join(rng.choice(_VOCABULARY) for _ in range(words)) + ".</p>"
+        for _ in range(count)
+    ]
+
+
+def _keywords(count: int, rng: random.Random) -> list:
+    keywords = list(_VOCABULARY)
+    while len(keywords) < count:
+        size = rng.choice((1, 2, 2, 3))
+        keywords.append(" ".join(rng.choice(_VOCABULARY) for _ in range(size)) + f" {len(keywords)}")
+    rng.shuffle(keywords)
+    return keywords[:count]
+
+
+def _per_keyword(texts, keywords):
+    patterns = {keyword: _keyword_pattern(keyword) for keyword in keywords}
+    return [[keyword for keyword, pattern in patterns.items() if pattern.search(text)] for text in texts]
+
+
+def _matcher(texts, keywords):
+    matcher = KeywordMatcher(keywords)
+    return [matcher.matches(text) for text in texts]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=2000)
+    parser.add_argument("--words", type=int, default=280, help="words per description")
+    parser.add_argument("--keywords", type=int, nargs="*", default=[10, 50, 200, 1000])
+    parser.add_argument("--profiles", type=int, nargs="*", default=[])
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    texts = [strip_html(text) for text in _descriptions(args.records, args.words, rng)]
+    print(f"records={len(texts)} avg_chars={sum(map(len, texts)) // max(1, len(texts))}")
+
+    for count in args.keywords:
+        keywords = _keywords(count, rng)
+        timings = {}
+        results = {}
+        for name, run in (("per-keyword", _per_keyword), ("matcher", _matcher)):
+            started = time.perf_counter()
+            results[name] = run(texts, keywords)
+            timings[name] = time.perf_counter() - started
+        identical = "identical" if results["per-keyword"] == results["matcher"] else "MISMATCH"
+        print(
+            f"keywords={count:<6} per-keyword {timings['per-keyword']:7.3f}s  "
+            f"matcher {timings['matcher']:7.3f}s  "
+            f"speed-up x{timings['per-keyword'] / timings['matcher']:.2f}  {identical}"
+        )
+
+    vocabulary = _keywords(2000, rng)
+    for count in args.profiles:
+        profiles = {f"user{index}@example.org": (rng.sample(vocabulary, 5), 2) for index in range(count)}
+        started = time.perf_counter()
+        matcher = ProfileMatcher(profiles)
+        built = time.perf_counter() - started
+        started = time.perf_counter()
+        matched = sum(len(matcher.match(text)) for text in texts)
+        elapsed = time.perf_counter() - started
+        print(
+            f"profiles={count:<7} build {built:6.2f}s  match {elapsed:7.3f}s  "
+            f"{elapsed / len(texts) * 1e6:8.0f} us/record  profile matches={matched}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Load-test subscriber notification fan-out against a local SMTP stand-in.
+
+    python scripts/bench_notify.py --subscribers 10000
+    python scripts/bench_notify.py --subscribers 20000 --workers 1 4 16 --latency-ms 5
+    python scripts/bench_notify.py --transport maildir --subscribers 10000
+
+Starts a threaded SMTP sink on 127.0.0.1 in a separate process (it accepts
+and counts every message, optionally sleeping ``--latency-ms`` per message
+like a real relay), points ``NOTIFY_TRANSPORT=smtp`` at it and pushes synthetic new
+grants through the loader's full ``_notify_subscribers`` path: grouping,
+digest rendering and delivery. The subscriber lookup is stubbed so no
+database is needed. ``--transport maildir`` writes into a temp Maildir
+instead.
+"""
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import os
+import random
+import socketserver
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from grants.data import loader
+
+
+class _SinkHandler(socketserver.StreamRequestHandler):
+    def _reply(self, line: str) -> None:
+        self.wfile.write(line.encode("ascii") + b"\r\n")
+
+    def handle(self) -> None:
+        self._reply("220 localhost GrantWatch SMTP sink")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line[:4].upper()
+            if command == b"EHLO":
+                self._reply("250-localhost")
+                self._reply("250 8BITMIME")
+            elif command == b"DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                size = 0
+                while True:
+                    data = self.rfile.readline()
+                    if not data or data == b".\r\n":
+                        break
+                    size += len(data)
+                if self.server.latency:
+                    time.sleep(self.server.latency)
+                self.server.record(size)
+                self._reply("250 OK queued")
+            elif command == b"QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("250 OK")
+
+
+class _SmtpSink(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, latency: float, counter) -> None:
+        super().__init__(("127.0.0.1", 0), _SinkHandler)
+        self.latency = latency
+        self.counter = counter
+
+    def record(self, size: int) -> None:
+        with self.counter.get_lock():
+            self.counter.value += 1
+
+
+def _serve_sink(latency: float, counter, ports) -> None:
+    sink = _SmtpSink(latency, counter)
+    ports.put(sink.server_address[1])
+    sink.serve_forever()
+
+
+def _scenario(grants: int, fields: int, subscribers: int, rng: random.Random):
+    base = datetime(2026, 7, 1)
+    field_keys = [f"field-{index:03d}" for index in range(fields)]
+    field_grants = {key: [] for key in field_keys}
+    for index in range(grants):
+        grant = {
+            "opp_id": f"HHS-2026-{index:05d}",
+            "title": f"Community research opportunity {index}",
+            "stage": rng.choice(("full", "concept", None)),
+            "close_date": base + timedelta(days=rng.randrange(10, 200)),
+            "post_date": base,
+            "agency": "Department of Health and Human Services",
+            "url": f"https://www.grants.gov/search-results-detail/{300000 + index}",
+        }
+        for key in rng.sample(field_keys, rng.randint(1, 2)):
+            field_grants[key].append(grant)
+    labels = {key: key.replace("-", " ").title() for key in field_keys}
+    subscribers_map = {key: [] for key in field_keys}
+    for index in range(subscribers):
+        for key in rng.sample(field_keys, rng.randint(1, 3)):
+            subscribers_map[key].append(f"user{index}@example.org")
+    return field_grants, labels, subscribers_map
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--grants", type=int, default=100)
+    parser.add_argument("--fields", type=int, default=25)
+    parser.add_argument("--subscribers", type=int, default=10000)
+    parser.add_argument("--transport", choices=("smtp", "maildir"), default="smtp")
+    parser.add_argument("--workers", type=int, nargs="*", default=[1, 4, 16])
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="per-message delay in the SMTP sink")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    field_grants, labels, subscribers_map = _scenario(args.grants, args.fields, args.subscribers, random.Random(args.seed))
+    loader.get_subscribers_for_fields = lambda fields: subscribers_map
+    os.environ["NOTIFY_TRANSPORT"] = args.transport
+    print(f"grants={args.grants} fields={args.fields} subscribers={args.subscribers} transport={args.transport}")
+
+    if args.transport == "maildir":
+        with tempfile.TemporaryDirectory() as tmp:
+            os.environ["NOTIFY_MAILDIR"] = tmp
+            started = time.perf_counter()
+            loader._notify_subscribers(field_grants, labels)
+            elapsed = time.perf_counter() - started
+            delivered = len(list((Path(tmp) / "new").iterdir()))
+        print(f"maildir      {delivered:6d} messages in {elapsed:7.3f}s ({delivered / elapsed:8.0f} msg/s)")
+        return
+
+    counter = multiprocessing.Value("q", 0)
+    ports = multiprocessing.Queue()
+    sink = multiprocessing.Process(target=_serve_sink, args=(args.latency_ms / 1000.0, counter, ports), daemon=True)
+    sink.start()
+    os.environ["SMTP_HOST"], os.environ["SMTP_PORT"] = "127.0.0.1", str(ports.get(timeout=10))
+    os.environ["SMTP_SECURITY"] = "none"
+    try:
+        for workers in args.workers:
+            os.environ["SMTP_SEND_WORKERS"] = str(workers)
+            before = counter.value
+            started = time.perf_counter()
+            loader._notify_subscribers(field_grants, labels)
+            elapsed = time.perf_counter() - started
+            delivered = counter.value - before
+            print(f"smtp x{workers:<3}    {delivered:6d} messages in {elapsed:7.3f}s ({delivered / elapsed:8.0f} msg/s)")
+    finally:
+        sink.terminate()
+        sink.join()
+
+
+if __name__ == "__main__":
+    main()
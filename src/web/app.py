@@ -1,15 +1,18 @@
 """FastAPI app serving a lightweight grant filter UI."""
 from __future__ import annotations
 
-from datetime import date
-from typing import Dict, List, Optional
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+from typing import AsyncIterator, Dict, List, Optional
+import base64
+import json
 import logging
 
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse
 from pydantic import BaseModel, EmailStr
-from psycopg2.extras import RealDictCursor
+from psycopg.rows import dict_row
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -17,11 +20,25 @@ load_dotenv()
 from doc_checker.config import get_settings
 from .document_checker_routes import router as document_checker_router
 
-from grants.sql_utils import add_subscription, available_subscription_fields, db_connection
+from grants.sql_utils.async_db import (
+    add_subscription_async,
+    async_db_connection,
+    available_subscription_fields_async,
+    close_async_pool,
+    set_keyword_profile_async,
+    subscription_field_label_async,
+)
 
 settings = get_settings()
 
-app = FastAPI(title="GrantWatch Filters")
+
+@asynccontextmanager
+async def _lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    yield
+    await close_async_pool()
+
+
+app = FastAPI(title="GrantWatch Filters", lifespan=_lifespan)
 
 allow_origins = settings.allowed_origins or ["*"]
 app.add_middleware(
@@ -43,6 +60,12 @@ class SubscriptionPayload(BaseModel):
     field: str
 
 
+class KeywordProfilePayload(BaseModel):
+    email: EmailStr
+    keywords: List[str]
+    threshold: int = 1
+
+
 INDEX_HTML = """
 <!doctype html>
 <html lang=\"en\">
@@ -680,80 +703,216 @@ def index() -> str:
     return INDEX_HTML
 
 
+_GRANT_FIELDS = (
+    "opp_id",
+    "title",
+    "stage",
+    "opportunity_status",
+    "opportunity_category",
+    "funding_categories",
+    "post_date",
+    "close_date",
+    "description",
+)
+
+# Listing order, NULL close dates last and NULL post dates first, expressed with
+# sentinels so it matches idx_grants_posted_listing and supports keyset seeks.
+_CLOSE_KEY = "COALESCE(close_date, 'infinity'::timestamp)"
+_POST_KEY = "COALESCE(post_date, 'infinity'::timestamp)"
+
+_KEYSET_CONDITION = f"""{_CLOSE_KEY} >= COALESCE(%(close)s::timestamp, 'infinity'::timestamp)
+        AND (
+            {_CLOSE_KEY} > COALESCE(%(close)s::timestamp, 'infinity'::timestamp)
+            OR {_POST_KEY} < COALESCE(%(post)s::timestamp, 'infinity'::timestamp)
+            OR ({_POST_KEY} = COALESCE(%(post)s::timestamp, 'infinity'::timestamp) AND opp_id > %(opp_id)s)
+        )"""
+
+
+def _encode_cursor(row: Dict[str, object]) -> str:
+    key = [
+        row["close_date"].isoformat() if row.get("close_date") else None,
+        row["post_date"].isoformat() if row.get("post_date") else None,
+        row["opp_id"],
+    ]
+    return base64.urlsafe_b64encode(json.dumps(key).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(token: str) -> Dict[str, object]:
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        close, post, opp_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return {
+            "close": datetime.fromisoformat(close) if close else None,
+            "post": datetime.fromisoformat(post) if post else None,
+            "opp_id": str(opp_id),
+        }
+    except (ValueError, TypeError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor") from None
+
+
+def _projection(fields: Optional[str]) -> List[str]:
+    if not fields:
+        return list(_GRANT_FIELDS)
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = sorted(set(requested) - set(_GRANT_FIELDS))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return [name for name in _GRANT_FIELDS if name in requested]
+
+
+def _grant_item(row: Dict[str, object], projection: List[str]) -> Dict[str, object]:
+    item: Dict[str, object] = {}
+    for name in projection:
+        value = row.get(name)
+        if name in {"post_date", "close_date"}:
+            value = value.isoformat() if value else None
+        item[name] = value
+    return item
+
+
+def _estimated_rows(plan: object) -> Optional[int]:
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    try:
+        return int(plan[0]["Plan"]["Plan Rows"])
+    except (LookupError, TypeError, ValueError):
+        return None
+
+
 @app.get("/api/grants")
-def get_grants(
+async def get_grants(
     stage: Optional[str] = Query(default=None),
     due_from: Optional[date] = Query(default=None),
     due_to: Optional[date] = Query(default=None),
+    field: Optional[str] = Query(default=None, max_length=200),
+    limit: int = Query(default=200, ge=1, le=500),
+    cursor: Optional[str] = Query(default=None, max_length=512),
+    fields: Optional[str] = Query(default=None, max_length=500),
 ):
+    """One page of posted grants.
+
+    Pages are keyset-paginated on ``(close_date, post_date, opp_id)``: pass
+    the returned ``next_cursor`` back as ``cursor`` for the following page.
+    ``fields`` is a comma-separated projection (e.g. leave out
+    ``description``). The first page also carries ``estimated_total``, the
+    planner's row estimate rather than an exact COUNT(*).
+    """
     conditions = ["opportunity_status = 'Posted'"]
-    params: list[object] = []
+    params: Dict[str, object] = {}
 
     if stage and stage not in {"concept", "full"}:
         raise HTTPException(status_code=400, detail="Stage must be 'concept' or 'full'")
 
     if stage:
-        conditions.append("stage = %s")
-        params.append(stage)
+        conditions.append("stage = %(stage)s")
+        params["stage"] = stage
 
     if due_from and due_to and due_from > due_to:
         raise HTTPException(status_code=400, detail="due_from cannot be after due_to")
 
     if due_from:
-        conditions.append("close_date >= %s")
-        params.append(due_from)
+        conditions.append("close_date >= %(due_from)s")
+        params["due_from"] = due_from
 
     if due_to:
-        conditions.append("close_date <= %s")
-        params.append(due_to)
-
-    where_clause = " AND ".join(conditions)
+        conditions.append("close_date <= %(due_to)s")
+        params["due_to"] = due_to
+
+    field_key = (field or "").strip().lower()
+    if field_key:
+        # Containment on field_keys is served by the GIN index.
+        conditions.append("field_keys @> ARRAY[%(field_key)s]::text[]")
+        params["field_key"] = field_key
+
+    projection = _projection(fields)
+    filter_clause = " AND ".join(conditions)
+    page_conditions = list(conditions)
+    if cursor:
+        page_conditions.append(_KEYSET_CONDITION)
+        params.update(_decode_cursor(cursor))
+
+    # Sort keys are always selected so the next cursor can be built.
+    columns = list(dict.fromkeys(["opp_id", "post_date", "close_date", *projection]))
     query = f"""
-        SELECT opp_id,
-               title,
-               stage,
-               opportunity_status,
-               opportunity_category,
-               funding_categories,
-               post_date,
-               close_date,
-               description
+        SELECT {", ".join(columns)}
         FROM grants
-        WHERE {where_clause}
-        ORDER BY close_date NULLS LAST, post_date DESC
-        LIMIT 200
+        WHERE {" AND ".join(page_conditions)}
+        ORDER BY {_CLOSE_KEY}, {_POST_KEY} DESC, opp_id
+        LIMIT %(page_limit)s
     """
+    params["page_limit"] = limit + 1
 
+    estimated_total: Optional[int] = None
     try:
-        with db_connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute(query, params)
-            rows = cur.fetchall()
+        async with async_db_connection() as conn, conn.cursor(row_factory=dict_row) as cur:
+            await cur.execute(query, params)
+            rows = await cur.fetchall()
+            if cursor is None:
+                await cur.execute(f"EXPLAIN (FORMAT JSON) SELECT 1 FROM grants WHERE {filter_clause}", params)
+                plan = await cur.fetchone()
+                estimated_total = _estimated_rows(next(iter(plan.values()))) if plan else None
     except Exception as exc:
         logger.exception("Database query failed when fetching grants")
         raise HTTPException(status_code=500, detail="Database query failed while fetching grants.") from exc
 
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    response: Dict[str, object] = {
+        "results": [_grant_item(row, projection) for row in rows],
+        "next_cursor": _encode_cursor(rows[-1]) if has_more else None,
+    }
+    if cursor is None:
+        response["estimated_total"] = estimated_total
+    return response
+
+@app.get("/api/grants/search")
+async def search_grants(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(default=20, ge=1, le=100),
+    fields: Optional[str] = Query(default=None, max_length=500),
+):
+    """Ranked full-text search over posted grants' titles and descriptions.
+
+    ``q`` accepts web-search syntax (``"exact phrase"``, ``or``, ``-exclude``)
+    and is matched against the GIN-indexed ``search_vector`` column; titles
+    weigh more than descriptions in the ``ts_rank`` ordering.
+    """
+    terms = q.strip()
+    if not terms:
+        raise HTTPException(status_code=400, detail="Search query is required.")
+
+    projection = _projection(fields)
+    columns = list(dict.fromkeys(["opp_id", *projection]))
+    query = f"""
+        SELECT {", ".join(columns)}, ts_rank(search_vector, query) AS rank
+        FROM grants, websearch_to_tsquery('english', %(q)s) AS query
+        WHERE opportunity_status = 'Posted'
+          AND search_vector @@ query
+        ORDER BY rank DESC, opp_id
+        LIMIT %(limit)s
+    """
+
+    try:
+        async with async_db_connection() as conn, conn.cursor(row_factory=dict_row) as cur:
+            await cur.execute(query, {"q": terms, "limit": limit})
+            rows = await cur.fetchall()
+    except Exception as exc:
+        logger.exception("Database query failed when searching grants")
+        raise HTTPException(status_code=500, detail="Database query failed while searching grants.") from exc
+
     results = []
     for row in rows:
-        results.append(
-            {
-                "opp_id": row.get("opp_id"),
-                "title": row.get("title"),
-                "stage": row.get("stage"),
-                "opportunity_status": row.get("opportunity_status"),
-                "opportunity_category": row.get("opportunity_category"),
-                "funding_categories": row.get("funding_categories"),
-                "post_date": row.get("post_date").isoformat() if row.get("post_date") else None,
-                "close_date": row.get("close_date").isoformat() if row.get("close_date") else None,
-                "description": row.get("description"),
-            }
-        )
-
+        item = _grant_item(row, projection)
+        item["rank"] = round(float(row.get("rank") or 0.0), 6)
+        results.append(item)
     return {"results": results}
 
+
 @app.get("/api/subscription-fields")
-def subscription_fields(limit: int = Query(default=200, ge=1, le=500)) -> Dict[str, List[Dict[str, str]]]:
+async def subscription_fields(limit: int = Query(default=200, ge=1, le=500)) -> Dict[str, List[Dict[str, str]]]:
     try:
-        options = available_subscription_fields(limit=limit)
+        options = await available_subscription_fields_async(limit=limit)
     except Exception as exc:
         logger.exception("Database query failed when loading subscription fields")
         raise HTTPException(status_code=500, detail="Database query failed while loading subscription fields.") from exc
@@ -774,17 +933,16 @@ def subscription_fields(limit: int = Query(default=200, ge=1, le=500)) -> Dict[s
 
 
 @app.post("/api/subscriptions")
-def create_subscription(payload: SubscriptionPayload) -> Dict[str, Dict[str, str]]:
+async def create_subscription(payload: SubscriptionPayload) -> Dict[str, Dict[str, str]]:
     field_key = payload.field.strip().lower()
     if not field_key:
         raise HTTPException(status_code=400, detail="Field selection is required.")
 
     try:
-        available = {key.lower(): (label or key) for key, label in available_subscription_fields(limit=500)}
+        label = await subscription_field_label_async(field_key)
     except Exception as exc:
         logger.exception("Database query failed when validating subscription field")
         raise HTTPException(status_code=500, detail="Database query failed while saving the subscription.") from exc
-    label = available.get(field_key)
     if not label:
         if field_key in {"concept", "full"}:
             label = "Concept stage" if field_key == "concept" else "Full stage"
@@ -792,7 +950,7 @@ def create_subscription(payload: SubscriptionPayload) -> Dict[str, Dict[str, str
             raise HTTPException(status_code=400, detail="Unknown field selection.")
 
     try:
-        add_subscription(payload.email, field_key)
+        await add_subscription_async(payload.email, field_key)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     except Exception as exc:
@@ -801,3 +959,16 @@ def create_subscription(payload: SubscriptionPayload) -> Dict[str, Dict[str, str
 
     return {"field": {"key": field_key, "label": label}}
 
+
+@app.post("/api/keyword-profiles")
+async def save_keyword_profile(payload: KeywordProfilePayload) -> Dict[str, object]:
+    """Create or replace the subscriber's keyword profile used by the pipeline."""
+    try:
+        keywords = await set_keyword_profile_async(payload.email, payload.keywords, payload.threshold)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    except Exception as exc:
+        logger.exception("Failed to save keyword profile")
+        raise HTTPException(status_code=500, detail="Database query failed while saving the keyword profile.") from exc
+
+    return {"profile": {"keywords": keywords, "threshold": payload.threshold}}
@@ -0,0 +1,65 @@
+"""Unit tests for subscriber digest grouping and rendering."""
+from __future__ import annotations
+
+import base64
+import email
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+pytest.importorskip("googleapiclient")
+
+from notifications import digest, gmail_notifier
+from notifications.digest import DigestRenderer, collect_payloads
+
+_A = {"opp_id": "A-1", "title": "Clinics", "stage": "full", "close_date": datetime(2026, 9, 1), "post_date": None}
+_B = {"opp_id": "B-2", "title": "Rural <roads>", "close_date": None, "post_date": datetime(2026, 7, 1), "url": "https://x.test/b?a=1&b=2"}
+
+_FIELDS = {"health": [_A, _B], "transport": [_B]}
+_LABELS = {"health": "Health", "transport": "Transport"}
+
+
+def test_same_subscriptions_share_payload_and_body():
+    subscribers = {"health": ["a@x.org", "b@x.org", "c@x.org"], "transport": ["c@x.org"]}
+    payloads = collect_payloads(_FIELDS, _LABELS, subscribers)
+    assert payloads["a@x.org"] is payloads["b@x.org"] is not payloads["c@x.org"]
+
+    messages = DigestRenderer().render_all(payloads)
+    a, b, c = messages
+    assert (a.recipients, b.recipients, c.recipients) == (("a@x.org",), ("b@x.org",), ("c@x.org",))
+    assert a.body is b.body and a.subject == "GrantWatch: new grants in Health"
+    assert "Matches: Health, Transport" in c.body
+    assert a.body.index("Clinics (ID: A-1)") < a.body.index("Due Sep 01, 2026") < a.body.index("(ID: B-2)")
+
+
+def test_profile_matches_do_not_leak_into_shared_payloads():
+    subscribers = {"health": ["a@x.org", "b@x.org"]}
+    payloads = collect_payloads(_FIELDS, _LABELS, subscribers, {"b@x.org": [(_A, ["clinic"])]})
+
+    assert "key" in payloads["a@x.org"] and "key" not in payloads["b@x.org"]
+    assert payloads["a@x.org"]["grants"]["A-1"]["matched_fields"] == {"Health"}
+    assert payloads["b@x.org"]["grants"]["A-1"]["matched_fields"] == {"Health", '"clinic"'}
+    a, b = DigestRenderer().render_all(payloads)
+    assert '"clinic"' in b.body and '"clinic"' not in a.body
+
+
+def test_html_template_is_escaped_and_sent_as_alternative(monkeypatch):
+    monkeypatch.setenv("NOTIFY_DIGEST_HTML_TEMPLATE", "default")
+    payloads = collect_payloads(_FIELDS, _LABELS, {"transport": ["a@x.org"]})
+    (message,) = digest.render_digests(payloads)
+
+    assert "Rural &lt;roads&gt;" in message.html
+    assert 'href="https://x.test/b?a=1&amp;b=2"' in message.html
+    raw = gmail_notifier._build_message("s@x.org", ["a@x.org"], message.subject, message.body, message.html)["raw"]
+    parsed = email.message_from_bytes(base64.urlsafe_b64decode(raw))
+    assert [part.get_content_type() for part in parsed.walk()][1:] == ["text/plain", "text/html"]
+
+
+def test_missing_template_falls_back_to_plain_text(monkeypatch, tmp_path):
+    monkeypatch.setenv("NOTIFY_DIGEST_HTML_TEMPLATE", str(tmp_path / "missing.html"))
+    (message,) = digest.render_digests(collect_payloads(_FIELDS, _LABELS, {"health": ["a@x.org"]}))
+    assert message.html is None
@@ -0,0 +1,106 @@
+"""Unit tests for the conditional, resumable extract downloader."""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+requests = pytest.importorskip("requests")
+
+from grants_data import download_extract
+
+_PAYLOAD = bytes(range(256)) * 40
+
+
+class _FakeResponse:
+    def __init__(self, status_code, body=b"", headers=None, fail_after=None):
+        self.status_code = status_code
+        self.headers = {"Content-Length": str(len(body)), **(headers or {})}
+        self._body = body
+        self._fail_after = fail_after
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.RequestException(f"HTTP {self.status_code}")
+
+    def iter_content(self, chunk_size):
+        sent = 0
+        for start in range(0, len(self._body), 1000):
+            if self._fail_after is not None and sent >= self._fail_after:
+                raise requests.RequestException("connection reset")
+            chunk = self._body[start:start + 1000]
+            sent += len(chunk)
+            yield chunk
+
+
+@pytest.fixture(autouse=True)
+def _no_sleep(monkeypatch):
+    monkeypatch.setattr(download_extract.time, "sleep", lambda _seconds: None)
+
+
+class TestResumableDownload:
+    def test_interrupted_download_resumes_with_range(self, tmp_path, monkeypatch):
+        calls = []
+
+        def fake_get(url, stream, timeout, headers):
+            calls.append(headers)
+            if not headers:
+                return _FakeResponse(200, _PAYLOAD, fail_after=4000)
+            offset = int(headers["Range"].split("=")[1].rstrip("-"))
+            return _FakeResponse(206, _PAYLOAD[offset:])
+
+        monkeypatch.setattr(download_extract.requests, "get", fake_get)
+        destination = tmp_path / "extract.zip"
+        validators = {"etag": '"v1"', "content_length": str(len(_PAYLOAD))}
+
+        assert download_extract._download_zip("https://x/e.zip", destination, validators)
+        assert destination.read_bytes() == _PAYLOAD
+        assert calls[1] == {"Range": "bytes=4000-", "If-Range": '"v1"'}
+        assert not destination.with_name("extract.zip.part").exists()
+
+    def test_changed_extract_restarts_from_scratch(self, tmp_path, monkeypatch):
+        destination = tmp_path / "extract.zip"
+        destination.with_name("extract.zip.part").write_bytes(b"stale bytes")
+        monkeypatch.setattr(
+            download_extract.requests,
+            "get",
+            lambda url, stream, timeout, headers: _FakeResponse(200, _PAYLOAD),
+        )
+
+        assert download_extract._download_zip("https://x/e.zip", destination, {"etag": '"v2"'})
+        assert destination.read_bytes() == _PAYLOAD
+
+
+class TestConditionalDownload:
+    def test_processed_version_is_skipped(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(download_extract, "_DATA_DIR", tmp_path)
+        monkeypatch.setattr(download_extract, "_STATE_PATH", tmp_path / "state.json")
+        monkeypatch.setattr(
+            download_extract,
+            "_find_available_extract",
+            lambda: ("https://x/GrantsDBExtract20260701v2.zip", {"etag": '"v1"'}),
+        )
+        download_extract._save_state(
+            {"url": "https://x/GrantsDBExtract20260701v2.zip", "etag": '"v1"', "processed": True}
+        )
+
+        def fail_download(*_args):
+            raise AssertionError("unchanged extract must not be downloaded")
+
+        monkeypatch.setattr(download_extract, "_download_zip", fail_download)
+        assert download_extract.gen_extract()
+        assert download_extract.gen_extract.unchanged
+        assert download_extract.gen_extract.last_extract_path is None
+
+    def test_missing_validators_never_match(self):
+        state = {"url": "u", "etag": None}
+        assert not download_extract._same_version(state, "u", {})
@@ -9,6 +9,8 @@ REPO_ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(REPO_ROOT))
 sys.path.insert(0, str(REPO_ROOT / "aws" / "lambda"))
 
+from grants_data.extract_state import FingerprintStore
+from grants_data import parse_extract
 from grants_data.parse_extract import process_extract_xml
 
 _SAMPLE_XML = textwrap.dedent(
@@ -27,6 +29,8 @@ _SAMPLE_XML = textwrap.dedent(
             <PostDate>07012026</PostDate>
             <CloseDate>12312026</CloseDate>
             <Description>Community development funding.</Description>
+            <Version>Synopsis 2</Version>
+            <LastUpdatedDate>07022026</LastUpdatedDate>
         </OpportunitySynopsisDetail_1_0>
         <OpportunityForecastDetail_1_0>
             <OpportunityID>360671</OpportunityID>
@@ -70,9 +74,180 @@ class TestParseExtract:
         assert len(records) == 1
         assert records[0]["OPPORTUNITY_STATUS"] == "Posted"
 
+    def test_parses_straight_from_zip(self, tmp_path):
+        import zipfile
+
+        xml_file = tmp_path / "extract.xml"
+        xml_file.write_text(_SAMPLE_XML, encoding="utf-8")
+        zip_file = tmp_path / "GrantsDBExtract20260701v2.zip"
+        with zipfile.ZipFile(zip_file, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            archive.write(xml_file, "GrantsDBExtract20260701v2.xml")
+
+        assert process_extract_xml(zip_file, workers=4) == process_extract_xml(xml_file)
+
     def test_missing_file_returns_empty(self, tmp_path):
         assert process_extract_xml(tmp_path / "nope.xml") == []
 
+    def test_incremental_skips_unchanged_opportunities(self, tmp_path):
+        xml_file = tmp_path / "extract.xml"
+        xml_file.write_text(_SAMPLE_XML, encoding="utf-8")
+        state_file = tmp_path / "state.json"
+
+        first = FingerprintStore(state_file)
+        assert len(process_extract_xml(xml_file, fingerprints=first)) == 2
+        first.commit()
+
+        # The synopsis carries a version and is skipped; the forecast has no
+        # fingerprint and is always re-processed.
+        second = FingerprintStore(state_file)
+        records = process_extract_xml(xml_file, fingerprints=second)
+        assert [record["OPPORTUNITY_NUMBER"] for record in records] == ["FC-26"]
+        assert second.unchanged == 1
+
+        xml_file.write_text(_SAMPLE_XML.replace("Synopsis 2", "Synopsis 3"), encoding="utf-8")
+        third = FingerprintStore(state_file)
+        assert len(process_extract_xml(xml_file, fingerprints=third)) == 2
+
+    def test_uncommitted_fingerprints_are_not_persisted(self, tmp_path):
+        xml_file = tmp_path / "extract.xml"
+        xml_file.write_text(_SAMPLE_XML, encoding="utf-8")
+        state_file = tmp_path / "state.json"
+
+        process_extract_xml(xml_file, fingerprints=FingerprintStore(state_file))
+        assert not state_file.exists()
+        assert len(process_extract_xml(xml_file, fingerprints=FingerprintStore(state_file))) == 2
+
+
+class TestParserBackends:
+    def test_lxml_records_match_stdlib(self, tmp_path):
+        import pytest
+
+        pytest.importorskip("lxml")
+        xml_file = tmp_path / "extract.xml"
+        xml_file.write_text(
+            _SAMPLE_XML.replace(
+                "<OpportunityTitle>Sample Grant</OpportunityTitle>",
+                "<!-- note --><OpportunityTitle></OpportunityTitle>"
+                "<OpportunityTitle>Second</OpportunityTitle>"
+                "<CFDANumbers> 10.1 </CFDANumbers><CFDANumbers>10.2</CFDANumbers>",
+            ),
+            encoding="utf-8",
+        )
+
+        stdlib = process_extract_xml(xml_file, backend="stdlib")
+        assert stdlib[0]["OPPORTUNITY_TITLE"] is None
+        assert stdlib[0]["ASSISTANCE_LISTINGS"] == "10.1; 10.2"
+        assert process_extract_xml(xml_file, backend="lxml") == stdlib
+
+    def test_unknown_backend_falls_back(self):
+        assert parse_extract.parser_backend("expat") in {"lxml", "stdlib"}
+        assert parse_extract.parser_backend("stdlib") == "stdlib"
+
+
+def _many_opportunities(count: int) -> str:
+    synopsis = _SAMPLE_XML.split("<OpportunitySynopsisDetail_1_0>")[1].split(
+        "</OpportunitySynopsisDetail_1_0>"
+    )[0]
+    body = "".join(
+        "<OpportunitySynopsisDetail_1_0>"
+        + synopsis.replace("360670", str(400000 + i)).replace("SW-26", f"SW-{i}")
+        + "</OpportunitySynopsisDetail_1_0>\n"
+        for i in range(count)
+    )
+    head, tail = _SAMPLE_XML.split("<OpportunitySynopsisDetail_1_0>", 1)
+    return head + body + tail.split("</OpportunitySynopsisDetail_1_0>", 1)[1]
+
+
+class TestParallelParse:
+    def test_shards_match_sequential_order(self, tmp_path, monkeypatch):
+        xml_file = tmp_path / "extract.xml"
+        xml_file.write_text(_many_opportunities(200), encoding="utf-8")
+        monkeypatch.setattr(parse_extract, "_MIN_SHARD_BYTES", 1)
+
+        sequential = process_extract_xml(xml_file, workers=1)
+        parallel = process_extract_xml(xml_file, workers=3)
+        assert len(sequential) == 201
+        assert parallel == sequential
+
+    def test_worker_count_from_env(self, monkeypatch):
+        monkeypatch.setattr(parse_extract.os, "cpu_count", lambda: 6)
+        for raw, expected in (("auto", 6), (" 0 ", 6), ("3", 3), ("-2", 1), ("many", 1), ("", 1)):
+            monkeypatch.setenv("GRANTS_EXTRACT_WORKERS", raw)
+            assert parse_extract.extract_workers() == expected
+
+    def test_shard_ranges_start_at_opportunities(self, tmp_path):
+        xml_file = tmp_path / "extract.xml"
+        xml_file.write_text(_many_opportunities(50), encoding="utf-8")
+        prologue, epilogue, ranges = parse_extract._shard_ranges(xml_file, 4)
+
+        data = xml_file.read_bytes()
+        assert prologue.rstrip().endswith(b'OpportunityDetail-V1.0">')
+        assert epilogue.strip() == b"</Grants>"
+        assert len(ranges) == 4
+        assert all(data[start:start + 12] == b"<Opportunity" for start, _end in ranges)
+        assert all(ranges[i][1] == ranges[i + 1][0] for i in range(len(ranges) - 1))
+
+    def test_parallel_incremental_merges_worker_fingerprints(self, tmp_path, monkeypatch):
+        xml_file = tmp_path / "extract.xml"
+        xml_file.write_text(_many_opportunities(40), encoding="utf-8")
+        monkeypatch.setattr(parse_extract, "_MIN_SHARD_BYTES", 1)
+        state_file = tmp_path / "state.json"
+
+        first = FingerprintStore(state_file)
+        assert len(process_extract_xml(xml_file, fingerprints=first, workers=2)) == 41
+        assert first.pending == 40
+        first.commit()
+
+        second = FingerprintStore(state_file)
+        records = process_extract_xml(xml_file, fingerprints=second, workers=2)
+        assert [record["OPPORTUNITY_NUMBER"] for record in records] == ["FC-26"]
+        assert second.unchanged == 40
+
+    def test_workers_return_only_staged_fingerprints(self, tmp_path, monkeypatch):
+        xml_file = tmp_path / "extract.xml"
+        xml_file.write_text(_many_opportunities(3), encoding="utf-8")
+        prologue, epilogue, ((start, end),) = parse_extract._shard_ranges(xml_file, 1)
+        monkeypatch.setattr(parse_extract, "_worker_seen", {"Posted:400000": "Synopsis 2|07022026"})
+
+        task = (str(xml_file), prologue, epilogue, start, end, True, "stdlib")
+        records, counts, staged, unchanged = parse_extract._parse_shard(task)
+        assert unchanged == 1 and len(records) == 3
+        assert isinstance(staged, dict) and "Posted:400000" not in staged
+
+    def test_shards_in_flight_are_bounded(self, tmp_path, monkeypatch):
+        xml_file = tmp_path / "extract.xml"
+        xml_file.write_text(_many_opportunities(200), encoding="utf-8")
+        monkeypatch.setattr(parse_extract, "_MIN_SHARD_BYTES", 1)
+        peak = []
+
+        class _InlinePool:
+            def __init__(self, max_workers, initializer, initargs):
+                initializer(*initargs)
+                self.outstanding = 0
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def submit(self, fn, task):
+                pool = self
+                pool.outstanding += 1
+                peak.append(pool.outstanding)
+
+                class _Done:
+                    def result(self):
+                        pool.outstanding -= 1
+                        return fn(task)
+
+                return _Done()
+
+        monkeypatch.setattr(parse_extract, "ProcessPoolExecutor", _InlinePool)
+        records = list(parse_extract.iter_extract_xml(xml_file, workers=2))
+        assert len(records) == 201
+        assert len(peak) == 8 and max(peak) == 3
+
 
 class TestLambdaEventParsing:
     def test_eventbridge_shape(self):
@@ -110,3 +285,115 @@ class TestLambdaEventParsing:
 
         assert validate_doc._extract_object_events({}) == []
         assert validate_doc._extract_object_events({"detail": {}}) == []
+
+
+def _pdf_bytes(pages):
+    """Minimal valid PDF with one Helvetica text line per page."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode("latin-1")
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream.decode('latin-1')}\nendstream")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {len(objects)} 0 R "
+            "/Resources << /Font << /F1 3 0 R >> >> >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(pages)} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    return bytes(out)
+
+
+class _Body:
+    def __init__(self, data):
+        self._data = data
+
+    def iter_chunks(self, chunk_size):
+        for start in range(0, len(self._data), chunk_size):
+            yield self._data[start:start + chunk_size]
+
+    def close(self):
+        pass
+
+
+class _FakeS3:
+    def __init__(self, data):
+        self.data = data
+
+    def head_object(self, Bucket, Key):
+        return {"ContentLength": len(self.data), "ContentType": "application/pdf"}
+
+    def get_object(self, Bucket, Key):
+        return {"Body": _Body(self.data)}
+
+
+class TestLambdaPdfValidation:
+    @staticmethod
+    def _run(monkeypatch, data, **requirement):
+        import validate_doc
+
+        updates = []
+        extracted = []
+        original_extract = validate_doc.Page.extract_text
+
+        def counting_extract(page, *args, **kwargs):
+            extracted.append(page.page_number)
+            return original_extract(page, *args, **kwargs)
+
+        monkeypatch.setattr(validate_doc, "s3", _FakeS3(data))
+        monkeypatch.setattr(validate_doc.Page, "extract_text", counting_extract)
+        monkeypatch.setattr(validate_doc.service, "update_file_status", lambda *args, **kwargs: updates.append((args, kwargs)))
+        monkeypatch.setattr(validate_doc, "_recalculate_overall", lambda sid: None)
+        monkeypatch.setattr(validate_doc.settings, "default_max_pages", requirement.get("max_pages", 50))
+        monkeypatch.setattr(
+            validate_doc,
+            "get_manifest",
+            lambda opp: {"documents": [{"id": "narrative", "max_mb": 25, **requirement}]},
+        )
+        monkeypatch.setattr(validate_doc, "_lookup_requirement", lambda manifest, req_id: manifest["documents"][0])
+        monkeypatch.setattr(validate_doc.service, "get_submission", lambda sid: {"opportunity_id": "OPP", "files": {}})
+
+        validate_doc._process_object("bucket", "submissions/s1/narrative/1-file.pdf")
+        (args, kwargs), = updates
+        return args[2], args[3], kwargs["extra"]["page_count"], extracted
+
+    def test_page_limit_fails_before_any_text_is_extracted(self, monkeypatch):
+        data = _pdf_bytes([f"Page {n}" for n in range(6)])
+        status, messages, page_count, extracted = self._run(
+            monkeypatch, data, max_pages=5, required_sections=["Budget"]
+        )
+        assert (status, page_count, extracted) == ("invalid", 6, [])
+        assert messages[0] == "PDF has 6 pages; limit is 5"
+
+    def test_stops_reading_once_all_sections_are_found(self, monkeypatch):
+        data = _pdf_bytes(["Project Summary", "Budget Justification", "Appendix", "Appendix", "Appendix"])
+        status, messages, page_count, extracted = self._run(
+            monkeypatch, data, max_pages=10, required_sections=["project summary", "Budget"]
+        )
+        assert (status, messages, page_count, extracted) == ("valid", [], 5, [1, 2])
+
+    def test_missing_sections_read_every_page(self, monkeypatch):
+        data = _pdf_bytes(["Project Summary", "Appendix", "Appendix"])
+        status, messages, _count, extracted = self._run(
+            monkeypatch, data, max_pages=10, required_sections=["Budget", "Project Summary"]
+        )
+        assert status == "invalid" and messages == ["Missing sections: Budget"]
+        assert extracted == [1, 2, 3]
+
+    def test_no_sections_means_no_extraction(self, monkeypatch):
+        status, _messages, page_count, extracted = self._run(monkeypatch, _pdf_bytes(["a", "b"]), max_pages=10)
+        assert (status, page_count, extracted) == ("valid", 2, [])
+
+    def test_unreadable_pdf_is_an_error(self, monkeypatch):
+        status, messages, page_count, _extracted = self._run(monkeypatch, b"not a pdf", max_pages=10)
+        assert status == "error" and page_count is None
+        assert messages[0].startswith("Failed to read PDF")
@@ -0,0 +1,110 @@
+"""Unit tests for the Gmail session: client reuse, retries and fan-out."""
+from __future__ import annotations
+
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+httplib2 = pytest.importorskip("httplib2")
+pytest.importorskip("googleapiclient")
+
+from googleapiclient.errors import HttpError
+
+from notifications import gmail_notifier
+from notifications.gmail_notifier import GmailSession, OutgoingEmail
+
+
+def _http_error(status, content=b"{}", **headers):
+    return HttpError(httplib2.Response({"status": status, **headers}), content)
+
+
+class _FakeService:
+    def __init__(self, outcomes, sent):
+        self._outcomes = outcomes
+        self._sent = sent
+
+    def users(self):
+        return self
+
+    def messages(self):
+        return self
+
+    def send(self, userId, body):
+        self._body = body
+        return self
+
+    def execute(self):
+        outcome = self._outcomes.pop(0) if self._outcomes else None
+        if outcome is not None:
+            raise outcome
+        self._sent.append(self._body["raw"])
+        return {"id": "m"}
+
+
+@pytest.fixture
+def fake_gmail(monkeypatch):
+    state = {"builds": 0, "outcomes": [], "sent": [], "sleeps": [], "lock": threading.Lock()}
+
+    def fake_build(*args, **kwargs):
+        with state["lock"]:
+            state["builds"] += 1
+        return _FakeService(state["outcomes"], state["sent"])
+
+    monkeypatch.setattr(gmail_notifier, "build", fake_build)
+    monkeypatch.setattr(gmail_notifier, "_sleep", state["sleeps"].append)
+    monkeypatch.setattr(gmail_notifier, "_load_credentials", lambda: object())
+    return state
+
+
+def test_session_reuses_one_client(fake_gmail):
+    session = GmailSession(sender="bot@example.org")
+    assert session.send("s", "b", ["a@example.org"])
+    assert session.send("s", "b", ["b@example.org"])
+    assert fake_gmail["builds"] == 1 and len(fake_gmail["sent"]) == 2
+
+
+def test_rate_limits_are_retried_with_backoff(fake_gmail):
+    fake_gmail["outcomes"].extend(
+        [_http_error(429, **{"retry-after": "3"}), _http_error(403, b'{"reason": "userRateLimitExceeded"}')]
+    )
+    assert GmailSession().send("s", "b", ["a@example.org"])
+    assert fake_gmail["sleeps"][0] == 3.0 and len(fake_gmail["sleeps"]) == 2
+
+
+def test_long_retry_after_is_not_waited_out(fake_gmail):
+    fake_gmail["outcomes"].append(_http_error(429, **{"retry-after": "3600"}))
+    assert not GmailSession().send("s", "b", ["a@example.org"])
+    assert fake_gmail["sleeps"] == []
+
+
+def test_permanent_errors_are_not_retried(fake_gmail, monkeypatch):
+    fake_gmail["outcomes"].append(_http_error(400))
+    assert not GmailSession().send("s", "b", ["a@example.org"])
+    assert fake_gmail["sleeps"] == []
+
+    monkeypatch.setenv("GMAIL_SEND_RETRIES", "2")
+    fake_gmail["outcomes"].extend([_http_error(503)] * 3)
+    assert not GmailSession().send("s", "b", ["a@example.org"])
+    assert len(fake_gmail["sleeps"]) == 2
+
+
+def test_send_many_fans_out_in_order(fake_gmail, monkeypatch):
+    monkeypatch.setenv("GMAIL_SEND_WORKERS", "3")
+    messages = [OutgoingEmail("s", f"b{i}", (f"u{i}@example.org",)) for i in range(20)]
+    messages.append(OutgoingEmail("s", "b", ("  ",)))
+
+    results = GmailSession().send_many(messages)
+
+    assert results == [True] * 20 + [False]
+    assert len(fake_gmail["sent"]) == 20
+    assert fake_gmail["builds"] <= 3
+
+
+def test_missing_credentials_send_nothing(fake_gmail, monkeypatch):
+    monkeypatch.setattr(gmail_notifier, "_load_credentials", lambda: None)
+    assert gmail_notifier.send_grant_notifications([OutgoingEmail("s", "b", ("a@example.org",))]) == [False]
+    assert fake_gmail["builds"] == 0
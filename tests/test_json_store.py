@@ -0,0 +1,82 @@
+"""Unit tests for export persistence formats."""
+from __future__ import annotations
+
+import gzip
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from grants_data import download_json, get_file_path, json_store
+from grants_data.get_json_data import ExportReadError, iter_json_data, process_json_data
+from grants_data.grant_record import GrantRecord
+
+_ROWS = [
+    {"OPPORTUNITY_NUMBER": "A-1", "AGENCY_NAME": "NSF", "FUNDING_DESCRIPTION": "línea 1\nlínea 2", "N": 3},
+    {"OPPORTUNITY_NUMBER": "B-2", "AGENCY_NAME": None, "AWARD_CEILING": 1.5},
+]
+
+
+@pytest.mark.parametrize("fmt", ["jsonl.gz", "jsonl", "json", "jsonl.zst"])
+def test_round_trip(tmp_path, monkeypatch, fmt):
+    if fmt == "jsonl.zst" and json_store._zstd is None:
+        pytest.skip("zstandard not installed")
+    monkeypatch.setenv("GRANTS_JSON_FORMAT", fmt)
+    path = json_store.write_records(iter(_ROWS), tmp_path, "grants_20260701T000000Z")
+
+    assert path.name == f"grants_20260701T000000Z.{fmt}"
+    assert json_store.load_records(path) == _ROWS
+    assert [p.name for p in tmp_path.iterdir()] == [path.name]
+
+
+def test_unknown_format_falls_back_to_gzip(tmp_path, monkeypatch):
+    monkeypatch.setenv("GRANTS_JSON_FORMAT", "parquet")
+    path = json_store.write_records(_ROWS, tmp_path, "grants_x")
+    with gzip.open(path, "rt", encoding="utf-8") as fp:
+        assert [json.loads(line) for line in fp] == _ROWS
+
+
+def test_failed_write_leaves_nothing(tmp_path):
+    def rows():
+        yield _ROWS[0]
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        json_store.write_records(rows(), tmp_path, "grants_x")
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_download_output_is_found_and_loaded(tmp_path, monkeypatch):
+    monkeypatch.setattr(download_json, "_DATA_DIR", tmp_path)
+    monkeypatch.setattr(get_file_path, "_DATA_DIR", tmp_path)
+    legacy = tmp_path / "grants_20200101T000000Z.json"
+    legacy.write_text(json.dumps(_ROWS, indent=2), encoding="utf-8")
+
+    written = download_json._write_output(_ROWS)
+    latest = get_file_path.get_latest_file_path()
+
+    assert latest in {written, legacy} and written.suffix == ".gz"
+    for path in (written, legacy):
+        records = process_json_data(path)
+        assert all(isinstance(record, GrantRecord) for record in records)
+        assert records == list(iter_json_data(path))
+        assert records[0]["AGENCY"] == "NSF"
+
+
+def test_truncated_file_fails_to_load(tmp_path):
+    path = tmp_path / "grants_x.jsonl.gz"
+    path.write_bytes(gzip.compress(b'{"A": 1}\n{"B": 2}\n')[:-12])
+    assert process_json_data(path) == []
+    bad = tmp_path / "grants_y.jsonl"
+    bad.write_text('{"A": 1}\nnot json\n', encoding="utf-8")
+    assert process_json_data(bad) == []
+    streamed = []
+    with pytest.raises(ExportReadError):
+        for record in iter_json_data(bad):
+            streamed.append(dict(record)["A"])
+    assert streamed == [1]
+    with pytest.raises(ExportReadError):
+        list(iter_json_data(path))
@@ -0,0 +1,145 @@
+"""Unit tests for the COPY-based bulk upsert in the grants loader."""
+from __future__ import annotations
+
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+pytest.importorskip("psycopg2")
+pytest.importorskip("googleapiclient")
+
+from grants.data import loader
+from grants.sql_utils import refresh_field_catalog
+
+
+class _FakeCursor:
+    def __init__(self, merge_result):
+        self.statements = []
+        self.copied = ""
+        self._merge_result = merge_result
+
+    def execute(self, sql, params=None):
+        self.statements.append(sql)
+
+    def copy_expert(self, sql, buffer):
+        self.statements.append(sql)
+        self.copied = buffer.read()
+
+    def fetchall(self):
+        return self._merge_result
+
+
+def _row(opp_id, title="Grant", description="Text"):
+    return loader._prepare_grant(
+        {
+            "OPPORTUNITY_NUMBER": opp_id,
+            "OPPORTUNITY_TITLE": title,
+            "FUNDING_DESCRIPTION": description,
+            "POSTED_DATE": "07/01/2026",
+        }
+    )
+
+
+class TestCopyValue:
+    def test_null_and_escapes(self):
+        assert loader._copy_value(None) == "\\N"
+        assert loader._copy_value("a\tb\nc\\d") == "a\\tb\\nc\\\\d"
+
+    def test_datetime_uses_space_separator(self):
+        assert loader._copy_value(datetime(2026, 7, 1)) == "2026-07-01 00:00:00"
+
+    def test_list_becomes_quoted_array_literal(self):
+        assert loader._copy_value([]) == "{}"
+        assert loader._copy_value(["health", 'a "b"', "c,d"]) == '{"health","a \\\\"b\\\\"","c,d"}'
+
+
+class TestFieldKeys:
+    def test_prepare_grant_collects_lowercased_keys(self):
+        row = loader._prepare_grant(
+            {
+                "OPPORTUNITY_NUMBER": "F-1",
+                "OPPORTUNITY_CATEGORY": "Discretionary",
+                "FUNDING_CATEGORIES": ["Health", "Science/Technology", "health"],
+            }
+        )
+        assert row["funding_categories"] == "Health; Science; Technology; health"
+        assert row["field_keys"] == ["discretionary", "health", "science", "technology"]
+
+    def test_prepare_grant_without_categories(self):
+        assert _row("F-2")["field_keys"] == []
+
+    def test_catalog_is_built_from_field_keys(self):
+        schema = (Path(loader.__file__).resolve().parents[1] / "sql_utils" / "schema.sql").read_text()
+        catalog = schema[schema.index("CREATE MATERIALIZED VIEW IF NOT EXISTS grant_field_catalog"):]
+        catalog = catalog[: catalog.index(";\n")]
+        assert "unnest(field_keys)" in catalog
+        assert f"'{loader._SPLIT_PATTERN.pattern}'" in catalog
+        assert "string_to_array" not in catalog
+
+
+class TestBulkUpsert:
+    def test_streams_rows_and_returns_only_new(self):
+        cur = _FakeCursor([("A-1", True), ("B-2", False)])
+        rows = [_row("A-1"), _row("B-2", description="multi\nline")]
+        new_rows = loader._bulk_upsert(cur, rows)
+
+        assert [row["opp_id"] for row in new_rows] == ["A-1"]
+        lines = cur.copied.splitlines()
+        assert len(lines) == 2
+        assert lines[0].split("\t")[:2] == ["0", "A-1"]
+        assert "multi\\nline" in lines[1]
+        assert any(stmt.startswith("COPY grants_staging") for stmt in cur.statements)
+
+    def test_duplicate_ids_keep_last_record(self):
+        cur = _FakeCursor([("A-1", True)])
+        rows = [_row("A-1", title="Old"), _row("A-1", title="New")]
+        new_rows = loader._bulk_upsert(cur, rows)
+        assert [row["title"] for row in new_rows] == ["New"]
+
+
+class _CatalogCursor:
+    def __init__(self, exists):
+        self.statements = []
+        self._exists = exists
+
+    def execute(self, sql, params=None):
+        self.statements.append(sql)
+
+    def fetchone(self):
+        return (self._exists,)
+
+
+class TestFieldCatalogRefresh:
+    def test_refreshes_existing_view(self):
+        cur = _CatalogCursor(exists=True)
+        assert refresh_field_catalog(cur) is True
+        assert cur.statements[-1].startswith("REFRESH MATERIALIZED VIEW CONCURRENTLY grant_field_catalog")
+
+    def test_skips_missing_view(self):
+        cur = _CatalogCursor(exists=False)
+        assert refresh_field_catalog(cur) is False
+        assert not any(stmt.startswith("REFRESH") for stmt in cur.statements)
+
+
+class TestProfileNotifications:
+    def test_profile_matches_are_emailed(self, monkeypatch):
+        sent = []
+        monkeypatch.setattr(loader, "get_subscribers_for_fields", lambda fields: {})
+        monkeypatch.setattr(
+            loader,
+            "send_grant_notifications",
+            lambda messages: [sent.append((m.subject, m.body, list(m.recipients))) or True for m in messages],
+        )
+        grant = {"opp_id": "K-1", "title": "Rural broadband", "close_date": None, "post_date": None}
+
+        loader._notify_subscribers({}, {}, {"a@example.org": [(grant, ["rural", "broadband"])]})
+
+        assert len(sent) == 1
+        subject, body, to = sent[0]
+        assert to == ["a@example.org"]
+        assert '"broadband", "rural"' in subject
+        assert "Rural broadband (ID: K-1)" in body
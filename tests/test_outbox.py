@@ -0,0 +1,210 @@
+"""Unit tests for the notification outbox: enqueue, claim and dispatch."""
+from __future__ import annotations
+
+import json
+import sys
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+pytest.importorskip("psycopg2")
+pytest.importorskip("googleapiclient")
+
+from grants.data import loader, outbox
+from notifications.digest import collect_payloads
+
+
+class _OutboxCursor:
+    """Cursor double for a table exists check, an enqueue and a claim."""
+
+    def __init__(self, exists=True, claims=()):
+        self.exists = exists
+        self.claims = list(claims)
+        self.executed = []
+        self._result = []
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+        if "to_regclass" in sql:
+            self._result = [(self.exists,)]
+        elif "WITH candidates AS" in sql:
+            self._result = self.claims.pop(0) if self.claims else []
+        elif "FROM grant_subscriptions" in sql:
+            self._result = [("health", "field@example.org")]
+        else:
+            self._result = []
+
+    def fetchone(self):
+        return self._result[0] if self._result else None
+
+    def fetchall(self):
+        return self._result
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _Conn:
+    def __init__(self, cur):
+        self._cur = cur
+
+    def cursor(self):
+        return self._cur
+
+
+class _Transport:
+    name = "fake"
+    ready = True
+
+    def __init__(self, outcomes=None):
+        self.outcomes = outcomes or {}
+        self.sent = []
+
+    def send_many(self, messages):
+        self.sent.extend(messages)
+        return [self.outcomes.get(m.recipients[0], True) for m in messages]
+
+    def close(self):
+        pass
+
+
+def _use_cursor(monkeypatch, module, cur):
+    @contextmanager
+    def fake_connection():
+        yield _Conn(cur)
+
+    monkeypatch.setattr(module, "db_connection", fake_connection)
+
+
+def _grant(opp_id, close=None):
+    return {"opp_id": opp_id, "title": f"Grant {opp_id}", "stage": "full", "close_date": close, "post_date": None}
+
+
+def _claimed(row_id, email, opp_id, matched, close=None):
+    data = {"title": f"Grant {opp_id}", "stage": "full", "close_date": close, "post_date": None}
+    return (row_id, email, opp_id, matched, json.dumps(data))
+
+
+def test_enqueue_writes_one_row_per_email_and_grant(monkeypatch):
+    captured = {}
+
+    def fake_execute_values(cur, sql, values, **kwargs):
+        captured["values"] = values
+        return [(index,) for index, _ in enumerate(values)]
+
+    monkeypatch.setattr(outbox, "execute_values", fake_execute_values)
+    payloads = collect_payloads(
+        {"health": [_grant("A-1", datetime(2026, 9, 1))]},
+        {"health": "Health"},
+        {"health": ["x@example.org"]},
+        {"x@example.org": [(_grant("A-1"), ["rural"])], "y@example.org": [(_grant("B-2"), ["rural"])]},
+    )
+
+    assert outbox.enqueue_notifications(_OutboxCursor(), payloads) == 2
+    rows = {(email, opp_id): (matched, json.loads(data)) for email, opp_id, matched, data in captured["values"]}
+    assert rows[("x@example.org", "A-1")][0] == ['"rural"', "Health"]
+    assert rows[("x@example.org", "A-1")][1]["close_date"] == "2026-09-01T00:00:00"
+    assert set(rows) == {("x@example.org", "A-1"), ("y@example.org", "B-2")}
+
+
+def test_enqueue_reports_missing_table():
+    assert outbox.enqueue_notifications(_OutboxCursor(exists=False), {"x@example.org": {}}) is None
+
+
+def test_loader_queues_alerts_inside_the_load_transaction(monkeypatch):
+    cur = _OutboxCursor()
+    queued = []
+    _use_cursor(monkeypatch, loader, cur)
+    monkeypatch.setattr(loader, "_upsert_rows", lambda cur, batch: batch)
+    monkeypatch.setattr(loader, "enqueue_notifications", lambda c, payloads: queued.append((c, payloads)) or 1)
+    monkeypatch.setattr(loader, "send_grant_notifications", lambda messages: pytest.fail("sent inline"))
+
+    inserted = loader.load_grants_from_records(
+        [{"OPPORTUNITY_NUMBER": "H-1", "OPPORTUNITY_TITLE": "Clinic", "FUNDING_CATEGORIES": ["Health"]}],
+        bulk=False,
+    )
+
+    assert inserted == 1
+    (used_cur, payloads), = queued
+    assert used_cur is cur
+    assert list(payloads) == ["field@example.org"]
+    assert list(payloads["field@example.org"]["grants"]) == ["H-1"]
+
+
+def test_profile_only_grants_queue_alerts_without_an_upsert(monkeypatch):
+    cur = _OutboxCursor()
+    queued = []
+    _use_cursor(monkeypatch, loader, cur)
+    monkeypatch.setattr(loader, "_upsert_rows", lambda cur, batch: pytest.fail("profile-only grant upserted"))
+    monkeypatch.setattr(loader, "enqueue_notifications", lambda c, payloads: queued.append(payloads) or 1)
+
+    inserted = loader.load_grants_from_records(
+        [],
+        bulk=False,
+        profile_records=[
+            {
+                "OPPORTUNITY_NUMBER": "P-1",
+                "OPPORTUNITY_TITLE": "Museum archives",
+                "FUNDING_CATEGORIES": ["Health"],
+                "MATCHED_PROFILES": {"p@example.org": ["museum"]},
+                "PROFILE_ONLY": True,
+            }
+        ],
+    )
+
+    assert inserted == 0
+    (payloads,) = queued
+    assert list(payloads) == ["p@example.org"]
+    assert list(payloads["p@example.org"]["grants"]) == ["P-1"]
+
+
+def test_dispatch_groups_per_subscriber_and_reschedules_failures(monkeypatch):
+    cur = _OutboxCursor(
+        claims=[
+            [
+                _claimed(1, "a@example.org", "A-1", ["Health"], "2026-09-01T00:00:00"),
+                _claimed(2, "a@example.org", "B-2", ['"rural"']),
+                _claimed(3, "b@example.org", "A-1", ["Health"]),
+            ]
+        ]
+    )
+    _use_cursor(monkeypatch, outbox, cur)
+    transport = _Transport({"b@example.org": False})
+
+    assert outbox.dispatch_outbox(transport=transport, batch_size=10) == 1
+
+    first = transport.sent[0]
+    assert first.recipients == ("a@example.org",)
+    assert "Grant A-1 (ID: A-1)" in first.body and "Due Sep 01, 2026" in first.body
+    assert "Grant B-2 (ID: B-2)" in first.body
+    params = {sql: args for sql, args in cur.executed}
+    assert params[outbox._MARK_SENT_SQL] == ([1, 2],)
+    assert params[outbox._MARK_FAILED_SQL][-1] == [3]
+
+
+def test_dispatch_without_gmail_claims_nothing(monkeypatch):
+    cur = _OutboxCursor(claims=[[_claimed(1, "a@example.org", "A-1", [])]])
+    _use_cursor(monkeypatch, outbox, cur)
+    transport = _Transport()
+    transport.ready = False
+    assert outbox.dispatch_outbox(transport=transport) == 0
+    assert cur.executed == []
+
+
+def test_claim_locks_only_the_picked_subscribers(monkeypatch):
+    cur = _OutboxCursor(claims=[[_claimed(1, "a@example.org", "A-1", [])]])
+    _use_cursor(monkeypatch, outbox, cur)
+
+    outbox.dispatch_outbox(transport=_Transport(), batch_size=5)
+
+    params = next(args for sql, args in cur.executed if sql == outbox._CLAIM_SQL)
+    assert params["limit"] == 5 and params["lock_space"] == outbox._CLAIM_LOCK_SPACE
+    assert "FOR UPDATE" not in outbox._CLAIM_SQL.upper()
+    assert "pg_try_advisory_xact_lock" in outbox._CLAIM_SQL
@@ -0,0 +1,172 @@
+"""End-to-end runs of the pipeline variants with the source and database stubbed."""
+from __future__ import annotations
+
+import csv
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from xml.etree import ElementTree
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+pytest.importorskip("psycopg2")
+pytest.importorskip("googleapiclient")
+
+from grants_data import pipeline
+from grants_data.get_json_data import ExportReadError
+
+_RECENT = (datetime.now() - timedelta(days=3)).strftime("%m/%d/%Y")
+_NEWER = (datetime.now() - timedelta(days=1)).strftime("%m/%d/%Y")
+
+_RECORDS = [
+    {"OPPORTUNITY_NUMBER": "R-1", "POSTED_DATE": _RECENT, "FUNDING_DESCRIPTION": "applied research program"},
+    {"OPPORTUNITY_NUMBER": "R-2", "POSTED_DATE": _NEWER, "FUNDING_DESCRIPTION": "research and training"},
+    {"OPPORTUNITY_NUMBER": "M-1", "POSTED_DATE": _NEWER, "FUNDING_DESCRIPTION": "museum archive preservation"},
+    {"OPPORTUNITY_NUMBER": "OLD", "POSTED_DATE": "01/01/2001", "FUNDING_DESCRIPTION": "research"},
+]
+
+_VARIANTS = ["eager", "streaming", "columnar"]
+
+
+class _Fingerprints:
+    commits = 0
+    unchanged = 0
+
+    def commit(self):
+        self.commits += 1
+
+
+@pytest.fixture
+def run(monkeypatch, tmp_path):
+    loaded = []
+    profile_only = []
+
+    def configure(variant, records=_RECORDS, profiles=None, load_error=None, extract=None):
+        monkeypatch.setenv("GRANTS_PIPELINE_STREAMING", "true" if variant == "streaming" else "false")
+        monkeypatch.setenv("GRANTS_PIPELINE_COLUMNAR", "true" if variant == "columnar" else "false")
+        monkeypatch.setattr(pipeline, "_CSV_DIR", tmp_path)
+        fingerprints = _Fingerprints()
+        monkeypatch.setattr(pipeline, "load_fingerprint_store", lambda: fingerprints)
+        if extract is None:
+            monkeypatch.setattr(pipeline, "_load_source_records", lambda fp, streaming=False: _source(records))
+        else:
+            monkeypatch.setenv("GRANTS_DATA_SOURCE", "extract")
+            monkeypatch.delenv("GRANTS_SNAPSHOT", raising=False)
+            monkeypatch.setattr(pipeline, "gen_extract", _Extract())
+            monkeypatch.setattr(pipeline, "iter_extract_xml", lambda path, fingerprints=None: extract(fingerprints))
+        monkeypatch.setattr(pipeline, "keyword_extractor", lambda: (["research"], 1, True))
+        monkeypatch.setattr(pipeline, "_keyword_profiles", lambda: profiles or {})
+
+        def load(records, profile_records=()):
+            if load_error is not None:
+                raise load_error
+            loaded.extend(records)
+            profile_only.extend(profile_records)
+            return len(loaded)
+
+        monkeypatch.setattr(pipeline, "load_grants_from_records", load)
+        success, final = pipeline.onlyTheGoodStuff()
+        return success, [r["OPPORTUNITY_NUMBER"] for r in final], fingerprints, loaded
+
+    configure.profile_only = profile_only
+    return configure
+
+
+class _Extract:
+    unchanged = False
+    last_extract_path = "extract.zip"
+
+    def __call__(self):
+        return True
+
+
+def _source(records):
+    if callable(records):
+        return records()
+    return [dict(r) for r in records]
+
+
+def _csv_ids(path):
+    with open(path, encoding="utf-8", newline="") as fp:
+        return [row["OPPORTUNITY_NUMBER"] for row in csv.DictReader(fp)]
+
+
+@pytest.mark.parametrize("variant", _VARIANTS)
+def test_variants_share_output_and_commit(run, variant):
+    success, ids, fingerprints, loaded = run(variant)
+
+    assert success and ids == ["R-2", "R-1"]
+    assert [r["OPPORTUNITY_NUMBER"] for r in loaded] == ids
+    assert _csv_ids(pipeline.onlyTheGoodStuff.last_csv_path) == ids
+    assert fingerprints.commits == 1
+
+
+@pytest.mark.parametrize("variant", _VARIANTS)
+def test_nothing_matching_still_commits(run, variant):
+    success, ids, fingerprints, loaded = run(variant, records=_RECORDS[2:])
+
+    assert success and ids == [] and loaded == []
+    assert pipeline.onlyTheGoodStuff.last_csv_path is None
+    assert fingerprints.commits == 1
+
+
+@pytest.mark.parametrize("variant", _VARIANTS)
+def test_empty_source_fails_without_commit(run, variant):
+    success, ids, fingerprints, _loaded = run(variant, records=[])
+    assert not success and ids == [] and fingerprints.commits == 0
+
+
+@pytest.mark.parametrize("variant", _VARIANTS)
+def test_failed_load_does_not_commit(run, variant):
+    success, ids, fingerprints, _loaded = run(variant, load_error=RuntimeError("db down"))
+    assert success and ids == ["R-2", "R-1"] and fingerprints.commits == 0
+
+
+@pytest.mark.parametrize("variant", _VARIANTS)
+def test_profile_only_matches_stay_out_of_shared_output(run, variant):
+    profiles = {"a@example.org": (["museum", "archive"], 2)}
+    success, ids, fingerprints, loaded = run(variant, profiles=profiles)
+
+    assert success and ids == ["R-2", "R-1"]
+    assert [r["OPPORTUNITY_NUMBER"] for r in loaded] == ids
+    assert _csv_ids(pipeline.onlyTheGoodStuff.last_csv_path) == ids
+    (alert,) = run.profile_only
+    assert alert["OPPORTUNITY_NUMBER"] == "M-1"
+    assert alert["MATCHED_PROFILES"] == {"a@example.org": ["museum", "archive"]}
+    assert fingerprints.commits == 1
+
+
+@pytest.mark.parametrize("variant", _VARIANTS)
+def test_profile_only_matches_alone_write_no_csv(run, variant):
+    profiles = {"a@example.org": (["museum"], 1)}
+    success, ids, fingerprints, loaded = run(variant, records=_RECORDS[2:], profiles=profiles)
+
+    assert success and ids == [] and loaded == []
+    assert pipeline.onlyTheGoodStuff.last_csv_path is None
+    assert [r["OPPORTUNITY_NUMBER"] for r in run.profile_only] == ["M-1"]
+    assert fingerprints.commits == 1
+
+
+@pytest.mark.parametrize("variant", ["streaming", "columnar"])
+def test_source_failing_midway_loads_nothing(run, variant):
+    def truncated():
+        yield dict(_RECORDS[0])
+        raise ExportReadError("grants.jsonl.gz: Compressed file ended before the end-of-stream marker was reached")
+
+    success, ids, fingerprints, loaded = run(variant, records=truncated)
+    assert not success and ids == [] and loaded == []
+    assert pipeline.onlyTheGoodStuff.last_csv_path is None and fingerprints.commits == 0
+
+
+@pytest.mark.parametrize("variant", _VARIANTS)
+def test_extract_failing_after_unchanged_records_is_not_success(run, variant):
+    def truncated(fingerprints):
+        fingerprints.unchanged += 1
+        yield from ()
+        raise ElementTree.ParseError("no element found: line 40, column 0")
+
+    success, ids, fingerprints, loaded = run(variant, extract=truncated)
+    assert not success and ids == [] and loaded == []
+    assert fingerprints.unchanged == 1 and fingerprints.commits == 0
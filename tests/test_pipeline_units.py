@@ -1,14 +1,24 @@
 """Unit tests for the pure data-pipeline helpers."""
 from __future__ import annotations
 
+import re
 import sys
+from datetime import datetime
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
-from grants_data.date_filter_data import date_filter_json_data
-from grants_data.keyword_filter_data import filter_grants_by_keywords
+import pytest
+
+from grants_data.columnar import ColumnarRecords, numpy_available
+from grants_data.date_filter_data import date_filter_json_data, lookback_cutoff
+from grants_data.filter_with_forecast import filter_forecasted_data
+from grants_data.dates import PARSED_DATES_KEY, format_extract_date, parse_date, record_date
+from grants_data.external_sort import ExternalSorter
+from grants_data.grant_record import GrantRecord
+from grants_data.keyword_filter_data import KeywordMatcher, ProfileMatcher, filter_grants_by_keywords
 from grants_data.normalize import normalize_records, strip_html
+from grants_data.pipeline import _sort_key
 from llm_utils.gpt_summarizer import description_summarizer
 
 
@@ -48,6 +58,42 @@ class TestNormalizeRecords:
         assert "AGENCY" not in record
 
 
+class TestGrantRecord:
+    def test_derives_duplicate_keys_like_normalize(self):
+        raw = {
+            "AGENCY_NAME": "",
+            "AGENCY_CODE": "USDA-RUS",
+            "OPPORTUNITY_NUMBER_LINK": "https://www.grants.gov/search-results-detail/360670",
+            "CATEGORY_OF_FUNDING_ACTIVITY": "Community Development",
+            "EXPORT_ONLY": 1,
+        }
+        record = GrantRecord.from_mapping(raw)
+        expected = normalize_records([raw])[0]
+        for key, value in expected.items():
+            if key != "PARSED_DATES":
+                assert record[key] == value
+        assert GrantRecord(FUNDING_CATEGORIES=["Health", "Arts"])["CATEGORY_OF_FUNDING_ACTIVITY"] == "Health; Arts"
+
+    def test_mapping_behaviour_and_pickle(self):
+        import pickle
+
+        record = GrantRecord(OPPORTUNITY_NUMBER="A-1", AGENCY_NAME="NSF")
+        assert "POSTED_DATE" not in record and record.get("POSTED_DATE", "x") == "x"
+        record["MATCHED_KEYWORDS"] = ["rural"]
+        enriched = dict(record)
+        assert enriched["AGENCY"] == "NSF" and enriched["MATCHED_KEYWORDS"] == ["rural"]
+        assert record == enriched and pickle.loads(pickle.dumps(record)) == record
+        del record["MATCHED_KEYWORDS"]
+        assert "MATCHED_KEYWORDS" not in record.as_dict()
+
+    def test_normalize_passes_records_through(self):
+        record = GrantRecord(POSTED_DATE="07/01/2026")
+        out = normalize_records([record])[0]
+        assert out is record
+        assert record_date(out, "POSTED_DATE") == datetime(2026, 7, 1)
+        assert out[PARSED_DATES_KEY] == {"POSTED_DATE": ("07/01/2026", datetime(2026, 7, 1))}
+
+
 class TestDateFilter:
     def test_none_and_old_dates_are_dropped(self, monkeypatch):
         monkeypatch.setenv("GRANTS_GOV_LOOKBACK_DAYS", "90")
@@ -69,6 +115,32 @@ class TestDateFilter:
         assert date_filter_json_data([]) == []
 
 
+class TestDates:
+    def test_known_shapes(self):
+        assert parse_date("2026-07-01") == datetime(2026, 7, 1)
+        assert parse_date("07/01/2026") == datetime(2026, 7, 1)
+        assert parse_date("2026-07-01T08:30:00") == datetime(2026, 7, 1, 8, 30)
+        assert parse_date("2026-07-01T08:30:00Z") == datetime(2026, 7, 1, 8, 30)
+
+    def test_strptime_fallback_and_failures(self):
+        assert parse_date("7/1/2026") == datetime(2026, 7, 1)
+        assert parse_date("02/30/2026") is None
+        assert parse_date("not a date") is None
+        assert parse_date("") is None and parse_date(None) is None
+
+    def test_extract_dates(self):
+        assert format_extract_date("07012026") == "07/01/2026"
+        assert format_extract_date("13012026") == "13012026"
+        assert format_extract_date("7/1/2026") == "7/1/2026"
+
+    def test_record_date_reuses_parsed_value(self):
+        record = {"POSTED_DATE": "07/01/2026", PARSED_DATES_KEY: {}}
+        assert record_date(record, "POSTED_DATE") == datetime(2026, 7, 1)
+        assert record[PARSED_DATES_KEY]["POSTED_DATE"] == ("07/01/2026", datetime(2026, 7, 1))
+        record["POSTED_DATE"] = "08/01/2026"
+        assert record_date(record, "POSTED_DATE") == datetime(2026, 8, 1)
+
+
 class TestKeywordFilter:
     def test_matches_ignore_html_markup(self):
         records = [
@@ -97,6 +169,69 @@ class TestKeywordFilter:
         assert all("particular" not in r["FUNDING_DESCRIPTION"] for r in out)
 
 
+class TestKeywordMatcher:
+    def test_overlapping_and_prefix_keywords(self):
+        matcher = KeywordMatcher(["change", "climate change", "climate", "health", "health care"])
+        assert matcher.matches("Climate Change and health care access") == [
+            "change",
+            "climate change",
+            "climate",
+            "health",
+            "health care",
+        ]
+
+    def test_prefix_keyword_needs_its_own_boundary(self):
+        matcher = KeywordMatcher(["health", "health care"])
+        assert matcher.matches("healthcare funding") == []
+        assert matcher.matches("health careers") == ["health"]
+
+    def test_case_variants_and_duplicates_keep_input_order(self):
+        matcher = KeywordMatcher(["AI", "research", "ai", "AI"])
+        assert matcher.keywords == ["AI", "research", "ai"]
+        assert matcher.matches("Applied ai for Research") == ["AI", "research", "ai"]
+
+    def test_agrees_with_per_keyword_patterns(self):
+        keywords = ["c++", "art", "data science", "science", "İstanbul", "ſun", "", "a-b"]
+        texts = ["", "C++ art", "particular science", "DATA  science", "İstanbul sun", "a-b-c", "ſun SUN"]
+        for text in texts:
+            expected = [k for k in keywords if re.search(r"\b" + re.escape(k) + r"\b", text, re.IGNORECASE)]
+            assert KeywordMatcher(keywords).matches(text) == expected, text
+
+
+class TestKeywordProfiles:
+    def test_profiles_share_one_scan(self):
+        matcher = ProfileMatcher(
+            {
+                "a@example.org": (["rural", "broadband"], 2),
+                "b@example.org": (["broadband"], 1),
+                "c@example.org": (["museum"], 1),
+            }
+        )
+        assert matcher.match("Rural broadband deployment") == {
+            "a@example.org": ["rural", "broadband"],
+            "b@example.org": ["broadband"],
+        }
+        assert matcher.match("broadband only") == {"b@example.org": ["broadband"]}
+
+    def test_profile_matches_keep_records_below_global_threshold(self):
+        records = [
+            {"FUNDING_DESCRIPTION": "museum archive preservation"},
+            {"FUNDING_DESCRIPTION": "advanced research program"},
+            {"FUNDING_DESCRIPTION": "nothing relevant"},
+        ]
+        profiles = {"a@example.org": (["museum", "archive"], 2)}
+        out = filter_grants_by_keywords(records, "FUNDING_DESCRIPTION", ["research"], 1, profiles)
+
+        assert [r["MATCHED_KEYWORDS"] for r in out] == [[], ["research"]]
+        assert [r["MATCHED_PROFILES"] for r in out] == [{"a@example.org": ["museum", "archive"]}, {}]
+        assert [r.get("PROFILE_ONLY", False) for r in out] == [True, False]
+
+    def test_without_profiles_records_are_unchanged(self):
+        records = [{"FUNDING_DESCRIPTION": "research"}]
+        out = filter_grants_by_keywords(records, "FUNDING_DESCRIPTION", ["research"], 1, {})
+        assert "MATCHED_PROFILES" not in out[0]
+
+
 class TestSummarizer:
     def test_summary_is_plain_text(self):
         records = [{"FUNDING_DESCRIPTION": "<p>" + "word " * 200 + "&nbsp;</p>"}]
@@ -108,3 +243,72 @@ class TestSummarizer:
     def test_short_description_kept_verbatim(self):
         out = description_summarizer([{"FUNDING_DESCRIPTION": "Short text."}])
         assert out[0]["SUMMARY"] == "Short text."
+
+
+class TestExternalSorter:
+    def test_spilled_merge_matches_in_memory_sort(self):
+        records = [{"n": (i * 37) % 101, "i": i} for i in range(500)]
+        sorter = ExternalSorter(key=lambda r: r["n"], reverse=True, chunk_size=64).extend(records)
+        try:
+            assert sorter.spilled_runs == 7
+            assert len(sorter) == 500
+            expected = sorted(records, key=lambda r: r["n"], reverse=True)
+            assert list(sorter) == expected
+            # Re-iterable, and slicing works like the list it replaces.
+            assert sorter[:5] == expected[:5]
+        finally:
+            sorter.close()
+
+    def test_ties_keep_input_order(self):
+        records = [{"k": 1, "i": i} for i in range(10)]
+        sorter = ExternalSorter(key=lambda r: r["k"], chunk_size=3).extend(records)
+        assert [r["i"] for r in sorter] == list(range(10))
+        sorter.close()
+
+
+def _columnar_sample():
+    from datetime import timedelta
+
+    today = datetime.now()
+    records = []
+    for index in range(40):
+        posted = (today - timedelta(days=(index * 7) % 200)).strftime("%m/%d/%Y")
+        records.append({
+            "OPPORTUNITY_NUMBER": f"OPP-{index % 13:03d}",
+            "OPPORTUNITY_STATUS": "Forecasted" if index % 5 == 0 else "Posted",
+            "POSTED_DATE": posted if index % 9 else ("not a date" if index % 2 else ""),
+            "FUNDING_DESCRIPTION": f"description {index}",
+        })
+    records.append({"OPPORTUNITY_NUMBER": "ODD", "POSTED_DATE": today.strftime("%Y-%m-%d"), "EXTRA": [1, 2]})
+    return normalize_records(records)
+
+
+class TestColumnarRecords:
+    @pytest.mark.parametrize("use_numpy", [False, True])
+    def test_matches_dict_stages(self, monkeypatch, use_numpy):
+        if use_numpy and not numpy_available():
+            pytest.skip("numpy not installed")
+        monkeypatch.setenv("GRANTS_GOV_LOOKBACK_DAYS", "90")
+        records = _columnar_sample()
+        expected = filter_forecasted_data(date_filter_json_data(normalize_records(records)))
+        expected.sort(key=_sort_key, reverse=True)
+
+        store = ColumnarRecords.from_records(normalize_records(records), use_numpy=use_numpy)
+        selection = store.filter_posted_since(lookback_cutoff()[0]).without_forecasted().sorted_by_posted()
+
+        assert len(store) == len(records)
+        assert selection.to_records() == expected
+        assert [record_date(r, "POSTED_DATE") for r in selection] == [_sort_key(r)[0] for r in expected]
+
+    def test_posted_dates_are_rebuilt_from_the_sort_keys(self):
+        posted = datetime(2026, 3, 4, 5, 6, 7, 890)
+        records = [{"POSTED_DATE": posted, "PARSED_DATES": {}}, {"POSTED_DATE": "", "PARSED_DATES": {}}]
+        store = ColumnarRecords.from_records(records, use_numpy=False)
+        assert [r["PARSED_DATES"]["POSTED_DATE"] for r in store] == [(posted, posted), ("", None)]
+
+    def test_materializes_posted_date_and_views_are_read_only(self):
+        records = [{"A": "x", "PARSED_DATES": {}}, {"B": 2}]
+        store = ColumnarRecords.from_records(records, use_numpy=False)
+        assert store.to_records() == [{"A": "x", "PARSED_DATES": {"POSTED_DATE": (None, None)}}, {"B": 2}]
+        with pytest.raises(ValueError):
+            store.without_forecasted().append({"A": "y"})
@@ -0,0 +1,78 @@
+"""Unit tests for the memory-mapped grant snapshot store."""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from grants_data import snapshot as snapshot_module
+from grants_data.grant_record import GrantRecord
+from grants_data.snapshot import GrantSnapshot, iter_with_snapshot, write_snapshot
+
+
+def _records():
+    return [
+        GrantRecord(
+            OPPORTUNITY_ID=str(360670 + index),
+            OPPORTUNITY_NUMBER=f"SW-{index % 3}",
+            OPPORTUNITY_NUMBER_LINK=f"https://www.grants.gov/search-results-detail/{360670 + index}",
+            AGENCY_NAME="Rural Utilities Service",
+            FUNDING_CATEGORIES=["Community Development"],
+            POSTED_DATE="07/01/2026",
+        )
+        for index in range(5)
+    ] + [{"OPPORTUNITY_NUMBER": "EXPORT-1", "AGENCY_NAME": "NSF", "PARSED_DATES": {}}]
+
+
+def test_round_trip_and_lookups(tmp_path):
+    records = _records()
+    path = write_snapshot(records, tmp_path / "grants.gwsnap")
+
+    with GrantSnapshot(path) as snapshot:
+        assert len(snapshot) == 6
+        assert list(snapshot)[:5] == records[:5]
+        assert snapshot.get("360672") == records[2]
+        assert snapshot.get("360672")["OPPORTUNITY_URL"].endswith("/360672")
+        assert [r["OPPORTUNITY_ID"] for r in snapshot.find("SW-1")] == ["360671", "360674"]
+        assert snapshot.get("EXPORT-1", field="OPPORTUNITY_NUMBER")["AGENCY"] == "NSF"
+        assert snapshot.get("360672", field="OPPORTUNITY_NUMBER") is None
+        assert snapshot.get("missing") is None
+        assert bytes(snapshot.raw(0)).startswith(b'{"OPPORTUNITY_ID":"360670"')
+
+
+def test_tee_only_keeps_complete_snapshots(tmp_path):
+    path = tmp_path / "grants.gwsnap"
+
+    def failing():
+        yield from _records()[:2]
+        raise RuntimeError("parse failed")
+
+    with pytest.raises(RuntimeError):
+        list(iter_with_snapshot(failing(), path))
+    assert not path.exists() and not list(tmp_path.iterdir())
+
+    assert list(iter_with_snapshot([], path)) == []
+    assert not path.exists()
+
+    assert len(list(iter_with_snapshot(_records(), path))) == 6
+    assert len(GrantSnapshot(path)) == 6
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "not-a-snapshot.gwsnap"
+    path.write_bytes(b"x" * 64)
+    with pytest.raises(ValueError):
+        GrantSnapshot(path)
+
+
+def test_cli_get_uses_latest_snapshot(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(snapshot_module, "_SNAPSHOT_DIR", tmp_path)
+    write_snapshot(_records())
+
+    snapshot_module.main(["get", "360673"])
+    assert '"OPPORTUNITY_ID": "360673"' in capsys.readouterr().out
+    with pytest.raises(SystemExit):
+        snapshot_module.main(["get", "nope"])
@@ -0,0 +1,246 @@
+"""Unit tests for the async (psycopg 3) query helpers in grants.sql_utils."""
+from __future__ import annotations
+
+import asyncio
+import gc
+import sys
+import weakref
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+pytest.importorskip("psycopg")
+pytest.importorskip("psycopg_pool")
+pytest.importorskip("psycopg2")
+
+from psycopg.conninfo import conninfo_to_dict
+from psycopg.errors import UndefinedTable
+
+from grants.sql_utils import _DSN_ENV_VARS, _FALLBACK_FIELDS_CTE, async_db
+
+
+class _FakeCursor:
+    def __init__(self, rows):
+        self._rows = rows
+        self.executed = []
+        self.rowcount = 1
+        self.missing_catalog = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+        if self.missing_catalog and "FROM grant_field_catalog" in sql:
+            raise UndefinedTable('relation "grant_field_catalog" does not exist')
+
+    async def fetchall(self):
+        return self._rows
+
+    async def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+
+class _FakeConnection:
+    def __init__(self, rows=()):
+        self.cur = _FakeCursor(list(rows))
+
+    def cursor(self, **kwargs):
+        return self.cur
+
+    async def rollback(self):
+        pass
+
+
+def _patch_connection(monkeypatch, conn):
+    @asynccontextmanager
+    async def fake_connection():
+        yield conn
+
+    monkeypatch.setattr(async_db, "async_db_connection", fake_connection)
+
+
+@pytest.fixture(autouse=True)
+def _empty_catalog_cache():
+    async_db.clear_field_catalog_cache()
+    yield
+    async_db.clear_field_catalog_cache()
+
+
+def test_conninfo_from_discrete_settings(monkeypatch):
+    for name in _DSN_ENV_VARS:
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("POSTGRES_HOST", "db.neon.tech")
+    monkeypatch.setenv("POSTGRES_DB", "grants")
+    monkeypatch.setenv("POSTGRES_PORT", "6543")
+    monkeypatch.delenv("POSTGRES_SSLMODE", raising=False)
+    monkeypatch.delenv("PGSSLMODE", raising=False)
+
+    info = conninfo_to_dict(async_db._conninfo())
+
+    assert info["host"] == "db.neon.tech"
+    assert info["dbname"] == "grants"
+    assert info["port"] == "6543"
+    assert info["sslmode"] == "require"
+
+
+def test_conninfo_prefers_dsn(monkeypatch):
+    for name in _DSN_ENV_VARS:
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("POSTGRES_URL", "postgresql://u:p@example.com:5432/grants?sslmode=require")
+
+    info = conninfo_to_dict(async_db._conninfo())
+
+    assert info["host"] == "example.com"
+    assert info["user"] == "u"
+
+
+def test_available_fields_async_reads_catalog_once(monkeypatch):
+    conn = _FakeConnection(rows=[("education", "Education"), ("health", "Health")])
+    _patch_connection(monkeypatch, conn)
+
+    first = asyncio.run(async_db.available_subscription_fields_async(limit=5))
+    second = asyncio.run(async_db.available_subscription_fields_async(limit=1))
+
+    assert first == [("education", "Education"), ("health", "Health")]
+    assert second == [("education", "Education")]
+    assert len(conn.cur.executed) == 1
+    assert "grant_field_catalog" in conn.cur.executed[0][0]
+
+
+def test_catalog_cache_disabled_with_zero_ttl(monkeypatch):
+    monkeypatch.setenv("GRANTS_FIELD_CACHE_SECONDS", "0")
+    conn = _FakeConnection(rows=[("health", "Health")])
+    _patch_connection(monkeypatch, conn)
+
+    asyncio.run(async_db.available_subscription_fields_async())
+    asyncio.run(async_db.available_subscription_fields_async())
+
+    assert len(conn.cur.executed) == 2
+
+
+def test_field_label_served_from_cache(monkeypatch):
+    conn = _FakeConnection(rows=[("health", "Health")])
+    _patch_connection(monkeypatch, conn)
+    asyncio.run(async_db.available_subscription_fields_async())
+
+    assert asyncio.run(async_db.subscription_field_label_async(" HEALTH ")) == "Health"
+    assert len(conn.cur.executed) == 1
+
+
+def test_field_label_miss_uses_key_lookup(monkeypatch):
+    conn = _FakeConnection(rows=[("Energy",)])
+    _patch_connection(monkeypatch, conn)
+
+    assert asyncio.run(async_db.subscription_field_label_async("energy")) == "Energy"
+    assert conn.cur.executed == [(async_db._FIELD_LABEL_SQL, ("energy",))]
+
+
+def test_field_label_without_catalog_matches_the_fallback_listing(monkeypatch):
+    conn = _FakeConnection(rows=[("Energy",)])
+    conn.cur.missing_catalog = True
+    _patch_connection(monkeypatch, conn)
+
+    assert asyncio.run(async_db.subscription_field_label_async("energy")) == "Energy"
+    assert conn.cur.executed[-1] == (async_db._SUBSCRIPTION_FIELD_LABEL_SQL, ("energy",))
+    assert async_db._SUBSCRIPTION_FIELD_LABEL_SQL.startswith(_FALLBACK_FIELDS_CTE)
+
+
+def test_add_subscription_async_normalises(monkeypatch):
+    conn = _FakeConnection()
+    _patch_connection(monkeypatch, conn)
+
+    assert asyncio.run(async_db.add_subscription_async(" Jane@Example.org ", "Health ")) is True
+    assert conn.cur.executed[0][1] == ("jane@example.org", "health")
+
+
+def test_add_subscription_async_rejects_bad_email(monkeypatch):
+    conn = _FakeConnection()
+    _patch_connection(monkeypatch, conn)
+
+    with pytest.raises(ValueError):
+        asyncio.run(async_db.add_subscription_async("not-an-email", "health"))
+    assert conn.cur.executed == []
+
+
+def test_keyword_profile_is_normalised(monkeypatch):
+    conn = _FakeConnection()
+    _patch_connection(monkeypatch, conn)
+
+    stored = asyncio.run(async_db.set_keyword_profile_async("A@Example.org", [" Rural ", "rural", "Broadband"], 2))
+
+    assert stored == ["rural", "broadband"]
+    assert conn.cur.executed[0][1] == ("a@example.org", ["rural", "broadband"], 2)
+
+
+@pytest.mark.parametrize(
+    "keywords, threshold",
+    [([], 1), (["  "], 1), (["rural"], 2), (["rural"], 0)],
+)
+def test_keyword_profile_rejects_invalid(monkeypatch, keywords, threshold):
+    conn = _FakeConnection()
+    _patch_connection(monkeypatch, conn)
+
+    with pytest.raises(ValueError):
+        asyncio.run(async_db.set_keyword_profile_async("a@example.org", keywords, threshold))
+    assert conn.cur.executed == []
+
+
+@pytest.fixture
+def fresh_pool_state(monkeypatch):
+    monkeypatch.setenv("POSTGRES_URL", "postgresql://user:pw@db.invalid/grants")
+    monkeypatch.setenv("POSTGRES_POOL_MIN", "0")
+    for name in ("_pool", "_pool_loop", "_pool_pid", "_pool_lock"):
+        monkeypatch.setattr(async_db, name, None)
+    monkeypatch.setattr(async_db, "_inherited_pools", [])
+
+
+def test_pool_from_a_finished_loop_is_released(fresh_pool_state):
+    first = asyncio.run(async_db.get_async_pool())
+    released = weakref.ref(first)
+    del first
+
+    async def reopen():
+        pool = await async_db.get_async_pool()
+        gc.collect()
+        assert released() is None and not pool.closed
+        await async_db.close_async_pool()
+        return pool
+
+    assert asyncio.run(reopen()).closed
+
+
+def test_pool_on_a_live_loop_is_closed_there(fresh_pool_state):
+    import threading
+
+    other = asyncio.new_event_loop()
+    thread = threading.Thread(target=other.run_forever, daemon=True)
+    thread.start()
+    try:
+        first = asyncio.run_coroutine_threadsafe(async_db.get_async_pool(), other).result(5)
+        second = asyncio.run(async_db.get_async_pool())
+        assert second is not first and first.closed
+        asyncio.run(async_db.close_async_pool())
+    finally:
+        other.call_soon_threadsafe(other.stop)
+        thread.join(5)
+        other.close()
+
+
+def test_forked_worker_keeps_the_inherited_pool_open(fresh_pool_state, monkeypatch):
+    async def both():
+        first = await async_db.get_async_pool()
+        monkeypatch.setattr(async_db.os, "getpid", lambda: -1)
+        second = await async_db.get_async_pool()
+        assert second is not first and not first.closed
+        assert async_db._inherited_pools == [first]
+        await async_db.close_async_pool()
+        await first.close()
+
+    asyncio.run(both())
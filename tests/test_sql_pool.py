@@ -0,0 +1,143 @@
+"""Unit tests for the pooled connection layer in grants.sql_utils."""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+pytest.importorskip("psycopg2")
+
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.pool import PoolError
+
+from grants.sql_utils import pool as pool_module
+from grants.sql_utils.pool import ConnectionPool
+
+
+class _FakeCursor:
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql):
+        if self._conn.dead:
+            raise psycopg2.OperationalError("server closed the connection")
+        self._conn.pings += 1
+
+
+class _FakeInfo:
+    transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+
+class _FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.dead = False
+        self.pings = 0
+        self.info = _FakeInfo()
+
+    def cursor(self):
+        return _FakeCursor(self)
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = 1
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = _Clock()
+    monkeypatch.setattr(pool_module.time, "monotonic", fake)
+    return fake
+
+
+class TestConnectionPool:
+    def test_reuses_released_connection(self, clock):
+        created = []
+        pool = ConnectionPool(lambda: created.append(_FakeConnection()) or created[-1], maxconn=2)
+
+        first = pool.getconn()
+        pool.putconn(first)
+        assert pool.getconn() is first
+        assert len(created) == 1
+
+    def test_exhausted_pool_times_out(self, clock):
+        pool = ConnectionPool(_FakeConnection, maxconn=1, timeout=0)
+        pool.getconn()
+        with pytest.raises(PoolError):
+            pool.getconn()
+
+    def test_idle_connections_are_recycled(self, clock):
+        pool = ConnectionPool(_FakeConnection, maxconn=1, max_idle=60, ping_after=0)
+        stale = pool.getconn()
+        pool.putconn(stale)
+        clock.now += 61
+
+        fresh = pool.getconn()
+        assert fresh is not stale
+        assert stale.closed
+
+    def test_dead_connection_fails_ping_and_is_replaced(self, clock):
+        pool = ConnectionPool(_FakeConnection, maxconn=1, max_idle=600, ping_after=30)
+        conn = pool.getconn()
+        pool.putconn(conn)
+        conn.dead = True
+        clock.now += 31
+
+        replacement = pool.getconn()
+        assert replacement is not conn
+        assert conn.closed
+
+    def test_broken_connection_is_not_pooled(self, clock):
+        pool = ConnectionPool(_FakeConnection, maxconn=1)
+        conn = pool.getconn()
+        pool.putconn(conn, close=True)
+        assert conn.closed
+        assert pool.stats() == {"idle": 0}
+        assert pool.getconn() is not conn
+
+    def test_get_pool_is_recreated_after_fork(self, monkeypatch):
+        monkeypatch.setattr(pool_module, "_pool", None)
+        first = pool_module.get_pool(_FakeConnection)
+        assert pool_module.get_pool(_FakeConnection) is first
+
+        monkeypatch.setattr(pool_module.os, "getpid", lambda: -1)
+        assert pool_module.get_pool(_FakeConnection) is not first
+        pool_module.close_pool()
+
+    def test_forked_child_leaves_parent_connections_open(self, monkeypatch):
+        monkeypatch.setattr(pool_module, "_pool", None)
+        monkeypatch.setattr(pool_module, "_inherited_pools", [])
+        parent = pool_module.get_pool(_FakeConnection)
+        conn = parent.getconn()
+        parent.putconn(conn)
+
+        monkeypatch.setattr(pool_module.os, "getpid", lambda: -1)
+        child = pool_module.get_pool(_FakeConnection)
+        assert child is not parent and pool_module._inherited_pools == [parent]
+        pool_module.close_pool()
+        assert not conn.closed and parent.stats() == {"idle": 1}
+
+        monkeypatch.setattr(pool_module, "_pool", parent)
+        monkeypatch.setattr(pool_module, "_pool_pid", 12345)
+        pool_module.close_pool()
+        assert not conn.closed and pool_module._pool is None
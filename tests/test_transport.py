@@ -0,0 +1,138 @@
+"""Unit tests for the pluggable notification transports."""
+from __future__ import annotations
+
+import mailbox
+import smtplib
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from notifications import transport
+from notifications.transport import MaildirTransport, OutgoingEmail, SmtpTransport, Transport, get_transport
+
+
+class _FakeSMTP:
+    instances = []
+    outcomes = []
+    lock = threading.Lock()
+
+    def __init__(self, host, port, timeout=None):
+        self.sent = []
+        self.closed = False
+        with self.lock:
+            self.instances.append(self)
+
+    def send_message(self, mime, from_addr=None, to_addrs=None):
+        with self.lock:
+            outcome = self.outcomes.pop(0) if self.outcomes else None
+        if outcome is not None:
+            raise outcome
+        self.sent.append((mime["Subject"], tuple(to_addrs)))
+
+    def quit(self):
+        self.closed = True
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fake_smtp(monkeypatch):
+    _FakeSMTP.instances = []
+    _FakeSMTP.outcomes = []
+    sleeps = []
+    monkeypatch.setattr(transport.smtplib, "SMTP", _FakeSMTP)
+    monkeypatch.setattr(transport, "_sleep", sleeps.append)
+    return sleeps
+
+
+def test_smtp_reuses_one_connection_per_thread(fake_smtp, monkeypatch):
+    monkeypatch.setenv("SMTP_SEND_WORKERS", "3")
+    smtp = SmtpTransport(host="relay.test", port=2525, sender="bot@example.org")
+    messages = [OutgoingEmail("s", f"b{i}", (f"u{i}@example.org",)) for i in range(30)]
+
+    assert smtp.send_many(messages) == [True] * 30
+    assert 1 <= len(_FakeSMTP.instances) <= 3
+    assert sum(len(conn.sent) for conn in _FakeSMTP.instances) == 30
+
+    smtp.close()
+    assert all(conn.closed for conn in _FakeSMTP.instances)
+
+
+def test_smtp_batches_share_the_sending_threads(fake_smtp, monkeypatch):
+    monkeypatch.setenv("SMTP_SEND_WORKERS", "2")
+    smtp = SmtpTransport(host="relay.test", port=2525, sender="bot@example.org")
+    for batch in range(5):
+        messages = [OutgoingEmail("s", f"b{i}", (f"u{batch}-{i}@example.org",)) for i in range(6)]
+        assert smtp.send_many(messages) == [True] * 6
+
+    assert 1 <= len(_FakeSMTP.instances) <= 2
+    smtp.close()
+    assert all(conn.closed for conn in _FakeSMTP.instances)
+    assert smtp.send_many([OutgoingEmail("s", "b", ("late@example.org",))]) == [True]
+    smtp.close()
+
+
+def test_smtp_retries_transient_failures_only(fake_smtp):
+    smtp = SmtpTransport(host="relay.test", port=2525)
+    _FakeSMTP.outcomes.extend([smtplib.SMTPServerDisconnected("gone"), smtplib.SMTPDataError(451, b"try later")])
+    assert smtp.send("s", "b", ["a@example.org"])
+    assert len(fake_smtp) == 2 and len(_FakeSMTP.instances) == 3
+
+    _FakeSMTP.outcomes.append(smtplib.SMTPDataError(550, b"no such user"))
+    assert not smtp.send("s", "b", ["a@example.org"])
+    assert len(fake_smtp) == 2
+
+
+def test_maildir_sink_stores_multipart_messages(tmp_path):
+    sink = MaildirTransport(tmp_path / "mail")
+    results = sink.send_many(
+        [OutgoingEmail("Plain", "body", ("a@example.org",)), OutgoingEmail("Rich", "body", ("b@example.org",), "<p>hi</p>")]
+    )
+
+    assert results == [True, True]
+    stored = {message["Subject"]: message for message in mailbox.Maildir(str(tmp_path / "mail"))}
+    assert stored["Plain"]["To"] == "a@example.org"
+    assert stored["Rich"].get_content_type() == "multipart/alternative"
+
+
+def test_transport_is_selected_from_env(monkeypatch, tmp_path):
+    monkeypatch.setenv("NOTIFY_MAILDIR", str(tmp_path))
+    monkeypatch.setenv("NOTIFY_TRANSPORT", "file")
+    assert isinstance(get_transport(), MaildirTransport)
+    assert (tmp_path / "new").is_dir()
+    monkeypatch.setenv("NOTIFY_TRANSPORT", "smtp")
+    assert isinstance(get_transport(), SmtpTransport)
+    monkeypatch.setenv("NOTIFY_TRANSPORT", "carrier-pigeon")
+    assert transport.transport_name() == "gmail"
+
+
+def test_transport_subclasses_must_implement_send():
+    class _NoSend(Transport):
+        pass
+
+    with pytest.raises(TypeError):
+        _NoSend()
+
+
+def test_smtp_settings_fall_back_and_clamp(monkeypatch):
+    monkeypatch.setenv("SMTP_SEND_WORKERS", "0")
+    monkeypatch.setenv("SMTP_SEND_RETRIES", "lots")
+    monkeypatch.setenv("SMTP_PORT", " 2525 ")
+    smtp = SmtpTransport()
+    assert (smtp.workers, smtp.retries, smtp.port) == (1, 3, 2525)
+
+
+def test_module_helpers_use_the_configured_transport(monkeypatch, tmp_path):
+    pytest.importorskip("googleapiclient")
+    from notifications import gmail_notifier
+
+    monkeypatch.setenv("NOTIFY_TRANSPORT", "maildir")
+    monkeypatch.setenv("NOTIFY_MAILDIR", str(tmp_path))
+    assert gmail_notifier.send_grant_notifications([OutgoingEmail("s", "b", ("a@example.org",))]) == [True]
+    assert gmail_notifier.send_grant_notification("s", "b", ["b@example.org"])
+    assert len(list((tmp_path / "new").iterdir())) == 2
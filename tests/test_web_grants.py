@@ -0,0 +1,148 @@
+"""Unit tests for pagination, projection and search in the /api/grants handlers."""
+from __future__ import annotations
+
+import asyncio
+import sys
+from contextlib import asynccontextmanager
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(REPO_ROOT / "src"))
+
+pytest.importorskip("fastapi")
+pytest.importorskip("psycopg")
+
+from fastapi import HTTPException
+
+from web import app as web_app
+
+
+def _grant(opp_id, close=None, post=None):
+    return {
+        "opp_id": opp_id,
+        "title": f"Grant {opp_id}",
+        "stage": None,
+        "opportunity_status": "Posted",
+        "opportunity_category": "D",
+        "funding_categories": "Health",
+        "post_date": post,
+        "close_date": close,
+        "description": "long text",
+    }
+
+
+class _FakeCursor:
+    def __init__(self, rows):
+        self._rows = rows
+        self.executed = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, sql, params=None):
+        self.executed.append((sql, dict(params or {})))
+
+    async def fetchall(self):
+        return self._rows
+
+    async def fetchone(self):
+        return {"QUERY PLAN": [{"Plan": {"Plan Rows": 1234}}]}
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    holder = {}
+
+    def install(rows):
+        cur = _FakeCursor(rows)
+        holder["cur"] = cur
+
+        class _Conn:
+            def cursor(self, **kwargs):
+                return cur
+
+        @asynccontextmanager
+        async def fake_connection():
+            yield _Conn()
+
+        monkeypatch.setattr(web_app, "async_db_connection", fake_connection)
+        return cur
+
+    return install
+
+
+def _get(**overrides):
+    kwargs = dict(stage=None, due_from=None, due_to=None, field=None, limit=2, cursor=None, fields=None)
+    kwargs.update(overrides)
+    return asyncio.run(web_app.get_grants(**kwargs))
+
+
+def test_cursor_round_trip():
+    row = {"opp_id": "A-1", "close_date": datetime(2026, 9, 1), "post_date": None}
+    decoded = web_app._decode_cursor(web_app._encode_cursor(row))
+    assert decoded == {"close": datetime(2026, 9, 1), "post": None, "opp_id": "A-1"}
+
+
+def test_invalid_cursor_is_rejected():
+    with pytest.raises(HTTPException) as info:
+        web_app._decode_cursor("not-a-cursor")
+    assert info.value.status_code == 400
+
+
+def test_projection_validates_names():
+    assert web_app._projection("title, opp_id") == ["opp_id", "title"]
+    with pytest.raises(HTTPException):
+        web_app._projection("title,secret")
+
+
+def test_first_page_has_cursor_and_estimate(fake_db):
+    cur = fake_db([_grant("A", close=datetime(2026, 9, 1)), _grant("B"), _grant("C")])
+
+    payload = _get(fields="opp_id,title")
+
+    assert [item["opp_id"] for item in payload["results"]] == ["A", "B"]
+    assert set(payload["results"][0]) == {"opp_id", "title"}
+    assert payload["estimated_total"] == 1234
+    assert web_app._decode_cursor(payload["next_cursor"])["opp_id"] == "B"
+    assert cur.executed[0][1]["page_limit"] == 3
+    assert cur.executed[1][0].startswith("EXPLAIN")
+
+
+def test_following_page_seeks_past_cursor(fake_db):
+    cur = fake_db([_grant("C")])
+    token = web_app._encode_cursor({"opp_id": "B", "close_date": None, "post_date": None})
+
+    payload = _get(cursor=token)
+
+    sql, params = cur.executed[0]
+    assert "opp_id > %(opp_id)s" in sql
+    assert params["opp_id"] == "B" and params["close"] is None
+    assert payload["next_cursor"] is None
+    assert "estimated_total" not in payload
+    assert len(cur.executed) == 1
+
+
+def test_search_ranks_and_projects(fake_db):
+    row = _grant("A")
+    row["rank"] = 0.0759909
+    cur = fake_db([row])
+
+    payload = asyncio.run(web_app.search_grants(q="  rural health ", limit=5, fields="title"))
+
+    assert payload == {"results": [{"title": "Grant A", "rank": 0.075991}]}
+    sql, params = cur.executed[0]
+    assert "websearch_to_tsquery" in sql and "search_vector @@ query" in sql
+    assert params == {"q": "rural health", "limit": 5}
+
+
+def test_search_rejects_blank_query():
+    with pytest.raises(HTTPException) as info:
+        asyncio.run(web_app.search_grants(q="   ", limit=5, fields=None))
+    assert info.value.status_code == 400